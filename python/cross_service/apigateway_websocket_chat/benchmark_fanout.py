@@ -0,0 +1,154 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures how long lambda_chat.handle_message takes to broadcast a message as the
+number of connections in the chat grows, with posts sent one at a time and from a
+pool of threads.
+
+The benchmark uses stand-in clients that add a fixed latency to each call instead
+of calling AWS, and marks a fraction of connections as gone so that stale
+connections are removed in batches. Run it from this folder:
+
+    python benchmark_fanout.py
+"""
+
+import argparse
+import logging
+import time
+
+from botocore.exceptions import ClientError
+
+import lambda_chat
+
+
+class GoneException(ClientError):
+    pass
+
+
+class StandInApiGatewayManagementClient:
+    """Accepts posts after a fixed latency and reports some connections as gone."""
+
+    class exceptions:
+        GoneException = GoneException
+
+    def __init__(self, latency, gone_ids):
+        self.latency = latency
+        self.gone_ids = gone_ids
+
+    def post_to_connection(self, Data, ConnectionId):
+        time.sleep(self.latency)
+        if ConnectionId in self.gone_ids:
+            raise GoneException(
+                {"Error": {"Code": "GoneException", "Message": "Gone"}},
+                "PostToConnection",
+            )
+        return {}
+
+
+class StandInBatchWriter:
+    def __init__(self, table):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def delete_item(self, Key):
+        self.table.deleted.append(Key["connection_id"])
+
+
+class StandInTable:
+    """Stands in for a DynamoDB Table resource that holds connections."""
+
+    # A scan returns at most 1 MB, which is several thousand connection IDs.
+    page_size = 5000
+
+    def __init__(self, name, connection_ids, latency):
+        self.name = name
+        self.connection_ids = connection_ids
+        self.latency = latency
+        self.deleted = []
+
+    def get_item(self, Key):
+        time.sleep(self.latency)
+        return {"Item": {"connection_id": Key["connection_id"], "user_name": "bench"}}
+
+    def scan(self, ProjectionExpression, ExclusiveStartKey=None):
+        time.sleep(self.latency)
+        start = 0 if ExclusiveStartKey is None else ExclusiveStartKey["index"]
+        page = self.connection_ids[start : start + self.page_size]
+        response = {"Items": [{"connection_id": conn_id} for conn_id in page]}
+        if start + self.page_size < len(self.connection_ids):
+            response["LastEvaluatedKey"] = {"index": start + self.page_size}
+        return response
+
+    def batch_writer(self):
+        time.sleep(self.latency)
+        return StandInBatchWriter(self)
+
+
+def measure(room_size, max_workers, post_latency, table_latency, gone_ratio):
+    """
+    :return: The number of seconds that handle_message takes to broadcast a message.
+    """
+    connection_ids = [f"conn-{index}" for index in range(room_size)]
+    gone_ids = set(connection_ids[1 : int(room_size * gone_ratio) + 1])
+    table = StandInTable(f"bench-{room_size}", connection_ids, table_latency)
+    client = StandInApiGatewayManagementClient(post_latency, gone_ids)
+    lambda_chat.connection_cache.clear()
+    start = time.perf_counter()
+    lambda_chat.handle_message(
+        table, connection_ids[0], {"msg": "Hello"}, client, max_workers=max_workers
+    )
+    elapsed = time.perf_counter() - start
+    assert sorted(table.deleted) == sorted(gone_ids)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--room-sizes", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument(
+        "--post-latency",
+        type=float,
+        default=0.005,
+        help="The latency of each post to a connection, in seconds.",
+    )
+    parser.add_argument(
+        "--table-latency",
+        type=float,
+        default=0.005,
+        help="The latency of each DynamoDB call, in seconds.",
+    )
+    parser.add_argument(
+        "--gone-ratio",
+        type=float,
+        default=0.05,
+        help="The fraction of connections that are gone.",
+    )
+    args = parser.parse_args()
+    # Posting logs a line for every connection, which is not what is measured here.
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f"{'Connections':>12}{'Serial (s)':>14}{'Pool (s)':>12}{'Speedup':>10}")
+    for room_size in args.room_sizes:
+        serial, pooled = (
+            measure(
+                room_size,
+                max_workers,
+                args.post_latency,
+                args.table_latency,
+                args.gone_ratio,
+            )
+            for max_workers in (1, lambda_chat.MAX_POST_WORKERS)
+        )
+        print(f"{room_size:>12}{serial:>14.3f}{pooled:>12.3f}{serial / pooled:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
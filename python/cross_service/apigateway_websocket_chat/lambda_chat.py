@@ -13,15 +13,57 @@ API Gateway Management API.
 Logs written by this handler can be found in Amazon CloudWatch.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
 import os
+import time
 import boto3
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# The number of seconds that a warm Lambda container reuses the list of connections
+# before it scans the table again. A new connection made through another container
+# can miss messages for up to this long.
+CONNECTION_CACHE_TTL = 5
+
+# The number of threads that post a message to connections at the same time.
+MAX_POST_WORKERS = 32
+
+# Connection IDs cached between invocations, keyed by table name. Each entry is a
+# tuple of the time the entry expires and the list of connection IDs.
+connection_cache = {}
+
+
+def get_connection_ids(table, cache_ttl=CONNECTION_CACHE_TTL):
+    """
+    Gets the IDs of all connections in the table. The table is scanned one page at a
+    time, so that the list is complete even when it is larger than the 1 MB that a
+    single scan returns. The list is cached for a short time so that a busy chat
+    doesn't scan the table for every message.
+
+    :param table: The DynamoDB connection table.
+    :param cache_ttl: The number of seconds to cache the list of connections.
+    :return: The list of connection IDs.
+    """
+    now = time.monotonic()
+    cached = connection_cache.get(table.name)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    connection_ids = []
+    scan_kwargs = {"ProjectionExpression": "connection_id"}
+    while True:
+        scan_response = table.scan(**scan_kwargs)
+        connection_ids.extend(item["connection_id"] for item in scan_response["Items"])
+        if "LastEvaluatedKey" not in scan_response:
+            break
+        scan_kwargs["ExclusiveStartKey"] = scan_response["LastEvaluatedKey"]
+    connection_cache[table.name] = (now + cache_ttl, connection_ids)
+    return connection_ids
+
 
 def handle_connect(user_name, table, connection_id):
     """
@@ -37,6 +79,7 @@ def handle_connect(user_name, table, connection_id):
     status_code = 200
     try:
         table.put_item(Item={"connection_id": connection_id, "user_name": user_name})
+        connection_cache.pop(table.name, None)
         logger.info("Added connection %s for user %s.", connection_id, user_name)
     except ClientError:
         logger.exception(
@@ -58,6 +101,7 @@ def handle_disconnect(table, connection_id):
     status_code = 200
     try:
         table.delete_item(Key={"connection_id": connection_id})
+        connection_cache.pop(table.name, None)
         logger.info("Disconnected connection %s.", connection_id)
     except ClientError:
         logger.exception("Couldn't disconnect connection %s.", connection_id)
@@ -65,21 +109,56 @@ def handle_disconnect(table, connection_id):
     return status_code
 
 
-def handle_message(table, connection_id, event_body, apig_management_client):
+def post_to_connection(apig_management_client, connection_id, message):
+    """
+    Posts a message to a single connection.
+
+    :param apig_management_client: A Boto3 API Gateway Management API client.
+    :param connection_id: The ID of the connection to post to.
+    :param message: The message to post.
+    :return: True when the connection is gone; otherwise, False.
+    """
+    try:
+        send_response = apig_management_client.post_to_connection(
+            Data=message, ConnectionId=connection_id
+        )
+        logger.info(
+            "Posted message to connection %s, got response %s.",
+            connection_id,
+            send_response,
+        )
+    except apig_management_client.exceptions.GoneException:
+        logger.info("Connection %s is gone, removing.", connection_id)
+        return True
+    except ClientError:
+        logger.exception("Couldn't post to connection %s.", connection_id)
+    return False
+
+
+def handle_message(
+    table,
+    connection_id,
+    event_body,
+    apig_management_client,
+    max_workers=MAX_POST_WORKERS,
+):
     """
     Handles messages sent by a participant in the chat. Looks up all connections
     currently tracked in the DynamoDB table, and uses the API Gateway Management API
-    to post the message to each other connection.
+    to post the message to each other connection. Posts are sent from a pool of
+    threads, so the time to send a message grows slowly with the size of the chat.
 
     When posting to a connection results in a GoneException, the connection is
     considered disconnected and is removed from the table. This is necessary
     because disconnect messages are not always sent when a client disconnects.
+    Gone connections are removed together in batches.
 
     :param table: The DynamoDB connection table.
     :param connection_id: The ID of the connection that sent the message.
     :param event_body: The body of the message sent from API Gateway. This is a
                        dict with a `msg` field that contains the message to send.
     :param apig_management_client: A Boto3 API Gateway Management API client.
+    :param max_workers: The number of threads that post the message.
     :return: An HTTP status code that indicates the result of posting the message
              to all active connections.
     """
@@ -94,8 +173,7 @@ def handle_message(table, connection_id, event_body, apig_management_client):
 
     connection_ids = []
     try:
-        scan_response = table.scan(ProjectionExpression="connection_id")
-        connection_ids = [item["connection_id"] for item in scan_response["Items"]]
+        connection_ids = get_connection_ids(table)
         logger.info("Found %s active connections.", len(connection_ids))
     except ClientError:
         logger.exception("Couldn't get connections.")
@@ -104,25 +182,32 @@ def handle_message(table, connection_id, event_body, apig_management_client):
     message = f"{user_name}: {event_body['msg']}".encode("utf-8")
     logger.info("Message: %s", message)
 
-    for other_conn_id in connection_ids:
+    other_conn_ids = [
+        other_conn_id
+        for other_conn_id in connection_ids
+        if other_conn_id != connection_id
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        gone = executor.map(
+            lambda other_conn_id: post_to_connection(
+                apig_management_client, other_conn_id, message
+            ),
+            other_conn_ids,
+        )
+        gone_conn_ids = [
+            other_conn_id
+            for other_conn_id, is_gone in zip(other_conn_ids, gone)
+            if is_gone
+        ]
+
+    if gone_conn_ids:
         try:
-            if other_conn_id != connection_id:
-                send_response = apig_management_client.post_to_connection(
-                    Data=message, ConnectionId=other_conn_id
-                )
-                logger.info(
-                    "Posted message to connection %s, got response %s.",
-                    other_conn_id,
-                    send_response,
-                )
+            with table.batch_writer() as batch:
+                for gone_conn_id in gone_conn_ids:
+                    batch.delete_item(Key={"connection_id": gone_conn_id})
+            connection_cache.pop(table.name, None)
         except ClientError:
-            logger.exception("Couldn't post to connection %s.", other_conn_id)
-        except apig_management_client.exceptions.GoneException:
-            logger.info("Connection %s is gone, removing.", other_conn_id)
-            try:
-                table.delete_item(Key={"connection_id": other_conn_id})
-            except ClientError:
-                logger.exception("Couldn't remove connection %s.", other_conn_id)
+            logger.exception("Couldn't remove connections %s.", gone_conn_ids)
 
     return status_code
 
@@ -12,6 +12,11 @@ import pytest
 import lambda_chat
 
 
+@pytest.fixture(autouse=True)
+def clear_connection_cache():
+    lambda_chat.connection_cache.clear()
+
+
 @pytest.mark.parametrize(
     "error_code,status_code", [(None, 200), ("TestException", 503)]
 )
@@ -56,6 +61,7 @@ def test_handle_disconnect(make_stubber, error_code, status_code):
         ("TestException", "stub_get_item", 200),
         ("TestException", "stub_scan", 404),
         ("TestException", "stub_post_to_connection", 200),
+        ("GoneException", "stub_post_to_connection", 200),
     ],
 )
 def test_handle_message(
@@ -89,9 +95,17 @@ def test_handle_message(
         apig_management_stubber.stub_post_to_connection(
             f"{user_name}: {msg}".encode("utf-8"),
             other_connection_id,
-            error_code=error_code
-            if error_method == "stub_post_to_connection"
-            else None,
+            error_code=(
+                error_code if error_method == "stub_post_to_connection" else None
+            ),
+        )
+    if error_code == "GoneException":
+        dynamodb_stubber.stub_batch_write_item(
+            {
+                table.name: [
+                    {"DeleteRequest": {"Key": {"connection_id": other_connection_id}}}
+                ]
+            }
         )
 
     got_status_code = lambda_chat.handle_message(
@@ -100,6 +114,38 @@ def test_handle_message(
     assert got_status_code == status_code
 
 
+def test_get_connection_ids_paginated_and_cached(make_stubber, monkeypatch):
+    dynamodb_resource = boto3.resource("dynamodb")
+    dynamodb_stubber = make_stubber(dynamodb_resource.meta.client)
+    table = dynamodb_resource.Table("test-table")
+    now = 1000
+    monkeypatch.setattr(lambda_chat.time, "monotonic", lambda: now)
+
+    dynamodb_stubber.stub_scan(
+        table.name,
+        [{"connection_id": "conn-1"}],
+        projection_expression="connection_id",
+        last_key={"connection_id": {"S": "conn-1"}},
+    )
+    dynamodb_stubber.stub_scan(
+        table.name,
+        [{"connection_id": "conn-2"}],
+        projection_expression="connection_id",
+        start_key={"connection_id": "conn-1"},
+    )
+
+    assert lambda_chat.get_connection_ids(table, cache_ttl=5) == ["conn-1", "conn-2"]
+    # A second call within the TTL uses the cache instead of scanning again.
+    now = 1004
+    assert lambda_chat.get_connection_ids(table, cache_ttl=5) == ["conn-1", "conn-2"]
+
+    now = 1005
+    dynamodb_stubber.stub_scan(
+        table.name, [{"connection_id": "conn-3"}], projection_expression="connection_id"
+    )
+    assert lambda_chat.get_connection_ids(table, cache_ttl=5) == ["conn-3"]
+
+
 @pytest.mark.parametrize(
     "table_name,route,connection_id,user_name,msg_body,domain,stage,status_code",
     [
@@ -10,7 +10,9 @@ PostgreSQL-compatible database.
 This file is deployed to AWS Lambda as part of the Chalice deployment.
 """
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import datetime
+import itertools
 import logging
 import os
 import boto3
@@ -19,7 +21,7 @@ from .postgresql_helper import Table, Column, ForeignKey
 from .postgresql_helper import (
     create_table,
     insert,
-    insert_without_batch,
+    insert_rows,
     insert_returning,
     update,
     query,
@@ -28,10 +30,18 @@ from .postgresql_helper import (
     unpack_insert_results_v2,
     delete,
 )
-
+from .query_cache import QueryCache
 
 logger = logging.getLogger(__name__)
 
+# The Data API limits the size of each request and response, so bulk loads are
+# split into chunks that stay well within the limits.
+DEFAULT_CHUNK_ROWS = 500
+DEFAULT_CHUNK_BYTES = 256 * 1024
+# Each chunk is added in its own transaction. Limit how many run at the same time
+# so that a bulk load doesn't use all of the connections to the database.
+DEFAULT_MAX_TRANSACTIONS = 4
+
 
 class DataServiceNotReadyException(Exception):
     pass
@@ -42,7 +52,7 @@ class Storage:
     Wraps calls to the Amazon RDS Data Service.
     """
 
-    def __init__(self, cluster, secret, db_name, rdsdata_client):
+    def __init__(self, cluster, secret, db_name, rdsdata_client, query_cache=None):
         """
         Initialize the storage object.
 
@@ -53,11 +63,14 @@ class Storage:
                        to connect to the database.
         :param db_name: The name of the library database.
         :param rdsdata_client: The Boto3 RDS Data Service client.
+        :param query_cache: A QueryCache that holds the results of queries. When
+                            None, every query is sent to the database.
         """
         self._cluster = cluster
         self._secret = secret
         self._db_name = db_name
         self._rdsdata_client = rdsdata_client
+        self._query_cache = query_cache
         self._tables = {
             "Authors": Table(
                 "Authors",
@@ -126,7 +139,8 @@ class Storage:
     @classmethod
     def from_env(cls):
         """
-        Creates a storage object based on environment variables.
+        Creates a storage object based on environment variables. Query results
+        are cached unless QUERY_CACHE_SIZE is 0.
         """
         cluster_name = os.environ.get("CLUSTER_NAME", "")
         secret_name = os.environ.get("SECRET_NAME", "")
@@ -136,7 +150,13 @@ class Storage:
         )["DBClusters"][0]
         secret = boto3.client("secretsmanager").describe_secret(SecretId=secret_name)
         rdsdata_client = boto3.client("rds-data")
-        return cls(cluster, secret, db_name, rdsdata_client)
+        cache_size = int(os.environ.get("QUERY_CACHE_SIZE", 256))
+        query_cache = (
+            QueryCache(cache_size, int(os.environ.get("QUERY_CACHE_TTL", 60)))
+            if cache_size > 0
+            else None
+        )
+        return cls(cluster, secret, db_name, rdsdata_client, query_cache)
 
     def _begin_transaction(self):
         """
@@ -217,13 +237,14 @@ class Storage:
         else:
             return result
 
-    def _run_batch_statement(self, sql, sql_param_sets):
+    def _run_batch_statement(self, sql, sql_param_sets, transaction_id=None):
         """
         Runs a batch SQL statement and associated parameter sets using RDS Data Service.
 
         :param sql: The SQL statement to run.
         :param sql_param_sets: The parameter sets associated with the SQL statement.
                                Each parameter set represents an item in the batch.
+        :transaction_id: The ID of a previously created transaction.
         :return: The result of running the batch SQL statement.
         """
         try:
@@ -234,6 +255,8 @@ class Storage:
                 "sql": sql,
                 "parameterSets": sql_param_sets,
             }
+            if transaction_id is not None:
+                run_args["transactionId"] = transaction_id
             result = self._rdsdata_client.batch_execute_statement(**run_args)
             logger.info("Ran batch statement on %s.", self._db_name)
         except ClientError:
@@ -242,6 +265,40 @@ class Storage:
         else:
             return result
 
+    def _run_query(self, sql, columns, sql_params=None):
+        """
+        Runs a query and unpacks its results. When the storage has a query cache,
+        results are read through the cache.
+
+        :param sql: The SQL statement to run, as made by the `query` function.
+        :param columns: The columns of the query, as made by the `query` function.
+        :param sql_params: The parameters associated with the SQL statement.
+        :return: The query records as a list of Python dicts.
+        """
+        if self._query_cache is None:
+            results = self._run_statement(sql, sql_params=sql_params)
+            return unpack_query_results(columns, results)
+        key = self._query_cache.make_key(sql, sql_params)
+        output = self._query_cache.get(key)
+        if output is None:
+            generation = self._query_cache.generation
+            results = self._run_statement(sql, sql_params=sql_params)
+            output = unpack_query_results(columns, results)
+            tables = {column.split(".")[0] for column in columns}
+            self._query_cache.put(key, tables, output, generation)
+        logger.info("Query cache stats: %s.", self._query_cache.stats())
+        # Copy the records so that callers can't change the cached result.
+        return [dict(record) for record in output]
+
+    def _invalidate(self, *tables):
+        """
+        Removes cached query results that read any of the specified tables.
+
+        :param tables: The names of the tables that were written.
+        """
+        if self._query_cache is not None:
+            self._query_cache.invalidate(*tables)
+
     def bootstrap_tables(self):
         """
         Creates tables in the database. The tables are defined in the constructor.
@@ -251,7 +308,95 @@ class Storage:
             sql = create_table(table)
             self._run_statement(sql)
 
-    def add_books(self, books):
+    def _add_books_chunk(self, chunk):
+        """
+        Adds a chunk of authors and their books to the database in a single
+        transaction, so that a chunk is either added completely or not at all.
+
+        :param chunk: A list of (author, titles) pairs, where each author is a dict
+                      with FirstName and LastName fields.
+        :return: The counts of authors and books added to the database.
+        """
+        transaction_id = self._begin_transaction()
+        try:
+            sql, sql_params = insert_rows(
+                self._tables["Authors"], [author for author, _ in chunk]
+            )
+            result = self._run_statement(
+                sql, sql_params=sql_params, transaction_id=transaction_id
+            )
+            # Each record is an inserted row of AuthorID, FirstName, and LastName.
+            author_ids = {
+                (first["stringValue"], last["stringValue"]): author_id["longValue"]
+                for author_id, first, last in result["records"]
+            }
+            sql, sql_param_sets = insert(
+                self._tables["Books"],
+                [
+                    {
+                        "Title": title,
+                        "AuthorID": author_ids[
+                            (author["FirstName"], author["LastName"])
+                        ],
+                    }
+                    for author, titles in chunk
+                    for title in titles
+                ],
+            )
+            result = self._run_batch_statement(
+                sql, sql_param_sets, transaction_id=transaction_id
+            )
+        except Exception:
+            transaction_status = self._rollback_transaction(transaction_id)
+            logger.warning(
+                "Transaction %s rolled back with status %s.",
+                transaction_id,
+                transaction_status,
+            )
+            raise
+        else:
+            self._commit_transaction(transaction_id)
+        return len(author_ids), len(result["updateResults"])
+
+    @staticmethod
+    def _chunk_books(authors, chunk_rows, chunk_bytes):
+        """
+        Splits authors and their books into chunks that each stay within a number
+        of rows and an estimated request size. An author and all of their books are
+        always in the same chunk, so that each chunk can be added on its own. An
+        author with more books than fit in a chunk gets a chunk of their own.
+
+        :param authors: A dict of authors and their books, as (author, titles) pairs.
+        :param chunk_rows: The maximum number of author and book rows in a chunk.
+        :param chunk_bytes: The maximum estimated size of the parameters of a chunk.
+        :return: A generator of chunks, each a list of (author, titles) pairs.
+        """
+        chunk, rows, size = [], 0, 0
+        for author, titles in authors.values():
+            group_rows = 1 + len(titles)
+            # Each parameter takes about 60 bytes of JSON in addition to its value.
+            group_size = sum(len(value) + 60 for value in author.values()) + sum(
+                len(title) + 120 for title in titles
+            )
+            if chunk and (
+                rows + group_rows > chunk_rows or size + group_size > chunk_bytes
+            ):
+                yield chunk
+                chunk, rows, size = [], 0, 0
+            chunk.append((author, titles))
+            rows += group_rows
+            size += group_size
+        if chunk:
+            yield chunk
+
+    def add_books(
+        self,
+        books,
+        chunk_rows=DEFAULT_CHUNK_ROWS,
+        chunk_bytes=DEFAULT_CHUNK_BYTES,
+        max_transactions=DEFAULT_MAX_TRANSACTIONS,
+        progress=None,
+    ):
         """
         Adds a list of books and their authors to the database. The list of authors
         is first processed to remove duplicates. The data is set up with a foreign
@@ -259,74 +404,59 @@ class Storage:
         an auto-generated author ID. The book information and the corresponding author ID
         is added to the Books table.
 
+        The Data API limits the size of each request, so the books are added in
+        chunks. Each chunk is added in its own transaction, and several chunks are
+        added at the same time. When a chunk fails, no more chunks are started and
+        the error is raised, but chunks that are already committed stay in the
+        database.
+
         :param books: The list of books and their authors to add to the database.
+        :param chunk_rows: The maximum number of author and book rows in a chunk.
+        :param chunk_bytes: The maximum estimated size of the parameters of a chunk.
+        :param max_transactions: The maximum number of chunks to add at the same time.
+        :param progress: A function that is called after each chunk is added with
+                         the total counts of authors and books added so far.
         :return: The counts of authors and books added to the database.
         """
-        authors = {
-            book["author"]: {
-                "FirstName": " ".join(book["author"].split(" ")[:-1]),
-                "LastName": book["author"].split(" ")[-1],
-            }
-            for book in books
-        }
-
-        # Construct a list of '(FirstName, LastName)' strings to be substituted into
-        # the VALUES clause of the INSERT statement.
-        authors_plain = [
-            """($first$%s$first$, $last$%s$last$)"""
-            % (" ".join(book["author"].split(" ")[:-1]), book["author"].split(" ")[-1])
-            for book in books
-        ]
-        values_clause = ", ".join(authors_plain)
-
-        sql = insert_without_batch(self._tables["Authors"], values_clause)
-
-        #        result = self._run_batch_statement(sql, sql_param_sets)
-        # Format the parameter set into a big string '''("John", "Smith"), ("Jane", "Jones") ...etc...'''
-        # that can be substituted straight into the VALUES clause of the INSERT statement.
-        result = self._run_statement(sql)
+        authors = {}
+        for book in books:
+            if book["author"] not in authors:
+                authors[book["author"]] = (
+                    {
+                        "FirstName": " ".join(book["author"].split(" ")[:-1]),
+                        "LastName": book["author"].split(" ")[-1],
+                    },
+                    [],
+                )
+            authors[book["author"]][1].append(book["title"])
 
+        author_count = book_count = 0
+        chunks = self._chunk_books(authors, chunk_rows, chunk_bytes)
         try:
-            author_count = len(result["updateResults"])
-            logger.info(
-                "Added %s authors to the database. Result set included updateResults field.",
-                author_count,
-            )
-        except:
-            pass
-        try:
-            author_count = len(result["records"])
-            logger.info(
-                "Added %s authors to the database. Result set included records field.",
-                author_count,
-            )
-        except:
-            pass
-
-        auth_ids = [
-            # generatedFields is blank in Data API v2. But that might not be a permanent limitation.
-            # So preserve the ability to switch back to it instead of reformatting the INSERT into a
-            # query and getting the generated IDs out of the 'records' fields.
-            #            field["generatedFields"][0]["longValue"]
-            #            for field in result["updateResults"]
-            field[0]["longValue"]
-            for field in result["records"]
-        ]
-        for auth, auth_id in zip(authors.values(), auth_ids):
-            auth["author_id"] = auth_id
-        sql, sql_param_sets = insert(
-            self._tables["Books"],
-            [
-                {
-                    "Title": book["title"],
-                    "AuthorID": authors[book["author"]]["author_id"],
+            with ThreadPoolExecutor(max_workers=max_transactions) as executor:
+                # Start a new chunk only as another finishes, so that no more chunks
+                # are started after one fails.
+                pending = {
+                    executor.submit(self._add_books_chunk, chunk)
+                    for chunk in itertools.islice(chunks, max_transactions)
                 }
-                for book in books
-            ],
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk_authors, chunk_books = future.result()
+                        author_count += chunk_authors
+                        book_count += chunk_books
+                        if progress is not None:
+                            progress(author_count, book_count)
+                        chunk = next(chunks, None)
+                        if chunk is not None:
+                            pending.add(executor.submit(self._add_books_chunk, chunk))
+        finally:
+            # Chunks that were committed before an error are still in the database.
+            self._invalidate("Authors", "Books")
+        logger.info(
+            "Added %s authors and %s books to the database.", author_count, book_count
         )
-        result = self._run_batch_statement(sql, sql_param_sets)
-        book_count = len(result["updateResults"])
-        logger.info("Added %s books to the database.", book_count)
         return author_count, book_count
 
     def get_books(self, author_id=None):
@@ -351,9 +481,7 @@ class Storage:
             ]
         )
         sql, columns, params = query("Books", self._tables, where_clauses)
-        results = self._run_statement(sql, sql_params=params)
-        output = unpack_query_results(columns, results)
-        return output
+        return self._run_query(sql, columns, params)
 
     def add_book(self, book):
         """
@@ -410,6 +538,7 @@ class Storage:
                 transaction_id,
                 transaction_status,
             )
+            self._invalidate("Authors", "Books")
 
         return results
 
@@ -421,9 +550,7 @@ class Storage:
         """
         logger.info("Listing all authors.")
         sql, columns, _ = query("Authors", self._tables)
-        results = self._run_statement(sql)
-        output = unpack_query_results(columns, results)
-        return output
+        return self._run_query(sql, columns)
 
     def get_patrons(self):
         """
@@ -433,9 +560,7 @@ class Storage:
         """
         logger.info("Listing all patrons.")
         sql, columns, _ = query("Patrons", self._tables)
-        results = self._run_statement(sql)
-        output = unpack_query_results(columns, results)
-        return output
+        return self._run_query(sql, columns)
 
     def add_patron(self, patron):
         """
@@ -446,6 +571,7 @@ class Storage:
         logger.info("Adding patron %s.", patron)
         sql, sql_param_sets = insert_returning(self._tables["Patrons"], [patron])
         results = self._run_statement(sql, sql_params=sql_param_sets[0])
+        self._invalidate("Patrons")
         new_id = unpack_insert_results_v2(results)
         return new_id
 
@@ -463,6 +589,7 @@ class Storage:
             logger.exception(f"Error running SQL statement: {sql}")
             logger.exception(f"Error details: {str(err)}")
             raise
+        self._invalidate("Patrons")
 
     def get_borrowed_books(self):
         """
@@ -504,23 +631,12 @@ class Storage:
             logger.exception(
                 f"Parameters for query to get list of currently borrowed books: {str(params)}"
             )
-            results = self._run_statement(sql, sql_params=params)
+            return self._run_query(sql, columns, params)
         except Exception as err:
             logger.exception(
                 f"Error running SQL statement for get_borrowed_books(): {str(err)}"
             )
             raise
-        try:
-            logger.exception(
-                f"Response from query to get list of currently borrowed books: {str(results)}"
-            )
-            rc = unpack_query_results(columns, results)
-            return rc
-        except Exception as err:
-            logger.exception(
-                f"Error unpacking query result for get_borrowed_books(): {str(err)}"
-            )
-            raise
 
     def borrow_book(self, book_id, patron_id):
         """
@@ -544,6 +660,7 @@ class Storage:
             ],
         )
         results = self._run_statement(sql, sql_params=sql_param_sets[0])
+        self._invalidate("Lending")
         return unpack_insert_results_v2(results)
 
     def return_book(self, book_id, patron_id):
@@ -581,3 +698,4 @@ class Storage:
                 f"Error running SQL statement for return_book(): {str(err)}"
             )
             raise
+        self._invalidate("Lending")
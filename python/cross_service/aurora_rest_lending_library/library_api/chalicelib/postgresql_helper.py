@@ -193,6 +193,33 @@ def insert(table, value_sets):
     return sql, param_sets
 
 
+def insert_rows(table, value_sets):
+    """
+    Generates a PostgreSQL INSERT statement that inserts several rows into a table in
+    a single call to execute_statement. Each value is passed as a named parameter
+    whose name is the column name followed by the index of the row, so values are
+    never written into the SQL itself. The RETURNING clause makes the inserted rows,
+    including their generated IDs, available in the 'records' field of the result.
+
+    :param table: The table where the values are inserted.
+    :param value_sets: The rows to insert into the table. Each row is a Python dict
+                       where the keys are column names and the values are the values
+                       to insert into the table.
+    :return: The PostgreSQL INSERT statement and the parameters that can be passed to
+             the RDS Data Service.
+    """
+    insert_clause = f"INSERT INTO {table.name}"
+    returning_clause = "RETURNING *"
+    cols = [col.name for col in table.cols if not col.auto_increment]
+    rows = []
+    params = []
+    for index, values in enumerate(value_sets):
+        rows.append(f"({', '.join(f':{col}_{index}' for col in cols)})")
+        params += _make_params({f"{col}_{index}": values[col] for col in cols})
+    sql = f"{insert_clause} ({', '.join(cols)}) VALUES {', '.join(rows)} {returning_clause}"
+    return sql, params
+
+
 def insert_returning(table, value_sets):
     """
     Generates a PostgreSQL INSERT statement to insert values into a table, and
@@ -0,0 +1,142 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Implements a read-through cache of query results, so that repeated reads are served
+without calling the Amazon RDS Data Service. This saves a round trip for each read
+and lets a paused Aurora Serverless cluster stay paused while nothing changes.
+
+This file is deployed to AWS Lambda as part of the Chalice deployment.
+"""
+
+from collections import OrderedDict
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    A bounded cache of query results. Results are keyed by their SQL statement and
+    parameters, and each result records the tables that its query reads, so that a
+    write to a table removes only the results that depend on it. When the cache is
+    full, the least recently used result is removed.
+
+    Each AWS Lambda execution environment has its own cache, so a write handled by
+    one environment does not remove results cached by another. Results also expire
+    after a time to live, which limits how long another environment can serve
+    results that are out of date.
+    """
+
+    def __init__(self, max_entries=256, ttl=60):
+        """
+        :param max_entries: The maximum number of results to keep.
+        :param ttl: The number of seconds that a result is kept. When None, results
+                    are kept until they are invalidated or evicted.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self):
+        """
+        A number that changes whenever results are invalidated. Get it before a
+        query runs and pass it to put, so that a result that was read while its
+        tables were being written is not cached.
+        """
+        return self._generation
+
+    @staticmethod
+    def make_key(sql, sql_params=None):
+        """
+        Makes a cache key from a SQL statement and its parameters. Runs of whitespace
+        in the statement are collapsed, so statements that differ only in formatting
+        share a key.
+
+        :param sql: The SQL statement.
+        :param sql_params: The RDS Data Service parameters of the statement.
+        :return: The cache key.
+        """
+        return " ".join(sql.split()), json.dumps(sql_params, sort_keys=True)
+
+    def get(self, key):
+        """
+        Gets a cached result and marks it as the most recently used.
+
+        :param key: The cache key, as made by make_key.
+        :return: The cached result, or None when the result is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl is not None and time.monotonic() - entry[2] >= self.ttl
+            ):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, tables, result, generation=None):
+        """
+        Caches a result. When the cache is full, the least recently used result is
+        removed.
+
+        :param key: The cache key, as made by make_key.
+        :param tables: The names of the tables that the query reads.
+        :param result: The result to cache.
+        :param generation: The generation of the cache when the query started. When
+                           results were invalidated since then, the result is not
+                           cached.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (result, frozenset(tables), time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tables):
+        """
+        Removes all cached results whose queries read any of the specified tables.
+
+        :param tables: The names of the tables that were written.
+        """
+        with self._lock:
+            stale = [
+                key
+                for key, (_, entry_tables, _) in self._entries.items()
+                if not entry_tables.isdisjoint(tables)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self._generation += 1
+        logger.info("Removed %s cached results for tables %s.", len(stale), tables)
+
+    def stats(self):
+        """
+        :return: The hit, miss, and eviction counts and the number of cached results.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
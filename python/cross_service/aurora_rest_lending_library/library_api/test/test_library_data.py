@@ -11,16 +11,21 @@ import boto3
 from botocore.exceptions import ClientError
 from botocore.stub import ANY
 from chalicelib.library_data import Storage
+from chalicelib.query_cache import QueryCache
 
 CLUSTER_ARN = "arn:aws:rds:us-west-2:123456789012:cluster:test-cluster"
 SECRET_ARN = "arn:aws:secretsmanager:us-west-2:123456789012:secret:test-secret-111111"
 DB_NAME = "testdatabase"
 
 
-def make_storage_n_stubber(make_stubber):
+def make_storage_n_stubber(make_stubber, query_cache=None):
     rdsdata_client = boto3.client("rds-data")
     storage = Storage(
-        {"DBClusterArn": CLUSTER_ARN}, {"ARN": SECRET_ARN}, DB_NAME, rdsdata_client
+        {"DBClusterArn": CLUSTER_ARN},
+        {"ARN": SECRET_ARN},
+        DB_NAME,
+        rdsdata_client,
+        query_cache,
     )
     return storage, make_stubber(rdsdata_client)
 
@@ -34,63 +39,130 @@ def test_bootstrap_tables(make_stubber):
     storage.bootstrap_tables()
 
 
-def test_add_books(make_stubber):
-    storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
-    books = [
-        {"title": "Book One", "author": "Francine First"},
-        {"title": "Second Book", "author": "Stephanie Second"},
-        {"title": "Book One 2 (the sequel)", "author": "Francine First"},
-    ]
+def stub_add_books_chunk(
+    rdsdata_stubber, transaction_id, authors, books, error_code=None
+):
+    """
+    Stubs the calls that add one chunk of authors and books in a transaction.
+
+    :param authors: The authors in the chunk, as (first name, last name, ID) tuples.
+    :param books: The books in the chunk, as (title, author ID) pairs.
+    """
+    rdsdata_stubber.stub_begin_transaction(
+        CLUSTER_ARN, SECRET_ARN, DB_NAME, transaction_id
+    )
     author_sql = (
-        "INSERT INTO Authors (FirstName, LastName) " "VALUES (:FirstName, :LastName)"
+        "INSERT INTO Authors (FirstName, LastName) VALUES "
+        + ", ".join(
+            f"(:FirstName_{index}, :LastName_{index})" for index in range(len(authors))
+        )
+        + " RETURNING *"
     )
-    authors = {
-        book["author"]: {
-            "FirstName": " ".join(book["author"].split(" ")[:-1]),
-            "LastName": book["author"].split(" ")[-1],
-        }
-        for book in books
-    }
-    author_param_sets = [
-        [
-            {"name": "FirstName", "value": {"stringValue": author["FirstName"]}},
-            {"name": "LastName", "value": {"stringValue": author["LastName"]}},
-        ]
-        for author in authors.values()
-    ]
-    author_generated_field_sets = [[1], [2]]
-    book_sql = "INSERT INTO Books (Title, AuthorID) VALUES (:Title, :AuthorID)"
-    book_param_sets = [
-        [
-            {"name": "Title", "value": {"stringValue": book["title"]}},
-            {"name": "AuthorID", "value": {"longValue": author_id}},
-        ]
-        for book, author_id in zip(books, [1, 2, 1])
+    author_params = [
+        param
+        for index, (first, last, _) in enumerate(authors)
+        for param in (
+            {"name": f"FirstName_{index}", "value": {"stringValue": first}},
+            {"name": f"LastName_{index}", "value": {"stringValue": last}},
+        )
     ]
-    book_generated_field_sets = [[11], [22], [33]]
-
-    rdsdata_stubber.stub_batch_execute_statement(
+    rdsdata_stubber.stub_execute_statement(
         CLUSTER_ARN,
         SECRET_ARN,
         DB_NAME,
         author_sql,
-        sql_param_sets=author_param_sets,
-        generated_field_sets=author_generated_field_sets,
+        author_params,
+        transaction_id=transaction_id,
+        records=[[author_id, first, last] for first, last, author_id in authors],
+    )
+    book_sql = (
+        "INSERT INTO Books (Title, AuthorID) VALUES (:Title, :AuthorID) RETURNING *"
     )
+    book_param_sets = [
+        [
+            {"name": "Title", "value": {"stringValue": title}},
+            {"name": "AuthorID", "value": {"longValue": author_id}},
+        ]
+        for title, author_id in books
+    ]
     rdsdata_stubber.stub_batch_execute_statement(
         CLUSTER_ARN,
         SECRET_ARN,
         DB_NAME,
         book_sql,
         sql_param_sets=book_param_sets,
-        generated_field_sets=book_generated_field_sets,
+        generated_field_sets=[[index] for index in range(len(books))],
+        transaction_id=transaction_id,
+        error_code=error_code,
+    )
+    if error_code is None:
+        rdsdata_stubber.stub_commit_transaction(CLUSTER_ARN, SECRET_ARN, transaction_id)
+    else:
+        rdsdata_stubber.stub_rollack_transaction(
+            CLUSTER_ARN, SECRET_ARN, transaction_id
+        )
+
+
+BOOKS = [
+    {"title": "Book One", "author": "Francine First"},
+    {"title": "Second Book", "author": "Stephanie Second"},
+    {"title": "Book One 2 (the sequel)", "author": "Francine First"},
+]
+
+
+def test_add_books(make_stubber):
+    storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
+    stub_add_books_chunk(
+        rdsdata_stubber,
+        "trid-1",
+        [("Francine", "First", 1), ("Stephanie", "Second", 2)],
+        [("Book One", 1), ("Book One 2 (the sequel)", 1), ("Second Book", 2)],
     )
 
-    author_count, book_count = storage.add_books(books)
+    author_count, book_count = storage.add_books(BOOKS)
     assert author_count == 2
     assert book_count == 3
 
 
+def test_add_books_chunked(make_stubber):
+    storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
+    # One transaction at a time keeps the order of the stubbed calls fixed.
+    stub_add_books_chunk(
+        rdsdata_stubber,
+        "trid-1",
+        [("Francine", "First", 1)],
+        [("Book One", 1), ("Book One 2 (the sequel)", 1)],
+    )
+    stub_add_books_chunk(
+        rdsdata_stubber, "trid-2", [("Stephanie", "Second", 2)], [("Second Book", 2)]
+    )
+    progress = []
+
+    author_count, book_count = storage.add_books(
+        BOOKS,
+        chunk_rows=3,
+        max_transactions=1,
+        progress=lambda *counts: progress.append(counts),
+    )
+    assert (author_count, book_count) == (2, 3)
+    assert progress == [(1, 2), (2, 3)]
+
+
+def test_add_books_error(make_stubber):
+    storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
+    stub_add_books_chunk(
+        rdsdata_stubber,
+        "trid-1",
+        [("Francine", "First", 1)],
+        [("Book One", 1), ("Book One 2 (the sequel)", 1)],
+        error_code="TestException",
+    )
+
+    with pytest.raises(ClientError) as exc_info:
+        storage.add_books(BOOKS, chunk_rows=3, max_transactions=1)
+    assert exc_info.value.response["Error"]["Code"] == "TestException"
+
+
 @pytest.mark.parametrize(
     "author_id,error_code", [(None, None), (13, None), (None, "TestException")]
 )
@@ -240,6 +312,28 @@ def test_get_patrons(make_stubber, error_code):
             assert exc_info.value.response["Error"]["Code"] == error_code
 
 
+def test_get_patrons_cached(make_stubber):
+    query_cache = QueryCache()
+    storage, rdsdata_stubber = make_storage_n_stubber(make_stubber, query_cache)
+    sql = "SELECT Patrons.PatronID, Patrons.FirstName, Patrons.LastName FROM Patrons "
+    records = [[1, "Randall", "Reader"], [13, "Bob", "Booker"]]
+
+    rdsdata_stubber.stub_execute_statement(
+        CLUSTER_ARN, SECRET_ARN, DB_NAME, sql, records=records
+    )
+    rdsdata_stubber.stub_execute_statement(CLUSTER_ARN, SECRET_ARN, DB_NAME, ANY, ANY)
+    rdsdata_stubber.stub_execute_statement(
+        CLUSTER_ARN, SECRET_ARN, DB_NAME, sql, records=records[:1]
+    )
+
+    got_patrons = storage.get_patrons()
+    got_patrons[0]["Patrons.FirstName"] = "Changed"
+    assert [list(patron.values()) for patron in storage.get_patrons()] == records
+    assert query_cache.stats()["hits"] == 1
+    storage.delete_patron(13)
+    assert [list(patron.values()) for patron in storage.get_patrons()] == records[:1]
+
+
 @pytest.mark.parametrize("error_code", [None, "TestException"])
 def test_add_patron(make_stubber, error_code):
     storage, rdsdata_stubber = make_storage_n_stubber(make_stubber)
@@ -0,0 +1,65 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for query_cache.py functions.
+"""
+
+from unittest.mock import patch
+
+from chalicelib.query_cache import QueryCache
+
+
+def test_make_key():
+    params = [{"name": "Books.AuthorID", "value": {"longValue": 1}}]
+    assert QueryCache.make_key(
+        "SELECT *   FROM Books\n WHERE Books.AuthorID = :Books_AuthorID", params
+    ) == QueryCache.make_key(
+        "SELECT * FROM Books WHERE Books.AuthorID = :Books_AuthorID", params
+    )
+    assert QueryCache.make_key("SELECT * FROM Books", params) != QueryCache.make_key(
+        "SELECT * FROM Books", None
+    )
+
+
+def test_get_put():
+    cache = QueryCache()
+    key = cache.make_key("SELECT * FROM Books")
+    assert cache.get(key) is None
+    cache.put(key, {"Books", "Authors"}, [{"Books.Title": "Test"}])
+    assert cache.get(key) == [{"Books.Title": "Test"}]
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_evict_least_recently_used():
+    cache = QueryCache(max_entries=2)
+    for index in range(3):
+        cache.put(index, {"Books"}, [index])
+        cache.get(0)
+    assert cache.get(0) == [0]
+    assert cache.get(1) is None
+    assert cache.get(2) == [2]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expire():
+    cache = QueryCache(ttl=60)
+    with patch("chalicelib.query_cache.time.monotonic", return_value=100):
+        cache.put("key", {"Books"}, [])
+    with patch("chalicelib.query_cache.time.monotonic", return_value=159):
+        assert cache.get("key") == []
+    with patch("chalicelib.query_cache.time.monotonic", return_value=160):
+        assert cache.get("key") is None
+
+
+def test_invalidate():
+    cache = QueryCache()
+    cache.put("books", {"Books", "Authors"}, ["book"])
+    cache.put("patrons", {"Patrons"}, ["patron"])
+    generation = cache.generation
+    cache.invalidate("Authors")
+    assert cache.get("books") is None
+    assert cache.get("patrons") == ["patron"]
+    # A result read before the invalidation is not cached.
+    cache.put("books", {"Books", "Authors"}, ["book"], generation)
+    assert cache.get("books") is None
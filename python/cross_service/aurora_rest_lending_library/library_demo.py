@@ -139,7 +139,23 @@ def fill_db_tables(books_url, storage):
     logger.info("Found %s books.", len(books))
 
     logger.info("Adding books and authors to the library database.")
-    author_count, book_count = storage.add_books(books)
+    start = time.perf_counter()
+
+    def report_progress(added_authors, added_books):
+        elapsed = time.perf_counter() - start
+        print(
+            f"\tAdded {added_books} of {len(books)} books and {added_authors} authors "
+            f"({added_books / elapsed:.1f} books/s)."
+        )
+
+    author_count, book_count = storage.add_books(books, progress=report_progress)
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Added %s books in %.1f seconds (%.1f books/s).",
+        book_count,
+        elapsed,
+        book_count / elapsed,
+    )
     return author_count, book_count
 
 
@@ -42,6 +42,13 @@ def create_app(test_config=None):
     * SECRET_KEY The secret key Flask uses for sessions. Change this temporary value
       to a secret value for production.
 
+    Optionally, you can also specify the following:
+
+    * ARCHIVED_INDEX_NAME The name of a global secondary index that is used to query
+      archived and active work items instead of scanning the table.
+    * REPORT_SCAN_SEGMENTS The number of segments to scan in parallel when a report
+      scans the table.
+
     :param test_config: Configuration to use for testing.
     """
     app = Flask(__name__)
@@ -58,7 +65,7 @@ def create_app(test_config=None):
 
     # Suppress CORS errors when working with React during development.
     # Important: Remove this when you deploy your application.
-    CORS(app)
+    CORS(app, expose_headers=["Next-Cursor"])
 
     if app.config.get("TESTING"):
         dynamodb_resource = app.config.get("DYNAMODB_RESOURCE")
@@ -67,10 +74,16 @@ def create_app(test_config=None):
         dynamodb_resource = boto3.resource("dynamodb")
         ses_client = boto3.client("ses")
     table = dynamodb_resource.Table(app.config["TABLE_NAME"])
-    storage = Storage(table)
+    storage = Storage(table, app.config.get("ARCHIVED_INDEX_NAME"))
 
     item_list_view = ItemList.as_view("item_list_api", storage)
-    report_view = Report.as_view("report_api", storage, sender_email, ses_client)
+    report_view = Report.as_view(
+        "report_api",
+        storage,
+        sender_email,
+        ses_client,
+        app.config.get("REPORT_SCAN_SEGMENTS", 1),
+    )
     app.add_url_rule(
         "/api/items",
         defaults={"iditem": None},
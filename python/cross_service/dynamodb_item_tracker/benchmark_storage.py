@@ -0,0 +1,258 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compares the read capacity and latency of the ways that Storage can read work items
+from a large table:
+
+* The original single scan with a filter, which reads at most 1 MB and so drops
+  the rest of the matching items.
+* A scan that follows LastEvaluatedKey until the whole table is read.
+* A parallel scan, with each segment read by its own thread.
+* A query of the archived index, which reads only the matching items.
+* The first page of items, as the web client gets with a limit.
+
+The benchmark uses a stand-in table that keeps items in memory and behaves like
+DynamoDB in the ways that matter here: each request reads at most 1 MB, a filter
+is applied after items are read, read capacity is charged for every item read,
+and each request takes a fixed latency plus time for the data it reads. It calls no
+AWS services. Run it from this folder:
+
+    python benchmark_storage.py
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+import uuid
+
+from boto3.dynamodb.conditions import Attr
+
+from storage import ARCHIVE_STATE, Storage
+
+INDEX_NAME = "archived-index"
+PAGE_BYTES = 1024 * 1024
+
+
+class StandInTable:
+    """Stands in for a Boto3 DynamoDB Table resource that holds work items."""
+
+    def __init__(self, items, request_latency, seconds_per_mb):
+        """
+        :param items: The work items in the table.
+        :param request_latency: The fixed latency of each request, in seconds.
+        :param seconds_per_mb: The time it takes to read 1 MB of items, in seconds.
+        """
+        self.name = "doc-example-work-item-tracker"
+        self.items = sorted(items, key=lambda item: item["iditem"])
+        self.sizes = [len(json.dumps(item)) for item in self.items]
+        self.index = {}
+        for position, item in enumerate(self.items):
+            if ARCHIVE_STATE in item:
+                self.index.setdefault(item[ARCHIVE_STATE], []).append(position)
+        self.request_latency = request_latency
+        self.seconds_per_mb = seconds_per_mb
+        self.requests = 0
+        self.read_capacity = 0.0
+        self._lock = threading.Lock()
+        self.meta = SimpleNamespace(client=StandInClient(self))
+
+    def reset(self):
+        self.requests = 0
+        self.read_capacity = 0.0
+
+    @staticmethod
+    def _condition(condition):
+        expression = condition.get_expression()
+        name, value = expression["values"]
+        return name.name, value
+
+    def _read(self, positions, limit, start_key, match=None):
+        """
+        Reads items at positions in the table, starting after a key, until the limit
+        or 1 MB is read. Read capacity is charged for every item read, whether or not
+        it matches the condition, as an eventually consistent read.
+        """
+        start = 0
+        if start_key is not None:
+            start = next(
+                index
+                for index, position in enumerate(positions)
+                if self.items[position]["iditem"] == start_key["iditem"]
+            )
+            start += 1
+        read_items, read_bytes, last_key = [], 0, None
+        for index in range(start, len(positions)):
+            if (limit is not None and index - start == limit) or (
+                read_bytes >= PAGE_BYTES
+            ):
+                last_key = {"iditem": self.items[positions[index - 1]]["iditem"]}
+                break
+            read_items.append(self.items[positions[index]])
+            read_bytes += self.sizes[positions[index]]
+        with self._lock:
+            self.requests += 1
+            self.read_capacity += math.ceil(read_bytes / 4096) / 2
+        time.sleep(self.request_latency + read_bytes / PAGE_BYTES * self.seconds_per_mb)
+        if match is not None:
+            name, value = match
+            read_items = [item for item in read_items if item.get(name) == value]
+        response = {"Items": read_items}
+        if last_key is not None:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def scan(
+        self,
+        FilterExpression=None,
+        Limit=None,
+        ExclusiveStartKey=None,
+        Segment=0,
+        TotalSegments=1,
+    ):
+        positions = range(Segment, len(self.items), TotalSegments)
+        match = None if FilterExpression is None else self._condition(FilterExpression)
+        return self._read(positions, Limit, ExclusiveStartKey, match)
+
+    def query(
+        self, IndexName, KeyConditionExpression, Limit=None, ExclusiveStartKey=None
+    ):
+        assert IndexName == INDEX_NAME
+        _, value = self._condition(KeyConditionExpression)
+        return self._read(self.index.get(value, []), Limit, ExclusiveStartKey)
+
+
+class StandInClient:
+    """
+    Stands in for the DynamoDB client of a StandInTable, for the scans that Storage
+    makes through the client. Filters are expressions of the form `#n0 = :v0`.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def get_paginator(self, operation_name):
+        assert operation_name == "scan"
+        return self
+
+    def paginate(
+        self,
+        TableName,
+        Segment=0,
+        TotalSegments=1,
+        FilterExpression=None,
+        ExpressionAttributeNames=None,
+        ExpressionAttributeValues=None,
+    ):
+        assert TableName == self.table.name
+        match = None
+        if FilterExpression is not None:
+            name, value = FilterExpression.split(" = ")
+            match = ExpressionAttributeNames[name], ExpressionAttributeValues[value]
+        positions = range(Segment, len(self.table.items), TotalSegments)
+        start_key = None
+        while True:
+            page = self.table._read(positions, None, start_key, match)
+            yield page
+            start_key = page.get("LastEvaluatedKey")
+            if start_key is None:
+                return
+
+
+def make_items(count, active_ratio):
+    """
+    Makes work items with random IDs, as Storage makes them, so active items are
+    spread throughout the table.
+    """
+    rand = random.Random(0)
+    items = []
+    for index in range(count):
+        archived = rand.random() >= active_ratio
+        items.append(
+            {
+                "iditem": str(uuid.UUID(int=rand.getrandbits(128), version=4)),
+                "description": f"Work item number {index} in the benchmark table.",
+                "guide": "python",
+                "status": "In progress",
+                "username": f"user-{index % 100}",
+                "archived": archived,
+                ARCHIVE_STATE: "archived" if archived else "active",
+            }
+        )
+    return items
+
+
+def original_get_work_items(table, archived):
+    """The original single scan, which reads only the first 1 MB of the table."""
+    return table.scan(FilterExpression=Attr("archived").eq(archived)).get("Items", [])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument(
+        "--active-ratio",
+        type=float,
+        default=0.1,
+        help="The fraction of work items that are active instead of archived.",
+    )
+    parser.add_argument(
+        "--request-latency",
+        type=float,
+        default=0.005,
+        help="The fixed latency of each DynamoDB request, in seconds.",
+    )
+    parser.add_argument(
+        "--seconds-per-mb",
+        type=float,
+        default=0.02,
+        help="The time it takes DynamoDB to read 1 MB of items, in seconds.",
+    )
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    table = StandInTable(
+        make_items(args.items, args.active_ratio),
+        args.request_latency,
+        args.seconds_per_mb,
+    )
+    active_count = sum(1 for item in table.items if not item["archived"])
+    scan_storage = Storage(table)
+    index_storage = Storage(table, INDEX_NAME)
+    methods = {
+        "original scan (first 1 MB)": lambda: original_get_work_items(table, False),
+        "paged scan": lambda: scan_storage.get_work_items(False),
+        f"parallel scan ({args.segments} segments)": lambda: (
+            scan_storage.get_work_items(False, segments=args.segments)
+        ),
+        "index query": lambda: index_storage.get_work_items(False),
+        f"scan, first page of {args.page_size}": lambda: (
+            scan_storage.get_work_items_page(False, args.page_size)[0]
+        ),
+        f"index query, first page of {args.page_size}": lambda: (
+            index_storage.get_work_items_page(False, args.page_size)[0]
+        ),
+    }
+
+    print(
+        f"Getting active items from {args.items} items, {active_count} of them active."
+    )
+    print(f"{'Method':<36}{'Items':>8}{'Requests':>10}{'RCU':>10}{'Seconds':>10}")
+    for name, method in methods.items():
+        table.reset()
+        start = time.perf_counter()
+        work_items = method()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<36}{len(work_items):>8}{table.requests:>10}"
+            f"{table.read_capacity:>10.1f}{elapsed:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
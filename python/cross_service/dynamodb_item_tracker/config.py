@@ -3,3 +3,7 @@
 TABLE_NAME = "NEED-TABLE-NAME"
 SENDER_EMAIL = "NEED-SENDER-EMAIL"
 SECRET_KEY = "change-for-production!"
+# The name of a global secondary index with an archive_state partition key and an
+# iditem sort key. When None, archived and active items are found by scanning.
+ARCHIVED_INDEX_NAME = None
+REPORT_SCAN_SEGMENTS = 1
@@ -12,6 +12,7 @@ import logging
 from flask import jsonify
 from flask.views import MethodView
 from marshmallow import Schema
+from marshmallow.validate import Range
 from webargs import fields
 from webargs.flaskparser import use_args, use_kwargs
 from storage import StorageError
@@ -49,29 +50,50 @@ class ItemList(MethodView):
         self.storage = storage
 
     @use_kwargs(WorkItemSchema, location="query")
-    def get(self, iditem, archived=None):
+    @use_kwargs(
+        {"limit": fields.Int(validate=Range(min=1)), "cursor": fields.Str()},
+        location="query",
+    )
+    def get(self, iditem, archived=None, limit=None, cursor=None):
         """
         Gets a list of work items or a single work item.
 
+        When a limit or a cursor is specified, a single page of work items is returned.
+        When more work items follow the page, the cursor of the next page is returned
+        in the `Next-Cursor` header.
+
         :param iditem: When specified, the ID of a single item to retrieve.
         :param archived: When specified, either archived or non-archived items are
                          returned. Otherwise, all items are returned.
-        :return: A list of work items and an HTTP result code.
+        :param limit: When specified, the maximum number of items to read for a page.
+        :param cursor: When specified, the cursor of the page to get.
+        :return: A list of work items, an HTTP result code, and response headers.
         """
         result = 200
+        headers = {}
         try:
-            if iditem is None:
+            if iditem is not None:
+                work_items = [self.storage.get_work_item(iditem)]
+            elif limit is None and cursor is None:
                 print(f"archived: {archived}")
                 work_items = self.storage.get_work_items(archived)
             else:
-                work_items = [self.storage.get_work_item(iditem)]
+                work_items, next_cursor = self.storage.get_work_items_page(
+                    archived, limit, cursor
+                )
+                if next_cursor is not None:
+                    headers["Next-Cursor"] = next_cursor
             schema = WorkItemSchema(many=True)
             response = schema.dump(work_items)
+        except ValueError as err:
+            logger.error("Bad request when trying to get work items: %s", err)
+            response = jsonify("The cursor is not valid.")
+            result = 400
         except StorageError as err:
             logger.error("Storage error when trying to get work items: %s", err)
             response = jsonify("A storage error occurred.")
             result = 500
-        return response, result
+        return response, result, headers
 
     @use_args(WorkItemSchema)
     def post(self, args):
@@ -32,16 +32,19 @@ class Report(MethodView):
     Amazon DynamoDB table and uses Amazon SES to send emails about them.
     """
 
-    def __init__(self, storage, email_sender, ses_client):
+    def __init__(self, storage, email_sender, ses_client, scan_segments=1):
         """
         :param storage: An object that manages moving data in and out of the underlying
                         table.
         :param email_sender: The email address from which the email report is sent.
         :param ses_client: A Boto3 Amazon SES client.
+        :param scan_segments: The number of segments to scan in parallel when the
+                              report has to scan the table to find active items.
         """
         self.storage = storage
         self.email_sender = email_sender
         self.ses_client = ses_client
+        self.scan_segments = scan_segments
 
     def _format_mime_message(self, recipient, text, html, attachment, charset="utf-8"):
         """
@@ -83,7 +86,9 @@ class Report(MethodView):
         response = None
         result = 200
         try:
-            work_items = self.storage.get_work_items(archived=False)
+            work_items = self.storage.get_work_items(
+                archived=False, segments=self.scan_segments
+            )
             snap_time = datetime.now()
             print(f"Sending report of {len(work_items)} items to {email}.")
             html_report = render_template(
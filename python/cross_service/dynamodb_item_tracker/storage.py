@@ -8,47 +8,166 @@ Shows how to use the AWS SDK for Python (Boto3) with Amazon DynamoDB to store wo
 in a table.
 """
 
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import json
 import logging
 from uuid import uuid4
-from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Attr, ConditionExpressionBuilder, Key
 from botocore.exceptions import ClientError
 
-
 logger = logging.getLogger(__name__)
 
+# Index keys can't be Boolean, so the archived field of each item is also stored in
+# this String attribute, which is the partition key of the archived index.
+ARCHIVE_STATE = "archive_state"
+
 
 class StorageError(Exception):
     pass
 
 
+def encode_cursor(last_key):
+    """
+    Encodes the LastEvaluatedKey of a DynamoDB response as an opaque string that
+    clients can send back to get the next page.
+
+    :param last_key: The LastEvaluatedKey, or None when there are no more pages.
+    :return: The cursor, or None when there are no more pages.
+    """
+    if last_key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor made by encode_cursor.
+
+    :param cursor: The cursor, or None to start at the first page.
+    :return: The ExclusiveStartKey to send to DynamoDB, or None.
+    """
+    if cursor is None:
+        return None
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as err:
+        raise ValueError(f"Invalid cursor: {cursor}") from err
+    if not isinstance(last_key, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_key
+
+
 class Storage:
     """
     Encapsulates work item data in a DynamoDB table.
     """
 
-    def __init__(self, table):
+    def __init__(self, table, archived_index=None):
         """
         :param table: A Boto3 DynamoDB Table object that represents an existing DynamoDB
                       table. This object is a high-level object that wraps low-level
                       DynamoDB service actions.
+        :param archived_index: The name of a global secondary index of the table that
+                               has `archive_state` as its partition key and `iditem`
+                               as its sort key. When specified, archived and active
+                               items are found by querying the index, which reads
+                               only the matching items. Otherwise, they are found by
+                               scanning the whole table with a filter.
         """
         self.table = table
+        self.archived_index = archived_index
+
+    @staticmethod
+    def _archive_state(archived):
+        return "archived" if archived else "active"
+
+    def _read_page(self, archived, limit=None, start_key=None):
+        """
+        Reads one page of work items from the table or the archived index.
+
+        :return: The items in the page and the LastEvaluatedKey of the page.
+        """
+        kwargs = {}
+        if limit is not None:
+            kwargs["Limit"] = limit
+        if start_key is not None:
+            kwargs["ExclusiveStartKey"] = start_key
+        if archived is not None and self.archived_index is not None:
+            response = self.table.query(
+                IndexName=self.archived_index,
+                KeyConditionExpression=Key(ARCHIVE_STATE).eq(
+                    self._archive_state(archived)
+                ),
+                **kwargs,
+            )
+        else:
+            if archived is not None:
+                kwargs["FilterExpression"] = Attr("archived").eq(archived)
+            response = self.table.scan(**kwargs)
+        return response.get("Items", []), response.get("LastEvaluatedKey")
+
+    def _read_all(self, archived):
+        work_items = []
+        start_key = None
+        while True:
+            items, start_key = self._read_page(archived, start_key=start_key)
+            work_items += items
+            if start_key is None:
+                return work_items
+
+    def _scan_segment(self, archived, segment, total_segments):
+        """
+        Reads all work items in one segment of the table. Boto3 resources, such as
+        the Table, are not thread-safe, so this calls the client of the table, which
+        is. The filter is built here and passed as a string, so the condition
+        builder that the client shares between calls is not used.
 
-    def get_work_items(self, archived=None):
+        :return: The items in the segment.
         """
-        Gets work items currently stored in the table.
+        kwargs = {
+            "TableName": self.table.name,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+        }
+        if archived is not None:
+            expression = ConditionExpressionBuilder().build_expression(
+                Attr("archived").eq(archived)
+            )
+            kwargs["FilterExpression"] = expression.condition_expression
+            kwargs["ExpressionAttributeNames"] = expression.attribute_name_placeholders
+            kwargs["ExpressionAttributeValues"] = (
+                expression.attribute_value_placeholders
+            )
+        paginator = self.table.meta.client.get_paginator("scan")
+        return [
+            item
+            for page in paginator.paginate(**kwargs)
+            for item in page.get("Items", [])
+        ]
+
+    def get_work_items(self, archived=None, segments=1):
+        """
+        Gets work items currently stored in the table. DynamoDB returns at most 1 MB
+        of items for each request, so requests are repeated until all items are read.
 
         :param archived: When specified, only archived or non-archived work items are
                          returned. Otherwise, all work items are returned.
+        :param segments: When the table is scanned, the number of segments to scan
+                         in parallel. Each segment is read by its own thread, which
+                         reads a large table faster but uses read capacity faster.
         :return: A list of work items currently stored in the table.
         """
         try:
-            if archived is None:
-                work_items = self.table.scan().get("Items", [])
+            if segments > 1 and (archived is None or self.archived_index is None):
+                with ThreadPoolExecutor(max_workers=segments) as executor:
+                    segment_items = executor.map(
+                        lambda segment: self._scan_segment(archived, segment, segments),
+                        range(segments),
+                    )
+                    work_items = [item for items in segment_items for item in items]
             else:
-                work_items = self.table.scan(
-                    FilterExpression=Attr("archived").eq(archived)
-                ).get("Items", [])
+                work_items = self._read_all(archived)
         except ClientError as err:
             logger.exception(
                 "Couldn't get items from table %s with archived %s.",
@@ -59,6 +178,35 @@ class Storage:
         else:
             return work_items
 
+    def get_work_items_page(self, archived=None, limit=None, cursor=None):
+        """
+        Gets a page of work items currently stored in the table.
+
+        When items are scanned with a filter, a page can hold fewer items than the
+        limit, or none at all, even when more items follow. Use the returned cursor,
+        rather than the size of the page, to decide whether to get another page.
+
+        :param archived: When specified, only archived or non-archived work items are
+                         returned. Otherwise, all work items are returned.
+        :param limit: The maximum number of items to read for the page.
+        :param cursor: The cursor returned with the previous page, or None to get
+                       the first page.
+        :return: The work items in the page, and the cursor of the next page or None
+                 when there are no more pages.
+        """
+        start_key = decode_cursor(cursor)
+        try:
+            work_items, last_key = self._read_page(archived, limit, start_key)
+        except ClientError as err:
+            logger.exception(
+                "Couldn't get a page of items from table %s with archived %s.",
+                self.table.name,
+                archived,
+            )
+            raise StorageError(err)
+        else:
+            return work_items, encode_cursor(last_key)
+
     def get_work_item(self, iditem):
         """
         Gets a single work item from the table.
@@ -85,6 +233,8 @@ class Storage:
         :param item: The item to add or update.
         :return: The ID of the item.
         """
+        if item.get("archived") is not None:
+            item[ARCHIVE_STATE] = self._archive_state(item["archived"])
         try:
             if item.get("iditem") is None:
                 item["iditem"] = str(uuid4())
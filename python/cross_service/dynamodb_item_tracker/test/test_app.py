@@ -7,6 +7,7 @@ Unit tests for the dynamodb_item_tracker example.
 
 import json
 import boto3
+from boto3.dynamodb.conditions import Key
 from botocore.stub import ANY
 import pytest
 
@@ -16,7 +17,9 @@ from storage import Storage
 
 
 class MockManager:
-    def __init__(self, resource, stubber, ses_client, ses_stubber, stub_runner):
+    def __init__(
+        self, resource, stubber, ses_client, ses_stubber, stub_runner, config=None
+    ):
         self.resource = resource
         self.stubber = stubber
         self.ses_client = ses_client
@@ -43,6 +46,7 @@ class MockManager:
                 "status": f"status-{index}",
                 "username": f"user-{index}",
                 "archived": index % 2 == 0,
+                "archive_state": "archived" if index % 2 == 0 else "active",
             }
             for index in range(1, 5)
         ]
@@ -55,6 +59,7 @@ class MockManager:
                 "SENDER_EMAIL": self.sender,
                 "DYNAMODB_RESOURCE": resource,
                 "SES_CLIENT": ses_client,
+                **(config or {}),
             }
         )
 
@@ -92,6 +97,77 @@ def test_get_items(mock_mgr, archived, filter_ex):
         assert mock_mgr.web_items == rv.json
 
 
+@pytest.mark.parametrize("archived", ["false", "true"])
+def test_get_items_index(make_stubber, stub_runner, archived):
+    resource = boto3.resource("dynamodb")
+    mock_mgr = MockManager(
+        resource,
+        make_stubber(resource.meta.client),
+        None,
+        None,
+        stub_runner,
+        {"ARCHIVED_INDEX_NAME": "test-index"},
+    )
+    archive_state = "archived" if archived == "true" else "active"
+    data_items = [
+        item for item in mock_mgr.data_items if item["archive_state"] == archive_state
+    ]
+    mock_mgr.stubber.stub_query(
+        mock_mgr.table.name,
+        data_items[:1],
+        index_name="test-index",
+        key_condition=Key("archive_state").eq(archive_state),
+        last_key={"iditem": {"S": "id-x"}, "archive_state": {"S": archive_state}},
+    )
+    mock_mgr.stubber.stub_query(
+        mock_mgr.table.name,
+        data_items[1:],
+        index_name="test-index",
+        key_condition=Key("archive_state").eq(archive_state),
+        start_key={"iditem": "id-x", "archive_state": archive_state},
+    )
+
+    with mock_mgr.app.test_client() as client:
+        rv = client.get(f"/api/items?archived={archived}")
+        assert rv.status_code == 200
+        assert [
+            item
+            for item in mock_mgr.web_items
+            if item["archived"] == (archived == "true")
+        ] == rv.json
+
+
+def test_get_items_page(mock_mgr):
+    mock_mgr.stubber.stub_scan(
+        mock_mgr.table.name,
+        mock_mgr.data_items[:2],
+        limit=2,
+        last_key={"iditem": {"S": "id-2"}},
+    )
+    mock_mgr.stubber.stub_scan(
+        mock_mgr.table.name,
+        mock_mgr.data_items[2:],
+        limit=2,
+        start_key={"iditem": "id-2"},
+    )
+
+    with mock_mgr.app.test_client() as client:
+        rv = client.get("/api/items?limit=2")
+        assert rv.status_code == 200
+        assert mock_mgr.web_items[:2] == rv.json
+        cursor = rv.headers["Next-Cursor"]
+        rv = client.get(f"/api/items?limit=2&cursor={cursor}")
+        assert rv.status_code == 200
+        assert mock_mgr.web_items[2:] == rv.json
+        assert "Next-Cursor" not in rv.headers
+
+
+def test_get_items_bad_cursor(mock_mgr):
+    with mock_mgr.app.test_client() as client:
+        rv = client.get("/api/items?cursor=not-a-cursor")
+        assert rv.status_code == 400
+
+
 def test_get_items_error(mock_mgr):
     with mock_mgr.stub_runner("TestException", "stub_scan") as runner:
         runner.add(mock_mgr.stubber.stub_scan, mock_mgr.table.name, mock_mgr.data_items)
@@ -221,7 +297,7 @@ def test_archive_item(mock_mgr, monkeypatch):
             mock_mgr.stubber.stub_update_item_attr_update,
             mock_mgr.table.name,
             {"iditem": mock_mgr.data_items[0]["iditem"]},
-            {"archived": True},
+            {"archived": True, "archive_state": "archived"},
         )
 
     with mock_mgr.app.test_client() as client:
@@ -236,7 +312,7 @@ def test_archive_item_error(mock_mgr, monkeypatch):
             mock_mgr.stubber.stub_update_item_attr_update,
             mock_mgr.table.name,
             {"iditem": mock_mgr.data_items[0]["iditem"]},
-            {"archived": True},
+            {"archived": True, "archive_state": "archived"},
         )
 
     with mock_mgr.app.test_client() as client:
@@ -269,6 +345,42 @@ def test_report_small(mock_mgr, monkeypatch):
         assert rv.status_code == 200
 
 
+def test_report_parallel_scan(make_stubber, stub_runner):
+    resource = boto3.resource("dynamodb")
+    ses_client = boto3.client("ses")
+    mock_mgr = MockManager(
+        resource,
+        make_stubber(resource.meta.client),
+        ses_client,
+        make_stubber(ses_client),
+        stub_runner,
+        {"REPORT_SCAN_SEGMENTS": 2},
+    )
+    # The segments are scanned on separate threads, so either can be first.
+    for items in (mock_mgr.data_items[:2], mock_mgr.data_items[2:]):
+        mock_mgr.stubber.stub_scan(
+            mock_mgr.table.name,
+            items,
+            filter_expression="#n0 = :v0",
+            expression_attrs={"#n0": "archived"},
+            expression_attr_vals={":v0": False},
+            segment=ANY,
+            total_segments=2,
+        )
+    mock_mgr.ses_stubber.stub_send_email(
+        mock_mgr.sender,
+        {"ToAddresses": [mock_mgr.recipient]},
+        f"Work items",
+        ANY,
+        ANY,
+        "test-msg-id",
+    )
+
+    with mock_mgr.app.test_client() as client:
+        rv = client.post("/api/items:report", json={"email": mock_mgr.recipient})
+        assert rv.status_code == 200
+
+
 def test_report_large(mock_mgr, monkeypatch):
     work_items = mock_mgr.data_items * 3
     with mock_mgr.stub_runner(None, None) as runner:
@@ -21,8 +21,10 @@ from flask_restful import Api
 from flask_cors import CORS
 from analysis import Analysis
 from photo_list import PhotoList
+from photo_index import PhotoIndex
 from photo import Photo
 from report import Report
+from label_cache import LabelCache
 
 logger = logging.getLogger(__name__)
 
@@ -51,14 +53,16 @@ def create_app(test_config=None):
 
     # Suppress CORS errors when working with React during development.
     # Remove this when you deploy your application!
-    CORS(app)
+    CORS(app, expose_headers=["Next-Start-After"])
     api = Api(app)
 
     bucket = boto3.resource("s3").Bucket(app.config.get("BUCKET_NAME"))
     rekognition_client = boto3.client("rekognition")
     ses_client = boto3.client("ses")
+    label_cache = LabelCache(app.config.get("LABEL_CACHE_PATH", ":memory:"))
+    photo_index = PhotoIndex(bucket)
 
-    api.add_resource(PhotoList, "/photos", resource_class_args=(bucket,))
+    api.add_resource(PhotoList, "/photos", resource_class_args=(bucket, photo_index))
     api.add_resource(Photo, "/photos/<string:photo_key>", resource_class_args=(bucket,))
     api.add_resource(
         Analysis,
@@ -68,7 +72,7 @@ def create_app(test_config=None):
     api.add_resource(
         Report,
         "/photos/report",
-        resource_class_args=(bucket, rekognition_client, ses_client),
+        resource_class_args=(bucket, rekognition_client, ses_client, label_cache),
     )
 
     return app
@@ -2,3 +2,5 @@
 # SPDX-License-Identifier: Apache-2.0
 BUCKET_NAME = "NEED-BUCKET-NAME"
 SECRET_KEY = "change-for-production!"
+# The SQLite file where the labels of analyzed photos are cached between reports.
+LABEL_CACHE_PATH = "label_cache.db"
@@ -0,0 +1,68 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LabelCache:
+    """
+    Stores the labels that Amazon Rekognition detects in each photo in a local SQLite
+    database. Labels are keyed by the object key and ETag of the photo, so a photo is
+    analyzed again only when it is replaced by a photo with different content.
+    """
+
+    def __init__(self, path=":memory:"):
+        """
+        :param path: The path to the SQLite database file. The file is created when it
+                     does not exist. The default keeps the cache in memory.
+        """
+        self.path = path
+        # The report analyzes photos from several threads, which share one
+        # connection under a lock.
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS labels ("
+                "photo_key TEXT PRIMARY KEY, e_tag TEXT NOT NULL, labels TEXT NOT NULL)"
+            )
+
+    def get(self, photo_key, e_tag):
+        """
+        Gets the cached labels of a photo.
+
+        :param photo_key: The key of the photo object in the S3 bucket.
+        :param e_tag: The current ETag of the photo object.
+        :return: The labels as a list of (name, confidence) pairs, or None when the
+                 photo is not cached or has changed since it was cached.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT labels FROM labels WHERE photo_key = ? AND e_tag = ?",
+                (photo_key, e_tag),
+            ).fetchone()
+        if row is None:
+            return None
+        return [tuple(label) for label in json.loads(row[0])]
+
+    def put(self, photo_key, e_tag, labels):
+        """
+        Caches the labels of a photo, replacing any labels cached for an earlier
+        version of the photo.
+
+        :param photo_key: The key of the photo object in the S3 bucket.
+        :param e_tag: The ETag of the photo object that was analyzed.
+        :param labels: The labels as a list of (name, confidence) pairs.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO labels (photo_key, e_tag, labels) "
+                "VALUES (?, ?, ?)",
+                (photo_key, e_tag, json.dumps(labels)),
+            )
+        logger.info("Cached %s labels for %s.", len(labels), photo_key)
@@ -0,0 +1,138 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoIndex:
+    """
+    Keeps an in-process, sorted index of the photos that are stored in an Amazon
+    Simple Storage Service (Amazon S3) bucket, so that listing photos does not list
+    the whole bucket every time.
+
+    The index is built by listing the bucket once. After that, it is refreshed by
+    listing only the keys that sort after the last key it has seen, which finds new
+    photos whose keys sort last, such as photos with timestamped names. Photos
+    uploaded through this service are added directly. Because deleted photos and new
+    keys that sort earlier are not found by an incremental listing, the index is
+    rebuilt from a full listing at a longer interval.
+    """
+
+    photo_types = (".jpg", ".png")
+
+    def __init__(self, photo_bucket, refresh_interval=30, rebuild_interval=3600):
+        """
+        :param photo_bucket: The S3 bucket where your photos are stored.
+        :param refresh_interval: The number of seconds after which the index lists
+                                 keys that were added after the last listing.
+        :param rebuild_interval: The number of seconds after which the index is
+                                 rebuilt from a full listing of the bucket.
+        """
+        self.photo_bucket = photo_bucket
+        self.refresh_interval = refresh_interval
+        self.rebuild_interval = rebuild_interval
+        self._keys = []
+        self._sizes = {}
+        self._last_key = None
+        self._refreshed_at = None
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def _list(self, start_after=None):
+        """
+        Lists the objects in the bucket, starting after a key.
+
+        :param start_after: The key to start listing after. When None, the whole
+                            bucket is listed.
+        :return: A generator of (key, size) pairs, in key order.
+        """
+        paginator = self.photo_bucket.meta.client.get_paginator("list_objects_v2")
+        kwargs = {"Bucket": self.photo_bucket.name}
+        if start_after is not None:
+            kwargs["StartAfter"] = start_after
+        for page in paginator.paginate(**kwargs):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["Size"]
+
+    def _add(self, key, size):
+        if key not in self._sizes:
+            bisect.insort(self._keys, key)
+        self._sizes[key] = size
+
+    def refresh(self, force=False):
+        """
+        Brings the index up to date when it is stale. A ClientError from listing the
+        bucket is raised to the caller and the index is left as it was.
+
+        :param force: When True, the index is rebuilt from a full listing.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                force
+                or self._built_at is None
+                or now - self._built_at >= self.rebuild_interval
+            ):
+                keys, sizes, last_key = [], {}, None
+                for key, size in self._list():
+                    last_key = key
+                    if key.lower().endswith(self.photo_types):
+                        keys.append(key)
+                        sizes[key] = size
+                self._keys, self._sizes, self._last_key = keys, sizes, last_key
+                self._built_at = self._refreshed_at = now
+                logger.info("Built index of %s photos.", len(keys))
+            elif now - self._refreshed_at >= self.refresh_interval:
+                added, last_key = [], self._last_key
+                for key, size in self._list(self._last_key):
+                    last_key = key
+                    if key.lower().endswith(self.photo_types):
+                        added.append((key, size))
+                for key, size in added:
+                    self._add(key, size)
+                self._last_key = last_key
+                self._refreshed_at = now
+                logger.info("Added %s new photos to the index.", len(added))
+
+    def add(self, key, size):
+        """
+        Adds a photo that was uploaded to the bucket to the index. Keys that are not
+        photos are ignored.
+
+        :param key: The key of the photo object.
+        :param size: The size of the photo, in bytes.
+        """
+        if key.lower().endswith(self.photo_types):
+            with self._lock:
+                self._add(key, size)
+
+    def page(self, prefix="", start_after=None, limit=None):
+        """
+        Gets a page of photos from the index, in key order.
+
+        :param prefix: Only photos whose keys start with this prefix are returned.
+        :param start_after: Only photos whose keys sort after this key are returned.
+        :param limit: The maximum number of photos to return, at least 1. When None,
+                      all matching photos are returned.
+        :return: The list of photos, and the key to pass as `start_after` to get the
+                 next page, or None when there are no more photos.
+        """
+        if limit is not None and limit < 1:
+            raise ValueError(f"The limit must be at least 1, not {limit}.")
+        with self._lock:
+            index = bisect.bisect_left(self._keys, prefix)
+            if start_after is not None:
+                index = max(index, bisect.bisect_right(self._keys, start_after))
+            photos = []
+            while index < len(self._keys) and self._keys[index].startswith(prefix):
+                if limit is not None and len(photos) == limit:
+                    return photos, photos[-1]["name"]
+                key = self._keys[index]
+                photos.append({"name": key, "size": self._sizes[key]})
+                index += 1
+        return photos, None
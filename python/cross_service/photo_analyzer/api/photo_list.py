@@ -2,10 +2,12 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+import os
 from boto3.s3.transfer import S3UploadFailedError
 from botocore.exceptions import ClientError
-from flask_restful import Resource, reqparse
+from flask_restful import Resource, inputs, reqparse
 import werkzeug.datastructures
+from photo_index import PhotoIndex
 
 logger = logging.getLogger(__name__)
 
@@ -16,28 +18,52 @@ class PhotoList(Resource):
     are stored in an Amazon Simple Storage Service (Amazon S3) bucket.
     """
 
-    photo_types = (".jpg", ".png")
+    photo_types = PhotoIndex.photo_types
 
-    def __init__(self, photo_bucket):
+    def __init__(self, photo_bucket, photo_index=None):
         """
         :param photo_bucket: The S3 bucket where your photos are stored.
+        :param photo_index: A PhotoIndex that is shared by all requests. When None,
+                            an index is created for this resource, so the bucket is
+                            listed on every request.
         """
         self.photo_bucket = photo_bucket
+        self.photo_index = (
+            photo_index if photo_index is not None else PhotoIndex(photo_bucket)
+        )
 
     def get(self):
         """
         Gets a list of photos that are stored in your S3 bucket. Only images with a
         .jpg or .png extension are returned, because these are the image types that
-        Amazon Rekognition can analyze.
+        Amazon Rekognition can analyze. Photos are listed from an index that is
+        refreshed incrementally, so repeat requests don't list the whole bucket.
+
+        Query parameters:
+            prefix: Only photos whose names start with this prefix are returned.
+            start_after: Only photos whose names sort after this name are returned.
+            limit: The maximum number of photos to return, at least 1. When more
+                   photos match, the name to pass as `start_after` to get the next
+                   page is returned in the `Next-Start-After` header. Any other
+                   limit gets an HTTP 400 response.
 
-        :return: The list of photos and an HTTP code.
+        :return: The list of photos, an HTTP code, and the response headers.
         """
+        parser = reqparse.RequestParser()
+        parser.add_argument("prefix", default="", location="args")
+        parser.add_argument("start_after", location="args")
+        parser.add_argument("limit", type=inputs.positive, location="args")
+        args = parser.parse_args()
         photos = []
         result = 200
+        headers = {}
         try:
-            for obj in self.photo_bucket.objects.all():
-                if obj.key.lower().endswith(PhotoList.photo_types):
-                    photos.append({"name": obj.key, "size": obj.size})
+            self.photo_index.refresh()
+            photos, next_start_after = self.photo_index.page(
+                args["prefix"], args["start_after"], args["limit"]
+            )
+            if next_start_after is not None:
+                headers["Next-Start-After"] = next_start_after
         except ClientError as err:
             logger.error(
                 "Couldn't get photos from bucket %s. Here's why: %s: %s",
@@ -49,7 +75,7 @@ class PhotoList(Resource):
                 result = 403
             else:
                 result = 400
-        return photos, result
+        return photos, result, headers
 
     def post(self):
         """
@@ -67,7 +93,11 @@ class PhotoList(Resource):
         image_file = args["image_file"]
         logger.info("Got file to upload: %s", image_file.filename)
         try:
+            image_file.seek(0, os.SEEK_END)
+            size = image_file.tell()
+            image_file.seek(0)
             self.photo_bucket.upload_fileobj(image_file, image_file.filename)
+            self.photo_index.add(image_file.filename, size)
         except ClientError as err:
             logger.error(
                 "Couldn't upload file %s. Here's why: %s: %s",
@@ -1,13 +1,20 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import json
 import logging
 from botocore.exceptions import ClientError
-from flask import render_template
+from flask import Response, render_template
 from flask_restful import Resource, reqparse
 
 logger = logging.getLogger(__name__)
 
+REPORT_HEADER = "Photo,Label,Confidence"
+DEFAULT_MAX_WORKERS = 8
+
 
 class Report(Resource):
     """
@@ -15,52 +22,132 @@ class Report(Resource):
     Amazon Simple Storage Service (Amazon S3) bucket and send emails about them.
     """
 
-    def __init__(self, photo_bucket, rekognition_client, ses_client):
+    def __init__(
+        self,
+        photo_bucket,
+        rekognition_client,
+        ses_client,
+        label_cache=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
         """
         :param photo_bucket: The S3 bucket where your photos are stored.
         :param rekognition_client: A Boto3 Amazon Rekognition client.
         :param ses_client: A Boto3 Amazon Simple Email Service (Amazon SES) client.
+        :param label_cache: A LabelCache that holds the labels of photos that were
+                            already analyzed. When None, every photo is analyzed
+                            each time a report is requested.
+        :param max_workers: The maximum number of photos to analyze at the same time.
         """
         self.photo_bucket = photo_bucket
         self.rekognition_client = rekognition_client
         self.ses_client = ses_client
+        self.label_cache = label_cache
+        self.max_workers = max_workers
+
+    def _get_labels(self, photo):
+        """
+        Gets the labels of a photo from the cache, or uses Amazon Rekognition to
+        detect them and caches the result.
+
+        :param photo: The S3 object summary of the photo.
+        :return: The labels as a list of (name, confidence) pairs.
+        """
+        use_cache = self.label_cache is not None and photo.e_tag is not None
+        if use_cache:
+            labels = self.label_cache.get(photo.key, photo.e_tag)
+            if labels is not None:
+                logger.info("Got %s cached labels for %s.", len(labels), photo.key)
+                return labels
+        try:
+            response = self.rekognition_client.detect_labels(
+                Image={
+                    "S3Object": {
+                        "Bucket": self.photo_bucket.name,
+                        "Name": photo.key,
+                    }
+                }
+            )
+        except ClientError as err:
+            logger.warning(
+                "Couldn't detect labels in %s. Here's why: %s: %s",
+                photo.key,
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            return []
+        labels = [
+            (label["Name"], label["Confidence"]) for label in response.get("Labels", [])
+        ]
+        logger.info("Found %s labels in %s.", len(labels), photo.key)
+        if use_cache:
+            self.label_cache.put(photo.key, photo.e_tag, labels)
+        return labels
+
+    def _iter_report_records(self, photos):
+        """
+        Analyzes photos on a pool of threads and yields the CSV records of each photo
+        in listing order. At most twice as many photos as there are threads are
+        listed ahead of the records that are yielded, so memory use does not grow
+        with the number of photos in the bucket.
+
+        :param photos: An iterator of S3 object summaries.
+        :return: A generator of lists of CSV records, one list for each photo.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = deque()
+            try:
+                for photo in photos:
+                    in_flight.append(
+                        (photo.key, executor.submit(self._get_labels, photo))
+                    )
+                    if len(in_flight) >= self.max_workers * 2:
+                        photo_key, future = in_flight.popleft()
+                        yield self._to_records(photo_key, future.result())
+            except ClientError as err:
+                logger.error(
+                    "Couldn't list all photos in bucket '%s'. Here's why: %s: %s",
+                    self.photo_bucket.name,
+                    err.response["Error"]["Code"],
+                    err.response["Error"]["Message"],
+                )
+            while in_flight:
+                photo_key, future = in_flight.popleft()
+                yield self._to_records(photo_key, future.result())
+
+    @staticmethod
+    def _to_records(photo_key, labels):
+        return [
+            ",".join((photo_key, name, str(confidence))) for name, confidence in labels
+        ]
+
+    def _stream_report(self, photos):
+        """
+        Streams the report as a JSON list of CSV records, writing the records of
+        each photo as soon as the photo is analyzed.
+        """
+        yield "[" + json.dumps(REPORT_HEADER)
+        for records in self._iter_report_records(photos):
+            for record in records:
+                yield "," + json.dumps(record)
+        yield "]"
 
     def get(self):
         """
         Uses Amazon Rekognition to analyze all images in your S3 bucket and returns a
         report as a list of comma-separated value (CSV) records.
 
+        The report is streamed to the client while photos are analyzed. When a label
+        cache is configured, photos that have not changed since they were last
+        analyzed are reported from the cache instead of being analyzed again.
+
         :return: The CSV report and an HTTP code.
         """
-        result = 200
-        report_csv = ["Photo,Label,Confidence"]
+        # Get the first page of the listing before the response starts, so that a
+        # bucket that can't be listed is reported with an error code.
+        photos = iter(self.photo_bucket.objects.all())
         try:
-            for photo in self.photo_bucket.objects.all():
-                try:
-                    response = self.rekognition_client.detect_labels(
-                        Image={
-                            "S3Object": {
-                                "Bucket": self.photo_bucket.name,
-                                "Name": photo.key,
-                            }
-                        }
-                    )
-                    logger.info(
-                        "Found %s labels in %s.", len(response["Labels"]), photo.key
-                    )
-                    for label in response.get("Labels", []):
-                        report_csv.append(
-                            ",".join(
-                                (photo.key, label["Name"], str(label["Confidence"]))
-                            )
-                        )
-                except ClientError as err:
-                    logger.warning(
-                        "Couldn't detect labels in %s. Here's why: %s: %s",
-                        photo.key,
-                        err.response["Error"]["Code"],
-                        err.response["Error"]["Message"],
-                    )
+            first_photo = next(photos, None)
         except ClientError as err:
             logger.error(
                 "Couldn't list photos in bucket '%s'. Here's why: %s: %s",
@@ -68,8 +155,12 @@ class Report(Resource):
                 err.response["Error"]["Code"],
                 err.response["Error"]["Message"],
             )
-            result = 400
-        return report_csv, result
+            return [REPORT_HEADER], 400
+        if first_photo is not None:
+            photos = itertools.chain([first_photo], photos)
+        return Response(
+            self._stream_report(photos), status=200, mimetype="application/json"
+        )
 
     def post(self):
         """
@@ -0,0 +1,119 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for photo_index.py.
+"""
+
+import boto3
+from botocore.exceptions import ClientError
+import pytest
+
+from photo_index import PhotoIndex
+
+
+def test_refresh(make_stubber):
+    s3_resource = boto3.resource("s3")
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    bucket = s3_resource.Bucket("test-bucket")
+    photo_index = PhotoIndex(bucket, refresh_interval=0)
+
+    s3_stubber.stub_list_objects_v2(
+        bucket.name, [("photo-1.jpg", 10), ("photo-2.txt", 20)]
+    )
+    s3_stubber.stub_list_objects_v2(
+        bucket.name, [("photo-3.png", 30)], start_after="photo-2.txt"
+    )
+    s3_stubber.stub_list_objects_v2(bucket.name, [], start_after="photo-3.png")
+
+    photo_index.refresh()
+    photo_index.add("photo-0.jpg", 5)
+    photo_index.refresh()
+    photo_index.refresh()
+
+    assert photo_index.page() == (
+        [
+            {"name": "photo-0.jpg", "size": 5},
+            {"name": "photo-1.jpg", "size": 10},
+            {"name": "photo-3.png", "size": 30},
+        ],
+        None,
+    )
+
+
+def test_refresh_error(make_stubber):
+    s3_resource = boto3.resource("s3")
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    bucket = s3_resource.Bucket("test-bucket")
+    photo_index = PhotoIndex(bucket, refresh_interval=0)
+
+    s3_stubber.stub_list_objects_v2(bucket.name, [("photo-1.jpg", 10)])
+    s3_stubber.stub_list_objects_v2(
+        bucket.name,
+        [("photo-2.jpg", 20)],
+        start_after="photo-1.jpg",
+        next_continuation_token="test-token",
+    )
+    s3_stubber.stub_list_objects_v2(
+        bucket.name,
+        start_after="photo-1.jpg",
+        continuation_token="test-token",
+        error_code="TestException",
+    )
+    s3_stubber.stub_list_objects_v2(
+        bucket.name, [("photo-2.jpg", 20)], start_after="photo-1.jpg"
+    )
+
+    photo_index.refresh()
+    with pytest.raises(ClientError):
+        photo_index.refresh()
+
+    # The failed refresh leaves the index as it was, so the next refresh lists the
+    # same keys again.
+    assert photo_index.page() == ([{"name": "photo-1.jpg", "size": 10}], None)
+    photo_index.refresh()
+    assert photo_index.page()[0] == [
+        {"name": "photo-1.jpg", "size": 10},
+        {"name": "photo-2.jpg", "size": 20},
+    ]
+
+
+def test_refresh_not_stale(make_stubber):
+    s3_resource = boto3.resource("s3")
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    bucket = s3_resource.Bucket("test-bucket")
+    photo_index = PhotoIndex(bucket)
+
+    s3_stubber.stub_list_objects_v2(bucket.name, [("photo-1.jpg", 10)])
+
+    # Only the first refresh lists the bucket.
+    for _ in range(3):
+        photo_index.refresh()
+    assert photo_index.page()[0] == [{"name": "photo-1.jpg", "size": 10}]
+
+
+def test_page():
+    photo_index = PhotoIndex(None)
+    for key in ["a/1.jpg", "a/2.jpg", "a/3.jpg", "b/1.jpg", "readme.md"]:
+        photo_index.add(key, 1)
+
+    photos, start_after = photo_index.page("a/", limit=2)
+    assert [photo["name"] for photo in photos] == ["a/1.jpg", "a/2.jpg"]
+    photos, start_after = photo_index.page("a/", start_after, limit=2)
+    assert [photo["name"] for photo in photos] == ["a/3.jpg"]
+    assert start_after is None
+    assert [photo["name"] for photo in photo_index.page()[0]] == [
+        "a/1.jpg",
+        "a/2.jpg",
+        "a/3.jpg",
+        "b/1.jpg",
+    ]
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_page_bad_limit(limit):
+    photo_index = PhotoIndex(None)
+    photo_index.add("a/1.jpg", 1)
+
+    with pytest.raises(ValueError):
+        photo_index.page(limit=limit)
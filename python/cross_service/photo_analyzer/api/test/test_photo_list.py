@@ -9,7 +9,9 @@ from unittest.mock import MagicMock
 import boto3
 from boto3.s3.transfer import S3UploadFailedError
 from botocore.exceptions import ClientError
+from flask import Flask
 import pytest
+from werkzeug.exceptions import BadRequest
 
 from photo_list import PhotoList, reqparse
 
@@ -20,12 +22,15 @@ def test_get_photo_list(make_stubber, error_code):
     s3_stubber = make_stubber(s3_resource.meta.client)
     bucket = s3_resource.Bucket("test-bucket")
     photo_list = PhotoList(bucket)
-    photos = ["photo.jpg", "photo.PNG"]
-    all_keys = photos + ["photo.txt", "photo.pdf"]
+    photos = ["photo.PNG", "photo.jpg"]
+    all_keys = photos + ["photo.pdf", "photo.txt"]
 
-    s3_stubber.stub_list_objects(bucket.name, all_keys, error_code=error_code)
+    s3_stubber.stub_list_objects_v2(
+        bucket.name, [(key, 10) for key in all_keys], error_code=error_code
+    )
 
-    got_photos, result = photo_list.get()
+    with Flask(__name__).test_request_context("/photos"):
+        got_photos, result, _ = photo_list.get()
     if error_code is None:
         assert [got_photo["name"] for got_photo in got_photos] == photos
         assert result == 200
@@ -35,6 +40,36 @@ def test_get_photo_list(make_stubber, error_code):
         assert result == 400
 
 
+def test_get_photo_list_page(make_stubber):
+    s3_resource = boto3.resource("s3")
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    bucket = s3_resource.Bucket("test-bucket")
+    photo_list = PhotoList(bucket)
+    keys = ["cat-1.jpg", "cat-2.jpg", "cat-3.jpg", "dog-1.jpg"]
+
+    s3_stubber.stub_list_objects_v2(bucket.name, [(key, 10) for key in keys])
+
+    with Flask(__name__).test_request_context(
+        "/photos?prefix=cat&start_after=cat-1.jpg&limit=1"
+    ):
+        got_photos, result, headers = photo_list.get()
+    assert got_photos == [{"name": "cat-2.jpg", "size": 10}]
+    assert result == 200
+    assert headers == {"Next-Start-After": "cat-2.jpg"}
+
+
+@pytest.mark.parametrize("limit", ["0", "-1", "many"])
+def test_get_photo_list_bad_limit(make_stubber, limit):
+    s3_resource = boto3.resource("s3")
+    make_stubber(s3_resource.meta.client)
+    photo_list = PhotoList(s3_resource.Bucket("test-bucket"))
+
+    with Flask(__name__).test_request_context(f"/photos?limit={limit}"):
+        with pytest.raises(BadRequest) as exc_info:
+            photo_list.get()
+    assert exc_info.value.code == 400
+
+
 @pytest.mark.parametrize(
     "error_code", [None, "TestException", "AccessDenied", "S3UploadFailedError"]
 )
@@ -5,10 +5,12 @@
 Unit tests for report.py
 """
 
+import json
 from unittest.mock import MagicMock
 import boto3
 import pytest
 
+from label_cache import LabelCache
 from report import Report, reqparse, render_template
 
 
@@ -26,7 +28,7 @@ def test_get_report(make_stubber, stub_runner, error_code, stop_on_method):
     rekognition_client = boto3.client("rekognition")
     rekognition_stubber = make_stubber(rekognition_client)
     bucket = s3_resource.Bucket("test-bucket")
-    report = Report(bucket, rekognition_client, None)
+    report = Report(bucket, rekognition_client, None, max_workers=1)
     photos = [f"photo-{index}" for index in range(3)]
     labels = {}
     for index, photo in enumerate(photos):
@@ -45,15 +47,49 @@ def test_get_report(make_stubber, stub_runner, error_code, stop_on_method):
                 raise_and_continue=True,
             )
 
-    got_report, result = report.get()
+    response = report.get()
     if error_code is None:
+        got_report = json.loads(response.get_data(as_text=True))
+        assert got_report[0] == "Photo,Label,Confidence"
         assert got_report[1:] == [
             ",".join((photo, label[0].name, str(label[0].confidence)))
             for photo, label in labels.items()
         ]
-        assert result == 200
+        assert response.status_code == 200
     elif stop_on_method == "stub_list_objects":
+        _, result = response
         assert result == 400
+    else:
+        # Photos that can't be analyzed are left out of the report.
+        assert json.loads(response.get_data(as_text=True)) == ["Photo,Label,Confidence"]
+
+
+def test_get_report_cached(make_stubber, tmp_path):
+    s3_resource = boto3.resource("s3")
+    s3_stubber = make_stubber(s3_resource.meta.client)
+    rekognition_client = boto3.client("rekognition")
+    rekognition_stubber = make_stubber(rekognition_client)
+    bucket = s3_resource.Bucket("test-bucket")
+    label_cache = LabelCache(str(tmp_path / "labels.db"))
+    report = Report(bucket, rekognition_client, None, label_cache, max_workers=1)
+    photos = ["photo-0", "photo-1"]
+    label = MagicMock(confidence=50.5, instances=[], parents=[])
+    label.name = "label"
+    label_cache.put("photo-0", '"etag-0"', [("cached-label", 99.5)])
+    label_cache.put("photo-1", '"etag-old"', [("stale-label", 1.0)])
+
+    s3_stubber.stub_list_objects(bucket.name, photos, e_tags=['"etag-0"', '"etag-1"'])
+    rekognition_stubber.stub_detect_labels(
+        {"S3Object": {"Bucket": bucket.name, "Name": "photo-1"}}, None, [label]
+    )
+
+    got_report = json.loads(report.get().get_data(as_text=True))
+    assert got_report == [
+        "Photo,Label,Confidence",
+        "photo-0,cached-label,99.5",
+        "photo-1,label,50.5",
+    ]
+    assert LabelCache(label_cache.path).get("photo-1", '"etag-1"') == [("label", 50.5)]
 
 
 @pytest.mark.parametrize("error_code", [None, "TestException"])
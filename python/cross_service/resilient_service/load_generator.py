@@ -0,0 +1,353 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A traffic driver that sends GET requests to the load balancer endpoint at a
+configurable concurrency and rate, and records latency histograms and error rates
+over time. The demo uses it to show how the service behaves under load while
+failures are injected and instances are replaced.
+
+The driver can also run against a local stand-in server, which needs no AWS
+resources:
+
+    python load_generator.py --local --duration 10
+"""
+
+import argparse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import random
+import threading
+import time
+
+import requests
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies in the style of HdrHistogram. Values are counted in
+    buckets whose width grows with the value, so every recorded value is kept with
+    the same relative precision in a small, fixed amount of memory, and histograms
+    from different threads or intervals can be merged by adding their counts.
+    """
+
+    def __init__(self, sub_buckets=32):
+        """
+        :param sub_buckets: The number of buckets for each power of two. 32 buckets
+                            keep values within about 3% of their recorded value.
+        """
+        self.sub_buckets = sub_buckets
+        self.counts = Counter()
+        self.count = 0
+        self.max = 0.0
+
+    def _index(self, micros):
+        if micros < self.sub_buckets:
+            return micros
+        exponent = (micros // self.sub_buckets).bit_length() - 1
+        return exponent * self.sub_buckets + (micros >> exponent)
+
+    def _value(self, index):
+        if index < self.sub_buckets:
+            return index
+        exponent, offset = divmod(index, self.sub_buckets)
+        exponent -= 1
+        # The midpoint of the bucket.
+        return ((offset + self.sub_buckets) << exponent) + (1 << exponent) // 2
+
+    def record(self, seconds):
+        """
+        Records a latency.
+
+        :param seconds: The latency, in seconds.
+        """
+        self.counts[self._index(max(0, int(seconds * 1_000_000)))] += 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram to this one.
+
+        :param other: The histogram to add.
+        """
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        """
+        :param percent: The percentile to get, from 0 to 100.
+        :return: The latency at the percentile, in seconds, or None when no
+                 latencies are recorded.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index) / 1_000_000, self.max)
+        return self.max
+
+
+class IntervalStats:
+    """The requests sent during one reporting interval."""
+
+    def __init__(self, start):
+        self.start = start
+        self.histogram = LatencyHistogram()
+        self.outcomes = Counter()
+
+    @property
+    def errors(self):
+        return sum(count for outcome, count in self.outcomes.items() if outcome != 200)
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.outcomes.update(other.outcomes)
+
+    def summary(self, elapsed):
+        """
+        :param elapsed: The length of the interval, in seconds.
+        :return: A one-line summary of the interval.
+        """
+        total = sum(self.outcomes.values())
+        if total == 0:
+            return "no responses"
+        text = (
+            f"{total:6} req {total / elapsed:7.1f} req/s "
+            f"errors {self.errors / total:6.1%}"
+        )
+        if self.histogram.count:
+            p50, p90, p99 = (
+                self.histogram.percentile(percent) * 1000 for percent in (50, 90, 99)
+            )
+            text += (
+                f" | p50 {p50:7.1f} p90 {p90:7.1f} p99 {p99:7.1f} "
+                f"max {self.histogram.max * 1000:7.1f} ms"
+            )
+        failures = [f"{k}: {v}" for k, v in self.outcomes.items() if k != 200]
+        if failures:
+            text += " | " + ", ".join(failures)
+        return text
+
+
+class LoadGenerator:
+    """
+    Sends GET requests from a pool of threads. When a rate is specified, requests
+    are spaced evenly on a shared schedule, so a slow response doesn't reduce the
+    offered load the way it would if each thread simply waited for its previous
+    request. Latency is measured from the scheduled send time, which keeps
+    queueing delay in the measurement.
+    """
+
+    def __init__(self, url, concurrency=8, rate=None, timeout=5):
+        """
+        :param url: The URL to send requests to.
+        :param concurrency: The number of threads that send requests.
+        :param rate: The total number of requests to send each second. When None,
+                     each thread sends its next request as soon as it gets a response.
+        :param timeout: The number of seconds to wait for each response.
+        """
+        self.url = url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.intervals = []
+        self._current = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._next_send = None
+        self._threads = []
+
+    def _next_send_time(self):
+        with self._lock:
+            now = time.perf_counter()
+            if self.rate is None:
+                return now
+            # Don't build a backlog of requests that were due while all threads
+            # were busy; those requests are counted as latency instead.
+            self._next_send = max(self._next_send, now - 1)
+            send_time = self._next_send
+            self._next_send += 1 / self.rate
+            return send_time
+
+    def _record(self, latency, outcome):
+        with self._lock:
+            if latency is not None:
+                self._current.histogram.record(latency)
+            self._current.outcomes[outcome] += 1
+
+    def _send_forever(self):
+        session = requests.Session()
+        while not self._stopped.is_set():
+            send_time = self._next_send_time()
+            delay = send_time - time.perf_counter()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+            try:
+                response = session.get(self.url, timeout=self.timeout)
+                self._record(time.perf_counter() - send_time, response.status_code)
+            except requests.exceptions.RequestException as err:
+                self._record(None, type(err).__name__)
+
+    def start(self):
+        """Starts sending requests."""
+        self._stopped.clear()
+        self._next_send = time.perf_counter()
+        self._current = IntervalStats(time.perf_counter())
+        self._threads = [
+            threading.Thread(target=self._send_forever, daemon=True)
+            for _ in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def next_interval(self):
+        """
+        Ends the current reporting interval and starts a new one.
+
+        :return: The stats of the interval that ended, and its length in seconds.
+        """
+        with self._lock:
+            now = time.perf_counter()
+            finished = self._current
+            self._current = IntervalStats(now)
+        self.intervals.append(finished)
+        return finished, now - finished.start
+
+    def stop(self):
+        """Stops sending requests and waits for requests in flight to finish."""
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+        self.next_interval()
+
+    def total(self):
+        """
+        :return: The stats of all intervals combined.
+        """
+        total = IntervalStats(self.intervals[0].start if self.intervals else 0)
+        for interval in self.intervals:
+            total.merge(interval)
+        return total
+
+    def run(self, duration, report_interval=1, out=print):
+        """
+        Sends requests for a period of time and prints a summary of each interval
+        as it ends, followed by a summary of the whole run.
+
+        :param duration: The number of seconds to send requests.
+        :param report_interval: The number of seconds in each reporting interval.
+        :param out: The function that prints each summary line.
+        :return: The stats of the whole run.
+        """
+        self.start()
+        start = time.perf_counter()
+        try:
+            remaining = duration
+            while remaining > 0:
+                time.sleep(min(report_interval, remaining))
+                remaining = duration - (time.perf_counter() - start)
+                interval, elapsed = self.next_interval()
+                out(
+                    f"\t{time.perf_counter() - start:5.1f}s  {interval.summary(elapsed)}"
+                )
+        finally:
+            self.stop()
+        total = self.total()
+        out(f"\tTotal   {total.summary(time.perf_counter() - start)}")
+        return total
+
+
+class StandInServer:
+    """
+    A local web server that stands in for the load balancer endpoint. It returns a
+    recommendation after a random latency and fails a fraction of requests, so the
+    traffic driver can be tried without deploying any AWS resources.
+    """
+
+    def __init__(self, port=0, latency=0.02, jitter=0.01, error_rate=0.0):
+        """
+        :param port: The port where the server listens. When 0, a free port is used.
+        :param latency: The average number of seconds to wait before responding.
+        :param jitter: The maximum number of seconds to add to or remove from the latency.
+        :param error_rate: The fraction of requests that get a 502 response.
+        """
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(max(0, random.uniform(latency - jitter, latency + jitter)))
+                if random.random() < stand_in.error_rate:
+                    status, payload = 502, {"error": "Bad gateway"}
+                else:
+                    status, payload = 200, {
+                        "MediaType": {"S": "Book"},
+                        "ItemId": {"N": "1"},
+                        "Title": {"S": "Pride and Prejudice"},
+                        "Creator": {"S": "Jane Austen"},
+                    }
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", f"{len(content)}")
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.error_rate = error_rate
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="The URL to send requests to.")
+    target.add_argument(
+        "--local",
+        action="store_true",
+        help="Send requests to a local stand-in server instead of a URL.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--rate", type=float, help="Requests per second. Unlimited by default."
+    )
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="The fraction of requests that the local stand-in server fails.",
+    )
+    args = parser.parse_args()
+
+    if args.local:
+        with StandInServer(error_rate=args.error_rate) as server:
+            LoadGenerator(server.url, args.concurrency, args.rate).run(args.duration)
+    else:
+        LoadGenerator(args.url, args.concurrency, args.rate).run(args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,26 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
 
-import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import itertools
 import logging
+import random
+import time
 
 import boto3
 from botocore.exceptions import ClientError
+import ijson
 
 log = logging.getLogger(__name__)
 
+# DynamoDB accepts at most 25 put requests in a single batch_write_item call.
+BATCH_SIZE = 25
+DEFAULT_MAX_WORKERS = 4
+MAX_BATCH_ATTEMPTS = 8
+BACKOFF_BASE = 0.05
+BACKOFF_CAP = 5.0
+READ_SIZE = 64 * 1024
+
 
 class RecommendationServiceError(Exception):
     def __init__(self, table_name, message):
@@ -78,24 +90,106 @@ class RecommendationService:
         else:
             return response
 
-    def populate(self, data_file):
+    @staticmethod
+    def _read_items(data_file):
         """
-        Populates the recommendations table from a JSON file.
+        Reads items one at a time from a file that contains a JSON array of items,
+        so that the whole file is never held in memory.
 
         :param data_file: The path to the data file.
+        :return: A generator of items.
         """
-        try:
-            with open(data_file) as data:
-                items = json.load(data)
-            batch = [{"PutRequest": {"Item": item}} for item in items]
-            self.dynamodb_client.batch_write_item(RequestItems={self.table_name: batch})
+        with open(data_file, "rb") as data:
+            yield from ijson.items(data, "item", buf_size=READ_SIZE)
+
+    @staticmethod
+    def _batches(items):
+        """
+        Groups items into batches that fit in a single batch_write_item call.
+        """
+        items = iter(items)
+        batch = list(itertools.islice(items, BATCH_SIZE))
+        while batch:
+            yield batch
+            batch = list(itertools.islice(items, BATCH_SIZE))
+
+    def _write_batch(self, batch):
+        """
+        Writes a batch of items to the table. Items that DynamoDB does not process,
+        such as when writes are throttled, are sent again after a random backoff that
+        grows with each attempt, so that concurrent writers don't retry in step.
+
+        :param batch: The items to write.
+        :return: The number of items written.
+        """
+        request_items = {
+            self.table_name: [{"PutRequest": {"Item": item}} for item in batch]
+        }
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            response = self.dynamodb_client.batch_write_item(RequestItems=request_items)
+            request_items = response.get("UnprocessedItems", {})
+            if not request_items:
+                return len(batch)
+            unprocessed = len(request_items.get(self.table_name, []))
             log.info(
-                "Populated table %s with items from %s.", self.table_name, data_file
+                "%s items were not processed on attempt %s, retrying.",
+                unprocessed,
+                attempt + 1,
             )
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt)))
+        raise RecommendationServiceError(
+            self.table_name,
+            f"Couldn't write {unprocessed} items after {MAX_BATCH_ATTEMPTS} attempts.",
+        )
+
+    def populate(self, data_file, max_workers=DEFAULT_MAX_WORKERS, progress=None):
+        """
+        Populates the recommendations table from a JSON file. Items are read from the
+        file as they are needed and written in batches of 25 from a pool of threads.
+        When a batch fails, no more batches are started and the error is raised, but
+        batches that are already written stay in the table.
+
+        :param data_file: The path to the data file.
+        :param max_workers: The maximum number of batches to write at the same time.
+        :param progress: A function that is called after each batch is written with
+                         the number of items written so far and the number of items
+                         written per second.
+        :return: The number of items written.
+        """
+        written = 0
+        start = time.perf_counter()
+        try:
+            batches = self._batches(self._read_items(data_file))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Start a new batch only as another finishes, so that only a few
+                # batches are read from the file ahead of the writes.
+                pending = {
+                    executor.submit(self._write_batch, batch)
+                    for batch in itertools.islice(batches, max_workers)
+                }
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        written += future.result()
+                        if progress is not None:
+                            progress(written, written / (time.perf_counter() - start))
+                        batch = next(batches, None)
+                        if batch is not None:
+                            pending.add(executor.submit(self._write_batch, batch))
         except ClientError as err:
             raise RecommendationServiceError(
                 self.table_name, f"Couldn't populate table from {data_file}: {err}"
             )
+        elapsed = time.perf_counter() - start
+        log.info(
+            "Populated table %s with %s items from %s in %.2f seconds (%.0f items/s).",
+            self.table_name,
+            written,
+            data_file,
+            elapsed,
+            written / elapsed if elapsed else 0,
+        )
+        return written
 
     def destroy(self):
         """
@@ -19,6 +19,7 @@ import requests
 
 from auto_scaler import AutoScaler
 from load_balancer import LoadBalancer
+from load_generator import LoadGenerator
 from parameters import ParameterHelper
 from recommendation_service import RecommendationService
 
@@ -30,13 +31,24 @@ import demo_tools.question as q
 # snippet-start:[python.example_code.workflow.ResilientService_Runner]
 class Runner:
     def __init__(
-        self, resource_path, recommendation, autoscaler, loadbalancer, param_helper
+        self,
+        resource_path,
+        recommendation,
+        autoscaler,
+        loadbalancer,
+        param_helper,
+        traffic_concurrency=8,
+        traffic_rate=None,
+        traffic_duration=15,
     ):
         self.resource_path = resource_path
         self.recommendation = recommendation
         self.autoscaler = autoscaler
         self.loadbalancer = loadbalancer
         self.param_helper = param_helper
+        self.traffic_concurrency = traffic_concurrency
+        self.traffic_rate = traffic_rate
+        self.traffic_duration = traffic_duration
         self.protocol = "HTTP"
         self.port = 80
         self.ssh_port = 22
@@ -175,10 +187,11 @@ class Runner:
         actions = [
             "Send a GET request to the load balancer endpoint.",
             "Check the health of load balancer targets.",
+            "Send traffic to the load balancer endpoint and watch latency and errors.",
             "Go to the next part of the demo.",
         ]
         choice = 0
-        while choice != 2:
+        while choice != 3:
             print("-" * 88)
             print(
                 "\nSee the current state of the service by selecting one of the following choices:\n"
@@ -210,6 +223,21 @@ class Runner:
                     f"after changes are made.\n"
                 )
             elif choice == 2:
+                rate = (
+                    f"{self.traffic_rate} requests per second"
+                    if self.traffic_rate
+                    else "as fast as responses arrive"
+                )
+                print(
+                    f"\nSending requests from {self.traffic_concurrency} clients, {rate}, "
+                    f"for {self.traffic_duration} seconds:\n"
+                )
+                LoadGenerator(
+                    f"http://{self.loadbalancer.endpoint()}",
+                    concurrency=self.traffic_concurrency,
+                    rate=self.traffic_rate,
+                ).run(self.traffic_duration)
+            elif choice == 3:
                 print("\nOkay, let's move on.")
                 print("-" * 88)
 
@@ -371,6 +399,25 @@ def main():
         help="The path to resource files used by this example, such as IAM policies and\n"
         "instance scripts.",
     )
+    parser.add_argument(
+        "--traffic_concurrency",
+        type=int,
+        default=8,
+        help="The number of clients that send traffic to the load balancer during the demo.",
+    )
+    parser.add_argument(
+        "--traffic_rate",
+        type=float,
+        default=None,
+        help="The total number of requests per second to send during the demo. By\n"
+        "default, each client sends its next request as soon as it gets a response.",
+    )
+    parser.add_argument(
+        "--traffic_duration",
+        type=float,
+        default=15,
+        help="The number of seconds to send traffic each time it is requested.",
+    )
     args = parser.parse_args()
 
     print("-" * 88)
@@ -387,7 +434,14 @@ def main():
     loadbalancer = LoadBalancer.from_client(prefix)
     param_helper = ParameterHelper.from_client(recommendation.table_name)
     runner = Runner(
-        args.resource_path, recommendation, autoscaler, loadbalancer, param_helper
+        args.resource_path,
+        recommendation,
+        autoscaler,
+        loadbalancer,
+        param_helper,
+        traffic_concurrency=args.traffic_concurrency,
+        traffic_rate=args.traffic_rate,
+        traffic_duration=args.traffic_duration,
     )
     actions = [args.action] if args.action != "all" else ["deploy", "demo", "destroy"]
     for action in actions:
@@ -27,7 +27,7 @@ class MockManager:
         self.scenario_data.association_id = "test-association-id"
         self.scenario_args = []
         self.scenario_out = {}
-        answers = ["1", "2", "3", "3", "3", "3", "3", "3", "3"]
+        answers = ["1", "2", "4", "4", "4", "4", "4", "4", "4"]
         input_mocker.mock_answers(answers)
         self.stub_runner = stub_runner
 
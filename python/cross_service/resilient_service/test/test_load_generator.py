@@ -0,0 +1,49 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+from load_generator import LatencyHistogram, LoadGenerator, StandInServer
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.max == 1.0
+    for percent, expected in [(50, 0.5), (90, 0.9), (99, 0.99), (100, 1.0)]:
+        assert histogram.percentile(percent) == pytest.approx(expected, rel=0.04)
+
+
+def test_histogram_merge():
+    fast = LatencyHistogram()
+    slow = LatencyHistogram()
+    for _ in range(90):
+        fast.record(0.010)
+    for _ in range(10):
+        slow.record(2.0)
+
+    fast.merge(slow)
+
+    assert fast.count == 100
+    assert fast.percentile(50) == pytest.approx(0.010, rel=0.04)
+    assert fast.percentile(95) == pytest.approx(2.0, rel=0.04)
+    assert LatencyHistogram().percentile(50) is None
+
+
+@pytest.mark.parametrize("error_rate", [0.0, 1.0])
+def test_load_generator(error_rate):
+    lines = []
+    with StandInServer(latency=0.005, jitter=0, error_rate=error_rate) as server:
+        total = LoadGenerator(server.url, concurrency=2, rate=100).run(
+            0.5, report_interval=0.25, out=lines.append
+        )
+
+    requests = sum(total.outcomes.values())
+    assert 20 < requests <= 60
+    assert total.errors == (requests if error_rate else 0)
+    assert total.histogram.percentile(50) >= 0.005
+    assert len(lines) == 3
+    assert lines[-1].strip().startswith("Total")
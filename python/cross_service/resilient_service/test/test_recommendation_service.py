@@ -0,0 +1,118 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+
+import boto3
+import ijson
+import pytest
+
+import recommendation_service
+from recommendation_service import RecommendationService, RecommendationServiceError
+
+TABLE_NAME = "doc-example-test-rec-table"
+
+
+def make_items(count):
+    return [
+        {
+            "MediaType": {"S": "Book"},
+            "ItemId": {"N": str(index)},
+            "Title": {"S": f"Book {index}"},
+        }
+        for index in range(count)
+    ]
+
+
+def put_requests(items):
+    return {TABLE_NAME: [{"PutRequest": {"Item": item}} for item in items]}
+
+
+@pytest.fixture
+def service_n_stubber(make_stubber, monkeypatch):
+    monkeypatch.setattr(recommendation_service.time, "sleep", lambda _: None)
+    ddb_client = boto3.client("dynamodb")
+    return RecommendationService(TABLE_NAME, ddb_client), make_stubber(ddb_client)
+
+
+def test_read_items(tmp_path, monkeypatch):
+    monkeypatch.setattr(recommendation_service, "READ_SIZE", 7)
+    items = make_items(5)
+    data_file = tmp_path / "items.json"
+    data_file.write_text(json.dumps(items, indent=2))
+
+    assert list(RecommendationService._read_items(data_file)) == items
+
+
+@pytest.mark.parametrize(
+    "text", ["[,,{}]", '[{"ItemId": {"N": "1"}} {"ItemId": {"N": "2"}}]', "[{}"]
+)
+def test_read_items_malformed(tmp_path, text):
+    data_file = tmp_path / "items.json"
+    data_file.write_text(text)
+
+    with pytest.raises(ijson.JSONError):
+        list(RecommendationService._read_items(data_file))
+
+
+def test_populate(service_n_stubber, tmp_path):
+    service, ddb_stubber = service_n_stubber
+    items = make_items(30)
+    data_file = tmp_path / "items.json"
+    data_file.write_text(json.dumps(items))
+    progress = []
+
+    ddb_stubber.stub_batch_write_item(put_requests(items[:25]))
+    ddb_stubber.stub_batch_write_item(put_requests(items[25:]))
+
+    written = service.populate(
+        data_file, max_workers=1, progress=lambda count, _: progress.append(count)
+    )
+
+    assert written == 30
+    assert progress == [25, 30]
+
+
+def test_populate_unprocessed(service_n_stubber, tmp_path):
+    service, ddb_stubber = service_n_stubber
+    items = make_items(3)
+    data_file = tmp_path / "items.json"
+    data_file.write_text(json.dumps(items))
+
+    ddb_stubber.stub_batch_write_item(
+        put_requests(items), unprocessed_items=put_requests(items[1:])
+    )
+    ddb_stubber.stub_batch_write_item(
+        put_requests(items[1:]), unprocessed_items=put_requests(items[2:])
+    )
+    ddb_stubber.stub_batch_write_item(put_requests(items[2:]))
+
+    assert service.populate(data_file) == 3
+
+
+def test_populate_unprocessed_error(service_n_stubber, tmp_path, monkeypatch):
+    monkeypatch.setattr(recommendation_service, "MAX_BATCH_ATTEMPTS", 2)
+    service, ddb_stubber = service_n_stubber
+    items = make_items(2)
+    data_file = tmp_path / "items.json"
+    data_file.write_text(json.dumps(items))
+
+    for _ in range(2):
+        ddb_stubber.stub_batch_write_item(
+            put_requests(items), unprocessed_items=put_requests(items)
+        )
+
+    with pytest.raises(RecommendationServiceError):
+        service.populate(data_file)
+
+
+def test_populate_error(service_n_stubber, tmp_path):
+    service, ddb_stubber = service_n_stubber
+    items = make_items(2)
+    data_file = tmp_path / "items.json"
+    data_file.write_text(json.dumps(items))
+
+    ddb_stubber.stub_batch_write_item(put_requests(items), error_code="TestException")
+
+    with pytest.raises(RecommendationServiceError):
+        service.populate(data_file)
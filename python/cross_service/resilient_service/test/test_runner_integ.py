@@ -33,13 +33,13 @@ def test_runner_integ(input_mocker, caplog):
             "",  # deploy
             "1",
             "2",
-            "3",
-            "3",
-            "3",
-            "3",
-            "3",
-            "3",
-            "3",  # demo
+            "4",
+            "4",
+            "4",
+            "4",
+            "4",
+            "4",
+            "4",  # demo
             "y",  # destroy
         ]
     )
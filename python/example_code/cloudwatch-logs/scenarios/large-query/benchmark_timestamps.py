@@ -0,0 +1,87 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Compares the time it takes to find the most recent log in a full batch of 10,000
+logs, by comparing date strings pairwise and by parsing each timestamp once to an
+integer.
+
+    python benchmark_timestamps.py
+"""
+
+import logging
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import boto3
+
+from cloudwatch_query import CloudWatchQuery
+
+
+def make_batch(size):
+    """Makes a batch of logs with random timestamps across three days."""
+    start = datetime(2024, 1, 1)
+    return [
+        [
+            {
+                "field": "@timestamp",
+                "value": (
+                    start + timedelta(milliseconds=random.randrange(3 * 86_400_000))
+                ).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            },
+            {"field": "@message", "value": f"message {index}"},
+        ]
+        for index in range(size)
+    ]
+
+
+def compare_dates(date_str1, date_str2):
+    """Returns the later of two dates, parsing both of them."""
+    if datetime.fromisoformat(date_str1) > datetime.fromisoformat(date_str2):
+        return date_str1
+    else:
+        return date_str2
+
+
+def find_most_recent_log_pairwise(logs):
+    """Finds the most recent log by parsing both dates of every comparison."""
+    most_recent_log = None
+    most_recent_date = "1970-01-01 00:00:00.000"
+    for log in logs:
+        for item in log:
+            if item["field"] == "@timestamp":
+                logging.debug(f"Compared: {item['value']} to {most_recent_date}")
+                if compare_dates(item["value"], most_recent_date) == item["value"]:
+                    logging.debug(f"New most recent: {item['value']}")
+                    most_recent_date = item["value"]
+                    most_recent_log = log
+    return most_recent_log
+
+
+def main():
+    query = CloudWatchQuery(("", ""), client=boto3.client("logs", "us-east-1"))
+    batch = make_batch(query.limit)
+    assert (
+        query.find_most_recent_log(batch)[0]["value"]
+        == find_most_recent_log_pairwise(batch)[0]["value"]
+    )
+
+    repeat = 20
+    pairwise = min(
+        timeit.repeat(
+            lambda: find_most_recent_log_pairwise(batch), number=1, repeat=repeat
+        )
+    )
+    parsed_once = min(
+        timeit.repeat(
+            lambda: query.find_most_recent_log(batch), number=1, repeat=repeat
+        )
+    )
+    print(f"Batch size:        {len(batch)} logs")
+    print(f"Pairwise parsing:  {pairwise * 1000:8.2f} ms per batch")
+    print(f"Parsed once:       {parsed_once * 1000:8.2f} ms per batch")
+    print(f"Speedup:           {pairwise / parsed_once:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,26 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+import json
 import logging
+import math
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 import threading
 import boto3
 
 from date_utilities import DateUtilities
 
+# CloudWatch Logs Insights runs at most 30 concurrent queries for each account,
+# so leave room for other queries that might be running at the same time.
+DEFAULT_MAX_CONCURRENT_QUERIES = 10
+
+# The query that fetches logs, sorted so that the most recent log of a full batch
+# marks where the next query starts.
+LOGS_QUERY = "fields @timestamp, @message | sort @timestamp asc"
+
+FINISHED_QUERY_STATUSES = ["Complete", "Failed", "Cancelled", "Timeout", "Unknown"]
+
 
 class DateOutOfBoundsError(Exception):
     """Exception raised when the date range for a query is out of bounds."""
@@ -25,20 +38,50 @@ class CloudWatchQuery:
     :vartype limit: int
     """
 
-    def __init__(self, date_range):
+    def __init__(
+        self,
+        date_range,
+        client=None,
+        max_concurrent_queries=DEFAULT_MAX_CONCURRENT_QUERIES,
+        initial_poll_interval=0.5,
+        max_poll_interval=5,
+    ):
+        """
+        :param date_range: Start and end datetime for the query.
+        :param client: A Boto3 CloudWatch Logs client that is shared by all queries.
+                       When not specified, a default client is created.
+        :param max_concurrent_queries: The maximum number of queries to run at the
+                                       same time.
+        :param initial_poll_interval: The number of seconds to wait before the first
+                                      check for the results of a query.
+        :param max_poll_interval: The maximum number of seconds to wait between
+                                  checks for the results of a query.
+        """
         self.lock = threading.Lock()
         self.log_groups = "/workflows/cloudwatch-logs/large-query"
         self.query_results = []
+        self.result_count = 0
         self.date_range = date_range
         self.query_duration = None
         self.datetime_format = "%Y-%m-%d %H:%M:%S.%f"
         self.date_utilities = DateUtilities()
         self.limit = 10000
+        self.client = client if client is not None else boto3.client("logs")
+        self.max_concurrent_queries = max_concurrent_queries
+        self.initial_poll_interval = initial_poll_interval
+        self.max_poll_interval = max_poll_interval
 
-    def query_logs(self, date_range):
+    def query_logs(self, date_range, output_file=None, plan=False):
         """
         Executes a CloudWatch logs query for a specified date range and calculates the execution time of the query.
 
+        :param date_range: The date range to query, as a tuple of start and end dates.
+        :param output_file: When specified, each log is written to this file as a
+                            line of JSON as soon as its batch arrives, and logs are
+                            not kept in `self.query_results`.
+        :param plan: When True, first run a histogram query to split the date range
+                     into partitions that each fit in one batch, and query all
+                     partitions in parallel.
         :return: A batch of logs retrieved from the CloudWatch logs query.
         :rtype: list
         """
@@ -53,10 +96,117 @@ class CloudWatchQuery:
             f"\n       START:    {start_date}"
             f"\n       END:      {end_date}"
         )
-        self.recursive_query((start_date, end_date))
+        if plan:
+            date_ranges = self.plan_date_ranges((start_date, end_date))
+        else:
+            date_ranges = [(start_date, end_date)]
+        if output_file is None:
+            for batch_of_logs in self.iter_batches(*date_ranges):
+                self.query_results.extend(batch_of_logs)
+                self.result_count += len(batch_of_logs)
+        else:
+            with open(output_file, "w") as output:
+                for batch_of_logs in self.iter_batches(*date_ranges):
+                    for log in batch_of_logs:
+                        output.write(
+                            json.dumps({item["field"]: item["value"] for item in log})
+                        )
+                        output.write("\n")
+                    self.result_count += len(batch_of_logs)
         end_time = datetime.now()
         self.query_duration = (end_time - start_time).total_seconds()
 
+    def iter_batches(self, *date_ranges):
+        """
+        Queries date ranges and yields batches of logs as soon as each query
+        completes. Queries run on a bounded pool of worker threads. When a batch
+        is full, the rest of its date range is split in two and both halves are
+        added to the queue of work.
+
+        :param date_ranges: The date ranges to fetch logs for, each specified as a tuple (start_timestamp, end_timestamp).
+        :type date_ranges: tuple
+        :return: A generator of batches of logs.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_queries) as executor:
+            pending = {
+                executor.submit(self.perform_query, date_range): date_range
+                for date_range in date_ranges
+            }
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        query_range = pending.pop(future)
+                        batch_of_logs = future.result()
+                        if len(batch_of_logs) == self.limit:
+                            logging.info(f"Fetched {self.limit}, checking for more...")
+                            for sub_range in self.split_remaining_range(
+                                batch_of_logs, query_range
+                            ):
+                                pending[
+                                    executor.submit(self.perform_query, sub_range)
+                                ] = sub_range
+                        yield batch_of_logs
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def plan_date_ranges(self, date_range, max_bins=1000, fill_ratio=0.9):
+        """
+        Runs a histogram query that counts the logs in short time bins, and uses
+        the counts to split a date range into partitions that are each expected
+        to hold fewer logs than the query limit. The histogram scans the logs
+        once, instead of once for each level of splitting that a full batch causes.
+
+        A partition that still fills a batch, such as when a single bin holds
+        more logs than the limit, is split after its query like any other.
+
+        :param date_range: The date range to partition, as a tuple of start and end dates.
+        :param max_bins: The maximum number of bins in the histogram.
+        :param fill_ratio: The fraction of the query limit to plan for in each
+                           partition, which leaves room for logs that arrive
+                           after the histogram is taken.
+        :return: The list of partitions, in time order.
+        """
+        start_time = self.date_utilities.convert_iso8601_to_unix_timestamp(
+            date_range[0]
+        )
+        end_time = self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])
+        bin_seconds = max(1, math.ceil((end_time - start_time) / 1000 / max_bins))
+        query_string = (
+            f"stats count(*) as logCount by bin({bin_seconds}s) as timeBin"
+            f" | sort timeBin asc"
+        )
+        try:
+            query_id = self._initiate_query(
+                self.client, date_range, self.limit, query_string
+            )
+            rows = self._wait_for_query_results(self.client, query_id)
+        except DateOutOfBoundsError:
+            return [date_range]
+
+        bins = sorted(
+            (fields["timeBin"], int(fields["logCount"]))
+            for fields in (
+                {item["field"]: item["value"] for item in row} for row in rows
+            )
+        )
+        target = int(self.limit * fill_ratio)
+        partitions = []
+        partition_start = date_range[0]
+        partition_count = 0
+        for bin_start, bin_count in bins:
+            if partition_count and partition_count + bin_count > target:
+                partitions.append((partition_start, bin_start))
+                partition_start = bin_start
+                partition_count = 0
+            partition_count += bin_count
+        partitions.append((partition_start, date_range[1]))
+        logging.info(
+            f"Planned {len(partitions)} partitions for {sum(c for _, c in bins)} logs."
+        )
+        return partitions
+
     def recursive_query(self, date_range):
         """
         Processes logs within a given date range, fetching batches of logs recursively if necessary.
@@ -68,60 +218,60 @@ class CloudWatchQuery:
                  in the `self.query_results` attribute.
         :rtype: None
         """
-        batch_of_logs = self.perform_query(date_range)
-        # Add the batch to the accumulated logs
-        with self.lock:
-            self.query_results.extend(batch_of_logs)
-        if len(batch_of_logs) == self.limit:
-            logging.info(f"Fetched {self.limit}, checking for more...")
-            most_recent_log = self.find_most_recent_log(batch_of_logs)
+        for batch_of_logs in self.iter_batches(date_range):
+            with self.lock:
+                self.query_results.extend(batch_of_logs)
+                self.result_count += len(batch_of_logs)
+
+    def split_remaining_range(self, batch_of_logs, date_range):
+        """
+        Splits the part of a date range that follows a full batch of logs into two
+        halves.
+
+        :param batch_of_logs: A full batch of logs from a query of the date range.
+        :param date_range: The date range of the query.
+        :return: The two halves of the remaining date range.
+        """
+        most_recent_log = self.find_most_recent_log(batch_of_logs)
+        if most_recent_log is None:
+            most_recent_log_timestamp = date_range[0]
+        else:
             most_recent_log_timestamp = next(
                 item["value"]
                 for item in most_recent_log
                 if item["field"] == "@timestamp"
             )
-            new_range = (most_recent_log_timestamp, date_range[1])
-            midpoint = self.date_utilities.find_middle_time(new_range)
-
-            first_half_thread = threading.Thread(
-                target=self.recursive_query,
-                args=((most_recent_log_timestamp, midpoint),),
-            )
-            second_half_thread = threading.Thread(
-                target=self.recursive_query, args=((midpoint, date_range[1]),)
-            )
-
-            first_half_thread.start()
-            second_half_thread.start()
-
-            first_half_thread.join()
-            second_half_thread.join()
+        new_range = (most_recent_log_timestamp, date_range[1])
+        midpoint = self.date_utilities.find_middle_time(new_range)
+        return [(most_recent_log_timestamp, midpoint), (midpoint, date_range[1])]
 
     def find_most_recent_log(self, logs):
         """
         Search a list of log items and return most recent log entry.
+        Each @timestamp is parsed once to an integer, so the search compares
+        integers instead of parsing dates for every comparison.
+
         :param logs: A list of logs to analyze.
-        :return: log
+        :return: log, or None when no log has a @timestamp.
         :type :return List containing log item details
         """
-        most_recent_log = None
-        most_recent_date = "1970-01-01 00:00:00.000"
-
+        timestamps = []
         for log in logs:
             for item in log:
                 if item["field"] == "@timestamp":
-                    logging.debug(f"Compared: {item['value']} to {most_recent_date}")
-                    if (
-                        self.date_utilities.compare_dates(
-                            item["value"], most_recent_date
-                        )
-                        == item["value"]
-                    ):
-                        logging.debug(f"New most recent: {item['value']}")
-                        most_recent_date = item["value"]
-                        most_recent_log = log
-        logging.info(f"Most recent log date of batch: {most_recent_date}")
-        return most_recent_log
+                    timestamps.append(item["value"])
+                    break
+            else:
+                timestamps.append(None)
+        if all(timestamp is None for timestamp in timestamps):
+            return None
+        timestamps = self.date_utilities.parse_timestamps_ms(timestamps)
+        most_recent_index = int(timestamps.argmax())
+        logging.info(
+            f"Most recent log date of batch: "
+            f"{self.date_utilities.format_timestamp_ms(int(timestamps[most_recent_index]))}"
+        )
+        return logs[most_recent_index]
 
     # snippet-start:[python.example_code.cloudwatch_logs.start_query]
     def perform_query(self, date_range):
@@ -133,90 +283,70 @@ class CloudWatchQuery:
         :return: A list containing the query results.
         :rtype: list
         """
-        client = boto3.client("logs")
         try:
-            try:
-                start_time = round(
-                    self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])
-                )
-                end_time = round(
-                    self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])
-                )
-                response = client.start_query(
-                    logGroupName=self.log_groups,
-                    startTime=start_time,
-                    endTime=end_time,
-                    queryString="fields @timestamp, @message | sort @timestamp asc",
-                    limit=self.limit,
-                )
-                query_id = response["queryId"]
-            except client.exceptions.ResourceNotFoundException as e:
-                raise DateOutOfBoundsError(f"Resource not found: {e}")
-            while True:
-                time.sleep(1)
-                results = client.get_query_results(queryId=query_id)
-                if results["status"] in [
-                    "Complete",
-                    "Failed",
-                    "Cancelled",
-                    "Timeout",
-                    "Unknown",
-                ]:
-                    return results.get("results", [])
+            query_id = self._initiate_query(self.client, date_range, self.limit)
+            return self._wait_for_query_results(self.client, query_id)
         except DateOutOfBoundsError:
             return []
 
-    def _initiate_query(self, client, date_range, max_logs):
+    def _initiate_query(self, client, date_range, max_logs, query_string=LOGS_QUERY):
         """
-        Initiates the CloudWatch logs query.
+        Initiates the CloudWatch logs query. When the account is already running
+        as many queries as it is allowed, waits with exponential backoff and tries
+        again.
 
         :param date_range: A tuple representing the start and end datetime for the query.
         :type date_range: tuple
         :param max_logs: The maximum number of logs to retrieve.
         :type max_logs: int
+        :param query_string: The CloudWatch Logs Insights query to run.
+        :type query_string: str
         :return: The query ID as a string.
         :rtype: str
         """
-        try:
-            start_time = round(
-                self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])
-            )
-            end_time = round(
-                self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])
-            )
-            response = client.start_query(
-                logGroupName=self.log_groups,
-                startTime=start_time,
-                endTime=end_time,
-                queryString="fields @timestamp, @message | sort @timestamp asc",
-                limit=max_logs,
-            )
-            return response["queryId"]
-        except client.exceptions.ResourceNotFoundException as e:
-            raise DateOutOfBoundsError(f"Resource not found: {e}")
+        start_time = round(
+            self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])
+        )
+        end_time = round(
+            self.date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])
+        )
+        delay = self.initial_poll_interval
+        while True:
+            try:
+                response = client.start_query(
+                    logGroupName=self.log_groups,
+                    startTime=start_time,
+                    endTime=end_time,
+                    queryString=query_string,
+                    limit=max_logs,
+                )
+                return response["queryId"]
+            except client.exceptions.ResourceNotFoundException as e:
+                raise DateOutOfBoundsError(f"Resource not found: {e}")
+            except client.exceptions.LimitExceededException:
+                logging.info(f"Too many concurrent queries, retrying in {delay}s.")
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_poll_interval)
 
     # snippet-end:[python.example_code.cloudwatch_logs.start_query]
 
     # snippet-start:[python.example_code.cloudwatch_logs.get_query_results]
     def _wait_for_query_results(self, client, query_id):
         """
-        Waits for the query to complete and retrieves the results.
+        Waits for the query to complete and retrieves the results. The wait
+        between checks starts short and grows for queries that take longer.
 
         :param query_id: The ID of the initiated query.
         :type query_id: str
         :return: A list containing the results of the query.
         :rtype: list
         """
+        delay = self.initial_poll_interval
         while True:
-            time.sleep(1)
+            time.sleep(delay)
             results = client.get_query_results(queryId=query_id)
-            if results["status"] in [
-                "Complete",
-                "Failed",
-                "Cancelled",
-                "Timeout",
-                "Unknown",
-            ]:
+            if results["status"] in FINISHED_QUERY_STATUSES:
                 return results.get("results", [])
+            delay = min(delay * 1.5, self.max_poll_interval)
 
     # snippet-end:[python.example_code.cloudwatch_logs.get_query_results]
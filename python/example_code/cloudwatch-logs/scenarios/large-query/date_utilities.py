@@ -1,6 +1,13 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MILLISECOND = timedelta(milliseconds=1)
+# The value that parse_timestamps_ms gives a missing date, which is NumPy's NaT.
+MISSING_TIMESTAMP_MS = np.iinfo(np.int64).min
 
 
 class DateUtilities:
@@ -28,30 +35,20 @@ class DateUtilities:
         except ValueError:
             return False
 
-    def find_middle_time(self, date_range) -> tuple:
+    def find_middle_time(self, date_range) -> str:
         """
-        Find the middle time between two timestamps in ISO8601 format.
-        Returns:
-        - str: The middle time in ISO8601 format.
-        """
-        # Parse the ISO8601 formatted strings into datetime objects
-        dt1 = datetime.fromisoformat(date_range[0])
-        dt2 = datetime.fromisoformat(date_range[1])
-
-        # Ensure dt1 is the earlier datetime
-        if dt1 > dt2:
-            dt1, dt2 = dt2, dt1
+        Find the middle time between two timestamps in ISO8601 format. The
+        timestamps are parsed to UNIX timestamps in milliseconds and the middle is
+        found with integer arithmetic.
 
-        # Calculate the difference between the two datetime objects
-        difference = dt2 - dt1
-
-        # Find the halfway duration
-        halfway = difference / 2
-
-        # Calculate the middle time
-        middle_time = dt1 + halfway
-
-        return middle_time.isoformat()
+        :param date_range: The start and end date strings in ISO 8601 format.
+        :type date_range: tuple
+        :return: The middle time in the "YYYY-MM-DD HH:MM:SS.fff" format.
+        :rtype: str
+        """
+        start = self.parse_timestamp_ms(date_range[0])
+        end = self.parse_timestamp_ms(date_range[1])
+        return self.format_timestamp_ms((start + end) // 2)
 
     @staticmethod
     def format_iso8601(date_str):
@@ -170,6 +167,71 @@ class DateUtilities:
         iso8601 = self.convert_unix_timestamp_to_iso8601(round(unix_timestamp * 1000))
         return iso8601
 
+    @staticmethod
+    def parse_timestamp_ms(timestamp):
+        """
+        Parses a date string in ISO 8601 format to a UNIX timestamp in milliseconds.
+        Dates without a time zone are treated as UTC.
+
+        :param timestamp: The date string in ISO 8601 format.
+        :type timestamp: str
+        :return: UNIX timestamp in milliseconds.
+        :rtype: int
+        """
+        date = datetime.fromisoformat(timestamp)
+        if date.tzinfo is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        return (date - EPOCH) // ONE_MILLISECOND
+
+    @staticmethod
+    def parse_timestamps_ms(timestamps):
+        """
+        Parses a sequence of date strings in ISO 8601 format to UNIX timestamps in
+        milliseconds, so that they can be compared, sorted, and split as integers.
+        The strings are parsed in a single vectorized NumPy call, and dates without
+        a time zone are treated as UTC. NumPy warns about dates with a time zone
+        instead of reliably converting them, so those dates are converted to UTC
+        before the call. None is parsed as MISSING_TIMESTAMP_MS, which is less than
+        any other timestamp.
+
+        :param timestamps: The date strings in ISO 8601 format.
+        :return: The UNIX timestamps in milliseconds.
+        :rtype: numpy.ndarray of int64
+        """
+        strings = np.array([timestamp or "" for timestamp in timestamps])
+        # A time zone is a Z suffix, a + offset, or a - after the date part.
+        has_time_zone = (
+            np.char.endswith(strings, "Z")
+            | (np.char.find(strings, "+") >= 0)
+            | (np.char.rfind(strings, "-") > len("YYYY-MM-DD"))
+        )
+        if has_time_zone.any():
+            timestamps = [
+                (
+                    DateUtilities.format_timestamp_ms(
+                        DateUtilities.parse_timestamp_ms(timestamp)
+                    )
+                    if in_time_zone
+                    else timestamp
+                )
+                for timestamp, in_time_zone in zip(timestamps, has_time_zone)
+            ]
+        return np.array(timestamps, dtype="datetime64[ms]").astype(np.int64)
+
+    @staticmethod
+    def format_timestamp_ms(unix_timestamp):
+        """
+        Formats a UNIX timestamp in milliseconds in the "YYYY-MM-DD HH:MM:SS.fff"
+        format that CloudWatch Logs uses for @timestamp.
+
+        :param unix_timestamp: UNIX timestamp in milliseconds.
+        :type unix_timestamp: int
+        :return: The formatted date string.
+        :rtype: str
+        """
+        date = EPOCH + timedelta(milliseconds=unix_timestamp)
+        return f"{date:%Y-%m-%d %H:%M:%S}.{unix_timestamp % 1000:03}"
+
     def compare_dates(self, date_str1, date_str2):
         """
         Compares two dates in ISO 8601 format and returns the later one.
@@ -181,8 +243,8 @@ class DateUtilities:
         :return: The later of the two dates.
         :rtype: str
         """
-        date1 = datetime.fromisoformat(date_str1)
-        date2 = datetime.fromisoformat(date_str2)
+        date1 = self.parse_timestamp_ms(date_str1)
+        date2 = self.parse_timestamp_ms(date_str2)
 
         if date1 > date2:
             return date_str1
@@ -98,11 +98,12 @@ class CloudWatchLogsQueryRunner:
         """
         cloudwatch_query = CloudWatchQuery(
             [start_date_iso8601, end_date_iso8601],
+            client=self.cloudwatch_logs_client,
         )
-        cloudwatch_query.query_logs((start_date_iso8601, end_date_iso8601))
+        cloudwatch_query.query_logs((start_date_iso8601, end_date_iso8601), plan=True)
         logging.info("Query executed successfully.")
         logging.info(
-            f"Queries completed in {cloudwatch_query.query_duration} seconds. Total logs found: {len(cloudwatch_query.query_results)}"
+            f"Queries completed in {cloudwatch_query.query_duration} seconds. Total logs found: {cloudwatch_query.result_count}"
         )
 
 
@@ -0,0 +1,243 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for cloudwatch_query.py functions.
+"""
+
+import json
+import boto3
+
+from cloudwatch_query import CloudWatchQuery
+from date_utilities import DateUtilities
+
+LOG_GROUP = "/workflows/cloudwatch-logs/large-query"
+QUERY_STRING = "fields @timestamp, @message | sort @timestamp asc"
+
+
+def make_logs(*timestamps):
+    return [
+        [
+            {"field": "@timestamp", "value": timestamp},
+            {"field": "@message", "value": f"message at {timestamp}"},
+        ]
+        for timestamp in timestamps
+    ]
+
+
+def stub_query(stubber, date_range, query_id, logs, limit, running_polls=0):
+    date_utilities = DateUtilities()
+    stubber.stub_start_query(
+        LOG_GROUP,
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])),
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])),
+        QUERY_STRING,
+        limit,
+        query_id,
+    )
+    for _ in range(running_polls):
+        stubber.stub_get_query_results(query_id, "Running", [])
+    stubber.stub_get_query_results(query_id, "Complete", logs)
+
+
+def make_query(logs_client, date_range, limit=10000):
+    query = CloudWatchQuery(
+        date_range,
+        client=logs_client,
+        max_concurrent_queries=1,
+        initial_poll_interval=0,
+    )
+    query.limit = limit
+    return query
+
+
+def test_query_logs_single_batch(make_stubber):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    date_range = ("2024-01-01 00:00:00", "2024-01-02 00:00:00")
+    logs = make_logs("2024-01-01 01:00:00.000", "2024-01-01 02:00:00.000")
+    query = make_query(logs_client, date_range)
+
+    stub_query(logs_stubber, date_range, "query-1", logs, query.limit, running_polls=2)
+
+    query.query_logs(date_range)
+    assert query.query_results == logs
+    assert query.result_count == len(logs)
+
+
+def test_query_logs_splits_full_batch(make_stubber):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    date_range = ("2024-01-01 00:00:00", "2024-01-02 00:00:00")
+    first = make_logs("2024-01-01 01:00:00.000", "2024-01-01 02:00:00.000")
+    second = make_logs("2024-01-01 05:00:00.000")
+    third = make_logs("2024-01-01 20:00:00.000")
+    query = make_query(logs_client, date_range, limit=2)
+    midpoint = DateUtilities().find_middle_time(
+        ("2024-01-01 02:00:00.000", date_range[1])
+    )
+
+    stub_query(logs_stubber, date_range, "query-1", first, query.limit)
+    stub_query(
+        logs_stubber,
+        ("2024-01-01 02:00:00.000", midpoint),
+        "query-2",
+        second,
+        query.limit,
+    )
+    stub_query(logs_stubber, (midpoint, date_range[1]), "query-3", third, query.limit)
+
+    query.query_logs(date_range)
+    assert query.query_results == first + second + third
+    assert query.result_count == 4
+
+
+def test_query_logs_to_file(make_stubber, tmp_path):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    date_range = ("2024-01-01 00:00:00", "2024-01-02 00:00:00")
+    logs = make_logs("2024-01-01 01:00:00.000", "2024-01-01 02:00:00.000")
+    query = make_query(logs_client, date_range)
+    output_file = tmp_path / "logs.jsonl"
+
+    stub_query(logs_stubber, date_range, "query-1", logs, query.limit)
+
+    query.query_logs(date_range, output_file=output_file)
+    assert query.query_results == []
+    assert query.result_count == len(logs)
+    with open(output_file) as lines:
+        written = [json.loads(line) for line in lines]
+    assert written == [
+        {
+            "@timestamp": "2024-01-01 01:00:00.000",
+            "@message": "message at 2024-01-01 01:00:00.000",
+        },
+        {
+            "@timestamp": "2024-01-01 02:00:00.000",
+            "@message": "message at 2024-01-01 02:00:00.000",
+        },
+    ]
+
+
+def test_query_logs_retries_when_limit_exceeded(make_stubber):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    date_range = ("2024-01-01 00:00:00", "2024-01-02 00:00:00")
+    logs = make_logs("2024-01-01 01:00:00.000")
+    query = make_query(logs_client, date_range)
+    date_utilities = DateUtilities()
+
+    logs_stubber.stub_start_query(
+        LOG_GROUP,
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])),
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])),
+        QUERY_STRING,
+        query.limit,
+        None,
+        error_code="LimitExceededException",
+    )
+    stub_query(logs_stubber, date_range, "query-1", logs, query.limit)
+
+    query.query_logs(date_range)
+    assert query.query_results == logs
+
+
+def make_histogram(*bins):
+    return [
+        [
+            {"field": "timeBin", "value": bin_start},
+            {"field": "logCount", "value": str(count)},
+        ]
+        for bin_start, count in bins
+    ]
+
+
+def test_plan_date_ranges(make_stubber):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    date_range = ("2024-01-01 00:00:00", "2024-01-01 01:00:00")
+    query = make_query(logs_client, date_range, limit=10)
+    histogram = make_histogram(
+        ("2024-01-01 00:00:00.000", 4),
+        ("2024-01-01 00:10:00.000", 4),
+        ("2024-01-01 00:20:00.000", 3),
+        ("2024-01-01 00:40:00.000", 9),
+    )
+    date_utilities = DateUtilities()
+
+    logs_stubber.stub_start_query(
+        LOG_GROUP,
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])),
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])),
+        "stats count(*) as logCount by bin(4s) as timeBin | sort timeBin asc",
+        query.limit,
+        "histogram",
+    )
+    logs_stubber.stub_get_query_results("histogram", "Complete", histogram)
+
+    assert query.plan_date_ranges(date_range) == [
+        ("2024-01-01 00:00:00", "2024-01-01 00:20:00.000"),
+        ("2024-01-01 00:20:00.000", "2024-01-01 00:40:00.000"),
+        ("2024-01-01 00:40:00.000", "2024-01-01 01:00:00"),
+    ]
+
+
+def test_query_logs_planned(make_stubber):
+    logs_client = boto3.client("logs")
+    logs_stubber = make_stubber(logs_client)
+    date_range = ("2024-01-01 00:00:00", "2024-01-01 01:00:00")
+    query = make_query(logs_client, date_range, limit=10)
+    histogram = make_histogram(
+        ("2024-01-01 00:00:00.000", 6), ("2024-01-01 00:30:00.000", 6)
+    )
+    first = make_logs("2024-01-01 00:01:00.000")
+    second = make_logs("2024-01-01 00:31:00.000")
+    date_utilities = DateUtilities()
+
+    logs_stubber.stub_start_query(
+        LOG_GROUP,
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[0])),
+        round(date_utilities.convert_iso8601_to_unix_timestamp(date_range[1])),
+        "stats count(*) as logCount by bin(4s) as timeBin | sort timeBin asc",
+        query.limit,
+        "histogram",
+    )
+    logs_stubber.stub_get_query_results("histogram", "Complete", histogram)
+    stub_query(
+        logs_stubber,
+        (date_range[0], "2024-01-01 00:30:00.000"),
+        "query-1",
+        first,
+        query.limit,
+    )
+    stub_query(
+        logs_stubber,
+        ("2024-01-01 00:30:00.000", date_range[1]),
+        "query-2",
+        second,
+        query.limit,
+    )
+
+    query.query_logs(date_range, plan=True)
+    assert query.query_results == first + second
+
+
+def test_find_most_recent_log():
+    query = CloudWatchQuery(("", ""), client=boto3.client("logs"))
+    logs = make_logs(
+        "2024-01-01 05:00:00.000",
+        "2024-01-02 01:00:00.000",
+        "2024-01-01 23:59:59.999",
+    )
+
+    assert query.find_most_recent_log(logs) == logs[1]
+    assert query.find_most_recent_log([]) is None
+
+
+def test_find_most_recent_log_missing_timestamps():
+    query = CloudWatchQuery(("", ""), client=boto3.client("logs"))
+    untimed = [[{"field": "@message", "value": "no timestamp"}]]
+    logs = make_logs("2024-01-01 05:00:00.000", "2024-01-01T06:00:00+02:00")
+
+    assert query.find_most_recent_log(untimed + logs) == logs[0]
+    assert query.find_most_recent_log(untimed * 2) is None
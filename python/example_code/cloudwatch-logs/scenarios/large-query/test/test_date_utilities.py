@@ -0,0 +1,95 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for date_utilities.py functions.
+"""
+
+from datetime import datetime, timezone
+import warnings
+import pytest
+
+from date_utilities import MISSING_TIMESTAMP_MS, DateUtilities
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        "2024-01-01 00:00:00.000",
+        "2024-02-29 23:59:59.999",
+        "1999-12-31T12:34:56.789",
+        "2024-03-10 08:00:00",
+        "2024-03-10T08:00:00+02:00",
+    ],
+)
+def test_parse_timestamp_ms(timestamp):
+    date = datetime.fromisoformat(timestamp)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    expected = round(date.timestamp() * 1000)
+
+    assert DateUtilities.parse_timestamp_ms(timestamp) == expected
+
+
+def test_format_timestamp_ms_round_trip():
+    timestamp = "2024-05-06 07:08:09.010"
+    unix_timestamp = DateUtilities.parse_timestamp_ms(timestamp)
+
+    assert DateUtilities.format_timestamp_ms(unix_timestamp) == timestamp
+
+
+def test_compare_dates():
+    date_utilities = DateUtilities()
+    earlier = "2024-01-01 00:00:00.000"
+    later = "2024-01-01 00:00:00.001"
+
+    assert date_utilities.compare_dates(earlier, later) == later
+    assert date_utilities.compare_dates(later, earlier) == later
+
+
+def test_parse_timestamps_ms():
+    timestamps = ["2024-01-01 00:00:00.000", "2024-01-01 00:00:01.500"]
+
+    assert list(DateUtilities.parse_timestamps_ms(timestamps)) == [
+        DateUtilities.parse_timestamp_ms(timestamp) for timestamp in timestamps
+    ]
+
+
+def test_parse_timestamps_ms_with_offsets_and_missing():
+    timestamps = [
+        "2024-01-01 00:00:00.000",
+        "2024-01-01T02:00:00.500+02:00",
+        None,
+        "2024-01-01T00:00:01Z",
+        "2023-12-31T19:00:02-0500",
+    ]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        parsed = DateUtilities.parse_timestamps_ms(timestamps)
+
+    assert list(parsed) == [
+        DateUtilities.parse_timestamp_ms("2024-01-01 00:00:00.000"),
+        DateUtilities.parse_timestamp_ms("2024-01-01 00:00:00.500"),
+        MISSING_TIMESTAMP_MS,
+        DateUtilities.parse_timestamp_ms("2024-01-01 00:00:01.000"),
+        DateUtilities.parse_timestamp_ms("2024-01-01 00:00:02.000"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "date_range,expected",
+    [
+        (
+            ("2024-01-01 00:00:00.000", "2024-01-01 00:00:01.001"),
+            "2024-01-01 00:00:00.500",
+        ),
+        (("2024-01-02T00:00:00", "2024-01-01T00:00:00"), "2024-01-01 12:00:00.000"),
+        (
+            ("2024-01-01T02:00:00+02:00", "2024-01-01 02:00:00"),
+            "2024-01-01 01:00:00.000",
+        ),
+    ],
+)
+def test_find_middle_time(date_range, expected):
+    assert DateUtilities().find_middle_time(date_range) == expected
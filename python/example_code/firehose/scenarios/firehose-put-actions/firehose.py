@@ -1,15 +1,30 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+import heapq
+import itertools
 import json
 import logging
 import random
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Iterable, Iterator
 
 import backoff
 import boto3
+import ijson
+from botocore.exceptions import BotoCoreError, ClientError
 
 from config import get_config
 
+# The limits of a PutRecordBatch call and of a single record.
+MAX_BATCH_RECORDS = 500
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+MAX_RECORD_BYTES = 1000 * 1024
+MAX_ENTRY_ATTEMPTS = 5
+BACKOFF_BASE = 0.1
+BACKOFF_CAP = 5.0
+
 
 def load_sample_data(path: str) -> dict:
     """
@@ -25,11 +40,70 @@ def load_sample_data(path: str) -> dict:
         return json.load(f)
 
 
+def iter_sample_data(path: str, read_size: int = 64 * 1024) -> Iterator[dict]:
+    """
+    Stream sample data records from a file without loading the whole file.
+
+    Args:
+        path (str): The file path to a JSON file that contains an array of records,
+            or to an NDJSON file that contains one record on each line.
+        read_size (int): The number of bytes to read from the file at a time when
+            it contains a JSON array.
+
+    Yields:
+        dict: Each record in the file, in order.
+    """
+    with open(path, "rb") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == b"[":
+            yield from ijson.items(f, "item", buf_size=read_size, use_float=True)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class BatchStats:
+    """
+    Counts the records that put_record_batch delivered and dropped.
+
+    Attributes:
+        delivered (int): Records that Firehose accepted.
+        dropped (int): Records that were too large, or that still failed after
+            the maximum number of attempts.
+        retried (int): Times that a failed record was sent again.
+        batches (int): PutRecordBatch calls.
+        delivered_bytes (int): Size of the records that Firehose accepted.
+        elapsed (float): Seconds that put_record_batch took.
+    """
+
+    delivered: int = 0
+    dropped: int = 0
+    retried: int = 0
+    batches: int = 0
+    delivered_bytes: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.delivered / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return (
+            self.delivered_bytes / (1024 * 1024) / self.elapsed if self.elapsed else 0.0
+        )
+
+
 # snippet-start:[python.example_code.firehose.init]
 class FirehoseClient:
     """
@@ -85,30 +159,119 @@ class FirehoseClient:
     # snippet-end:[python.example_code.firehose.put_record]
 
     # snippet-start:[python.example_code.firehose.put_record_batch]
-    @backoff.on_exception(
-        backoff.expo, Exception, max_tries=5, jitter=backoff.full_jitter
-    )
-    def put_record_batch(self, data: list, batch_size: int = 500):
+    def put_record_batch(
+        self,
+        data: Iterable[dict],
+        batch_size: int = MAX_BATCH_RECORDS,
+        batch_bytes: int = MAX_BATCH_BYTES,
+    ) -> BatchStats:
         """
-        Put records in batches to Firehose with backoff and retry.
+        Put records in batches to Firehose, resending only the records that fail.
 
         Args:
-            data (list): List of data records to be sent to Firehose.
-            batch_size (int): Number of records to send in each batch. Default is 500.
+            data (Iterable[dict]): Data records to be sent to Firehose. Records are
+                read from the iterable as they are needed.
+            batch_size (int): Maximum number of records in each batch. Default is 500.
+            batch_bytes (int): Maximum size of each batch. Default is 4 MiB.
 
-        This method attempts to send records in batches to the Firehose delivery stream.
-        It retries with exponential backoff in case of exceptions.
+        Returns:
+            BatchStats: Counts of the records that were delivered and dropped.
+
+        Each record is serialized once. Batches are filled up to the record and byte
+        limits of PutRecordBatch. When Firehose reports an ErrorCode for a record, or
+        the whole call fails, each failed record waits for its own backoff with
+        jitter, then joins a later batch. A record that fails MAX_ENTRY_ATTEMPTS
+        times, or that is larger than the 1,000 KiB record limit, is dropped.
+        """
+        stats = BatchStats()
+        start = time.perf_counter()
+        records = iter(data)
+        # Failed records, ordered by when they can be sent again.
+        retries = []
+        order = itertools.count()
+        next_entry = None
+        exhausted = False
+        while not exhausted or retries or next_entry is not None:
+            batch, size = [], 0
+            now = time.monotonic()
+            while retries and retries[0][0] <= now and len(batch) < batch_size:
+                _, _, entry, attempts = retries[0]
+                if batch and size + len(entry["Data"]) > batch_bytes:
+                    break
+                heapq.heappop(retries)
+                batch.append((entry, attempts))
+                size += len(entry["Data"])
+            while len(batch) < batch_size:
+                if next_entry is None:
+                    try:
+                        record = next(records)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    encoded = json.dumps(record).encode()
+                    if len(encoded) > MAX_RECORD_BYTES:
+                        logger.info(
+                            f"Dropped record of {len(encoded)} bytes, which is larger "
+                            f"than the record limit."
+                        )
+                        stats.dropped += 1
+                        continue
+                    next_entry = {"Data": encoded}
+                if batch and size + len(next_entry["Data"]) > batch_bytes:
+                    break
+                batch.append((next_entry, 0))
+                size += len(next_entry["Data"])
+                next_entry = None
+            if batch:
+                self._send_batch(batch, stats, retries, order)
+            elif retries:
+                time.sleep(max(retries[0][0] - time.monotonic(), 0))
+        stats.elapsed = time.perf_counter() - start
+        logger.info(
+            f"Delivered {stats.delivered} records and dropped {stats.dropped} in "
+            f"{stats.batches} batches with {stats.retried} retries, "
+            f"{stats.records_per_second:.0f} records/s "
+            f"({stats.megabytes_per_second:.2f} MB/s)."
+        )
+        return stats
+
+    def _send_batch(self, batch: list, stats: BatchStats, retries: list, order):
+        """
+        Send a batch of records and schedule the records that fail to be sent again.
+
+        Args:
+            batch (list): The records to send, as (entry, attempts) pairs.
+            stats (BatchStats): The counts to update.
+            retries (list): The heap of failed records that wait to be sent again.
+            order (itertools.count): Breaks ties between records in the heap.
         """
-        for i in range(0, len(data), batch_size):
-            batch = data[i : i + batch_size]
-            record_dicts = [{"Data": json.dumps(record)} for record in batch]
-            try:
-                response = self.firehose.put_record_batch(
-                    DeliveryStreamName=self.delivery_stream_name, Records=record_dicts
+        entries = [entry for entry, _ in batch]
+        try:
+            response = self.firehose.put_record_batch(
+                DeliveryStreamName=self.delivery_stream_name, Records=entries
+            )
+            self._log_batch_response(response, len(batch))
+            results = response["RequestResponses"]
+        except (ClientError, BotoCoreError) as e:
+            logger.info(f"Failed to send batch of {len(batch)} records. Error: {e}")
+            results = [{"ErrorCode": type(e).__name__}] * len(batch)
+        stats.batches += 1
+        now = time.monotonic()
+        for (entry, attempts), result in zip(batch, results):
+            if "ErrorCode" not in result:
+                stats.delivered += 1
+                stats.delivered_bytes += len(entry["Data"])
+                continue
+            attempts += 1
+            if attempts >= MAX_ENTRY_ATTEMPTS:
+                logger.info(
+                    f"Dropped record after {attempts} attempts: {result['ErrorCode']}."
                 )
-                self._log_batch_response(response, len(batch))
-            except Exception as e:
-                logger.info(f"Failed to send batch of {len(batch)} records. Error: {e}")
+                stats.dropped += 1
+            else:
+                stats.retried += 1
+                delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempts))
+                heapq.heappush(retries, (now + delay, next(order), entry, attempts))
 
     # snippet-end:[python.example_code.firehose.put_record_batch]
 
@@ -235,20 +398,18 @@ class FirehoseClient:
 
 if __name__ == "__main__":
     config = get_config()
-    data = load_sample_data(config.sample_data_file)
+    data = iter_sample_data(config.sample_data_file)
     client = FirehoseClient(config)
 
     # Process the first 100 sample network records
-    for record in data[:100]:
+    for record in itertools.islice(data, 100):
         try:
             client.put_record(record)
         except Exception as e:
             logger.info(f"Put record failed after retries and backoff: {e}")
     client.monitor_metrics()
 
-    # Process remaining records using the batch method
-    try:
-        client.put_record_batch(data[100:])
-    except Exception as e:
-        logger.info(f"Put record batch failed after retries and backoff: {e}")
+    # Stream the remaining records into the batch method
+    stats = client.put_record_batch(data)
+    logger.info(f"Batch results: {stats}")
     client.monitor_metrics()
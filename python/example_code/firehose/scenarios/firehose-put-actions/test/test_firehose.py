@@ -4,12 +4,14 @@ import sys
 from unittest import mock
 
 import boto3
+import ijson
 import pytest
-from botocore.exceptions import NoCredentialsError
+from botocore.exceptions import ClientError, NoCredentialsError
 from moto import mock_cloudwatch, mock_firehose
 
 sys.path.append("../../firehose-put-actions")
-from firehose import FirehoseClient, load_sample_data
+import firehose
+from firehose import FirehoseClient, iter_sample_data, load_sample_data
 
 
 # Sample configuration mock
@@ -53,6 +55,33 @@ def test_load_sample_data(mock_open):
     assert loaded_data == {"key": "value"}
 
 
+@pytest.mark.parametrize(
+    "content",
+    [
+        '[\n  {"key": 0},\n  {"key": "a,]"},\n  {"key": [2]}\n]\n',
+        '{"key": 0}\n{"key": "a,]"}\n\n{"key": [2]}\n',
+    ],
+)
+def test_iter_sample_data(tmp_path, content):
+    path = tmp_path / "records.json"
+    path.write_text(content)
+
+    records = iter_sample_data(path, read_size=3)
+
+    assert list(records) == [{"key": 0}, {"key": "a,]"}, {"key": [2]}]
+
+
+@pytest.mark.parametrize(
+    "content", ['[{"key": 0} {"key": 1}]', '[,,{"key": 0}]', '[{"key": 0},']
+)
+def test_iter_sample_data_malformed(tmp_path, content):
+    path = tmp_path / "records.json"
+    path.write_text(content)
+
+    with pytest.raises(ijson.JSONError):
+        list(iter_sample_data(path))
+
+
 def test_put_record(firehose_client):
     record = {"key": "value"}
     try:
@@ -69,6 +98,83 @@ def test_put_record_batch(firehose_client):
         assert "Firehose PutRecord(Batch to S3 destination failed" in str(e)
 
 
+@pytest.fixture
+def stubbed_firehose_client(mock_config, monkeypatch):
+    monkeypatch.setattr(firehose.time, "sleep", lambda _: None)
+    monkeypatch.setattr(firehose, "BACKOFF_BASE", 0)
+    with mock.patch("boto3.client"):
+        yield FirehoseClient(mock_config)
+
+
+def batch_response(error_indexes, size):
+    return {
+        "FailedPutCount": len(error_indexes),
+        "RequestResponses": [
+            (
+                {"ErrorCode": "ServiceUnavailableException"}
+                if index in error_indexes
+                else {"RecordId": f"record-{index}"}
+            )
+            for index in range(size)
+        ],
+    }
+
+
+def sent_records(mock_put):
+    return [
+        [entry["Data"] for entry in call.kwargs["Records"]]
+        for call in mock_put.call_args_list
+    ]
+
+
+def test_put_record_batch_resends_failed(stubbed_firehose_client):
+    records = [{"key": index} for index in range(3)]
+    mock_put = stubbed_firehose_client.firehose.put_record_batch
+    mock_put.side_effect = [batch_response({0, 2}, 3), batch_response(set(), 2)]
+
+    stats = stubbed_firehose_client.put_record_batch(iter(records))
+
+    assert sent_records(mock_put) == [
+        [b'{"key": 0}', b'{"key": 1}', b'{"key": 2}'],
+        [b'{"key": 0}', b'{"key": 2}'],
+    ]
+    assert (stats.delivered, stats.dropped, stats.retried) == (3, 0, 2)
+
+
+@pytest.mark.parametrize(
+    "batch_bytes,batch_sizes",
+    [(firehose.MAX_BATCH_BYTES, [500, 500, 200]), (300 * 1024, [300, 300, 300, 300])],
+)
+def test_put_record_batch_limits(stubbed_firehose_client, batch_bytes, batch_sizes):
+    # Each record is 1 KiB when it is serialized.
+    records = [{"pad": "x" * 1013} for _ in range(1200)]
+    mock_put = stubbed_firehose_client.firehose.put_record_batch
+    mock_put.side_effect = lambda **kwargs: batch_response(
+        set(), len(kwargs["Records"])
+    )
+
+    stats = stubbed_firehose_client.put_record_batch(records, batch_bytes=batch_bytes)
+
+    assert [len(batch) for batch in sent_records(mock_put)] == batch_sizes
+    assert stats.delivered == len(records)
+    assert stats.delivered_bytes == len(records) * 1024
+
+
+def test_put_record_batch_drops(stubbed_firehose_client, monkeypatch):
+    monkeypatch.setattr(firehose, "MAX_ENTRY_ATTEMPTS", 2)
+    records = [{"key": "x" * firehose.MAX_RECORD_BYTES}, {"key": 1}]
+    mock_put = stubbed_firehose_client.firehose.put_record_batch
+    mock_put.side_effect = [
+        ClientError({"Error": {"Code": "ServiceUnavailableException"}}, "Put"),
+        batch_response({0}, 1),
+    ]
+
+    stats = stubbed_firehose_client.put_record_batch(records)
+
+    assert sent_records(mock_put) == [[b'{"key": 1}'], [b'{"key": 1}']]
+    assert (stats.delivered, stats.dropped, stats.batches) == (0, 2, 2)
+
+
 def test_monitor_metrics(firehose_client):
     firehose_client.monitor_metrics()
 
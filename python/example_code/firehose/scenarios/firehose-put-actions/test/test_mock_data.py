@@ -0,0 +1,69 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+import io
+import json
+import random
+import sys
+
+import pytest
+
+sys.path.append("../../../../../workflows/firehose/resources")
+import mock_data
+from mock_data import generate_records, make_ip_pool, write_records
+
+
+def values(records):
+    return [(record["ip_address"], record["alert_level"]) for record in records]
+
+
+@pytest.mark.parametrize("faker", [True, False])
+def test_generate_records_seeded(monkeypatch, faker):
+    if faker:
+        pytest.importorskip("faker")
+    else:
+        monkeypatch.setattr(mock_data, "Faker", None)
+    count = mock_data.BATCH_SIZE + 10
+
+    first = list(generate_records(count, seed=7, ip_pool_size=100))
+    second = list(generate_records(count, seed=7, ip_pool_size=100))
+    other = list(generate_records(count, seed=8, ip_pool_size=100))
+
+    assert len(first) == count
+    assert values(first) == values(second)
+    assert values(first) != values(other)
+    assert {record["alert_level"] for record in first} <= set(mock_data.ALERT_LEVELS)
+    assert len({record["ip_address"] for record in first}) <= 100
+
+
+def test_make_ip_pool(monkeypatch):
+    monkeypatch.setattr(mock_data, "Faker", None)
+
+    pool = make_ip_pool(50, random.Random(1))
+
+    assert len(pool) == 50
+    for ip_address in pool:
+        octets = [int(octet) for octet in ip_address.split(".")]
+        assert len(octets) == 4
+        assert 1 <= octets[0] <= 223 and 1 <= octets[3] <= 254
+
+
+@pytest.mark.parametrize("output_format", ["json", "ndjson"])
+def test_write_records(output_format):
+    records = list(generate_records(5, seed=1))
+    output_file = io.StringIO()
+
+    write_records(iter(records), output_file, output_format)
+
+    text = output_file.getvalue()
+    if output_format == "json":
+        assert json.loads(text) == records
+    else:
+        assert [json.loads(line) for line in text.splitlines()] == records
+
+
+def test_write_records_empty():
+    output_file = io.StringIO()
+
+    write_records(iter([]), output_file, "json")
+
+    assert json.loads(output_file.getvalue()) == []
@@ -0,0 +1,142 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures how many records per second can be put in a stream with one put_record
+call for each record, with a BatchProducer, and with a BatchProducer that aggregates
+records.
+
+The benchmark uses a stand-in client that adds a fixed latency to each call plus
+time for the data it sends, and fails a fraction of the records in each
+put_records call as if they were throttled. It calls no AWS services. Run it from
+this folder:
+
+    python benchmark_producer.py
+"""
+
+import argparse
+import logging
+import random
+import time
+
+from streams import batch_producer
+from streams.batch_producer import BatchProducer
+from streams.kinesis_stream import KinesisStream
+
+
+class StandInKinesisClient:
+    """Accepts records after a fixed latency and fails some of them."""
+
+    def __init__(self, latency, seconds_per_mb, failure_rate):
+        """
+        :param latency: The fixed latency of each call, in seconds.
+        :param seconds_per_mb: The time it takes to send 1 MB of records, in seconds.
+        :param failure_rate: The fraction of records in a put_records call that fail.
+        """
+        self.latency = latency
+        self.seconds_per_mb = seconds_per_mb
+        self.failure_rate = failure_rate
+        self.rand = random.Random(0)
+
+    def get_waiter(self, name):
+        return None
+
+    def _wait(self, size):
+        time.sleep(self.latency + size / 1024 / 1024 * self.seconds_per_mb)
+
+    def put_record(self, StreamName, Data, PartitionKey):
+        self._wait(len(Data) + len(PartitionKey))
+        return {"ShardId": "shardId-000000000000", "SequenceNumber": "1"}
+
+    def put_records(self, StreamName, Records):
+        self._wait(sum(len(rec["Data"]) + len(rec["PartitionKey"]) for rec in Records))
+        results = [
+            (
+                {"ErrorCode": "ProvisionedThroughputExceededException"}
+                if self.rand.random() < self.failure_rate
+                else {"ShardId": "shardId-000000000000", "SequenceNumber": "1"}
+            )
+            for _ in Records
+        ]
+        return {
+            "FailedRecordCount": sum("ErrorCode" in result for result in results),
+            "Records": results,
+        }
+
+
+def make_event(index):
+    return {"event_id": index, "user": f"user-{index % 1000}", "value": index * 0.5}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument(
+        "--single-records",
+        type=int,
+        default=500,
+        help="The number of records to put one at a time, which is much slower.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.01,
+        help="The fixed latency of each call, in seconds.",
+    )
+    parser.add_argument(
+        "--seconds-per-mb",
+        type=float,
+        default=0.05,
+        help="The time it takes to send 1 MB of records, in seconds.",
+    )
+    parser.add_argument(
+        "--failure-rate",
+        type=float,
+        default=0.01,
+        help="The fraction of records in each put_records call that fail.",
+    )
+    args = parser.parse_args()
+    # Putting records logs a line for every call, which is not what is measured here.
+    logging.getLogger().setLevel(logging.WARNING)
+    # Keep retries of failed records from dominating the measurement.
+    batch_producer.BACKOFF_BASE = 0.001
+
+    def make_client():
+        return StandInKinesisClient(
+            args.latency, args.seconds_per_mb, args.failure_rate
+        )
+
+    def put_one_at_a_time():
+        stream = KinesisStream(make_client())
+        stream.name = "bench-stream"
+        for index in range(args.single_records):
+            stream.put_record(make_event(index), f"user-{index % 1000}")
+        return args.single_records, args.single_records
+
+    def put_batched(aggregate):
+        with BatchProducer(
+            make_client(), "bench-stream", aggregate=aggregate
+        ) as producer:
+            for index in range(args.records):
+                producer.put(make_event(index), f"user-{index % 1000}")
+        assert producer.records_sent == args.records
+        return args.records, producer.put_calls
+
+    methods = {
+        "put_record": put_one_at_a_time,
+        "BatchProducer": lambda: put_batched(False),
+        "BatchProducer, aggregated": lambda: put_batched(True),
+    }
+    print(f"{'Method':<28}{'Records':>10}{'Calls':>8}{'Seconds':>10}{'Records/s':>12}")
+    for name, method in methods.items():
+        start = time.perf_counter()
+        records, calls = method()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<28}{records:>10}{calls:>8}{elapsed:>10.3f}"
+            f"{records / elapsed:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
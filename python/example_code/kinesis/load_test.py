@@ -0,0 +1,106 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Puts records from one of the dg_* data generators in a stream at a target rate, to
+load test an application that reads the stream. Achieved throughput and throttled
+records are logged as the load runs. Run it from this folder, for example:
+
+    python load_test.py hotspots --stream-name ExampleInputStream \\
+        --records-per-second 5000 --duration 60
+
+With --stand-in, records are put with the stand-in client from benchmark_producer.py
+instead of a Kinesis client, so no AWS services are called.
+"""
+
+import argparse
+import importlib
+import logging
+
+import boto3
+
+from benchmark_producer import StandInKinesisClient
+from streams.load_generator import DEFAULT_MAX_SENDERS, LoadGenerator
+
+GENERATORS = [
+    "anomaly",
+    "anomalyex",
+    "columnlog",
+    "hotspots",
+    "referrer",
+    "regexlog",
+    "stagger",
+    "stockticker",
+    "tworecordtypes",
+    "weblog",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("generator", choices=GENERATORS)
+    parser.add_argument(
+        "--stream-name",
+        help="The stream to put records in. Defaults to the generator's stream.",
+    )
+    parser.add_argument(
+        "--records-per-second",
+        type=float,
+        help="The target number of records put each second.",
+    )
+    parser.add_argument(
+        "--mb-per-second",
+        type=float,
+        help="The target number of megabytes put each second.",
+    )
+    parser.add_argument(
+        "--senders",
+        type=int,
+        default=DEFAULT_MAX_SENDERS,
+        help="The number of put_records calls that can run at once.",
+    )
+    parser.add_argument("--duration", type=float, help="The number of seconds to run.")
+    parser.add_argument("--records", type=int, help="The number of records to put.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=5.0,
+        help="The number of seconds between throughput reports.",
+    )
+    parser.add_argument(
+        "--stand-in",
+        action="store_true",
+        help="Put records with a local stand-in client instead of Kinesis.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    module = importlib.import_module(f"streams.dg_{args.generator}")
+    stream_name = args.stream_name or module.STREAM_NAME
+    if args.stand_in:
+        kinesis_client = StandInKinesisClient(
+            latency=0.01, seconds_per_mb=0.05, failure_rate=0.01
+        )
+    else:
+        kinesis_client = boto3.client("kinesis")
+
+    load_generator = LoadGenerator(
+        kinesis_client,
+        stream_name,
+        records_per_second=args.records_per_second,
+        mb_per_second=args.mb_per_second,
+        max_senders=args.senders,
+        report_interval=args.report_interval,
+    )
+    load_generator.run(
+        module.generate_batches(batch_size=args.batch_size),
+        duration=args.duration,
+        max_records=args.records,
+    )
+
+
+if __name__ == "__main__":
+    main()
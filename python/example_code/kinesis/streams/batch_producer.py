@@ -0,0 +1,507 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Shows how to use the AWS SDK for Python (Boto3) with Amazon Kinesis to put records
+in a stream in batches. Records are buffered and sent from a background thread in
+put_records calls, instead of one put_record call for each record. Many small
+records can also be packed into a single Kinesis record in the aggregated record
+format of the Kinesis Producer Library (KPL), which the Kinesis Client Library
+(KCL) and the deaggregate function unpack.
+"""
+
+from collections import deque
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+# The limits of a put_records call and of a single Kinesis record. The size of a
+# record includes the size of its partition key.
+MAX_BATCH_RECORDS = 500
+MAX_BATCH_BYTES = 5 * 1024 * 1024
+MAX_RECORD_BYTES = 1024 * 1024
+MAX_PUT_ATTEMPTS = 5
+BACKOFF_BASE = 0.1
+BACKOFF_CAP = 2.0
+THROTTLE_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+}
+
+# Aggregated records start with these bytes and end with the MD5 digest of the
+# protobuf message between them.
+KPL_MAGIC = b"\xf3\x89\x9a\xc2"
+KPL_DIGEST_SIZE = 16
+
+
+def _varint(value):
+    """Encodes an unsigned integer as a protobuf varint."""
+    encoded = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            encoded.append(bits | 0x80)
+        else:
+            encoded.append(bits)
+            return bytes(encoded)
+
+
+def _length_delimited(field_number, value):
+    """Encodes a bytes field of a protobuf message."""
+    return _varint(field_number << 3 | 2) + _varint(len(value)) + value
+
+
+def _read_varint(data, position):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, position
+
+
+def _read_fields(data):
+    """
+    Decodes the varint and bytes fields of a protobuf message.
+
+    :return: A generator of (field number, value) pairs.
+    """
+    position = 0
+    while position < len(data):
+        key, position = _read_varint(data, position)
+        field_number, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, position = _read_varint(data, position)
+        elif wire_type == 2:
+            length, position = _read_varint(data, position)
+            value = data[position : position + length]
+            position += length
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}.")
+        yield field_number, value
+
+
+def deaggregate(data, partition_key):
+    """
+    Unpacks the user records in a Kinesis record. A record that is not in the
+    aggregated format holds a single user record.
+
+    :param data: The data of the Kinesis record.
+    :param partition_key: The partition key of the Kinesis record.
+    :return: The user records, as a list of (data, partition key) pairs.
+    """
+    if not data.startswith(KPL_MAGIC) or len(data) < len(KPL_MAGIC) + KPL_DIGEST_SIZE:
+        return [(data, partition_key)]
+    message = data[len(KPL_MAGIC) : -KPL_DIGEST_SIZE]
+    if hashlib.md5(message).digest() != data[-KPL_DIGEST_SIZE:]:
+        return [(data, partition_key)]
+    partition_keys, records = [], []
+    for field_number, value in _read_fields(message):
+        if field_number == 1:
+            partition_keys.append(value.decode())
+        elif field_number == 3:
+            fields = dict(_read_fields(value))
+            records.append((fields[3], fields[1]))
+    return [(record, partition_keys[index]) for record, index in records]
+
+
+class RecordAggregator:
+    """
+    Packs user records into aggregated records of up to 1 MiB. The aggregated
+    record takes the partition key of its first user record, so all of its user
+    records are written to the same shard.
+    """
+
+    def __init__(self, max_bytes=MAX_RECORD_BYTES):
+        """
+        :param max_bytes: The maximum size of an aggregated record, including its
+                          partition key.
+        """
+        self.max_bytes = max_bytes
+        self._clear()
+
+    def _clear(self):
+        self._key_indexes = {}
+        self._key_fields = []
+        self._record_fields = []
+        self._message_bytes = 0
+        self.record_count = 0
+
+    def size(self):
+        """
+        :return: The size of the aggregated record as a Kinesis record.
+        """
+        partition_key = next(iter(self._key_indexes), "")
+        return (
+            len(KPL_MAGIC)
+            + self._message_bytes
+            + KPL_DIGEST_SIZE
+            + len(partition_key.encode())
+        )
+
+    def fits(self, data, partition_key):
+        """
+        :return: True when an aggregated record that holds only this user record is
+                 no larger than the maximum size.
+        """
+        key_field = _length_delimited(1, partition_key.encode())
+        record = _varint(1 << 3) + _varint(0) + _length_delimited(3, data)
+        size = (
+            len(KPL_MAGIC)
+            + len(key_field)
+            + len(_length_delimited(3, record))
+            + KPL_DIGEST_SIZE
+            + len(partition_key.encode())
+        )
+        return size <= self.max_bytes
+
+    def add(self, data, partition_key):
+        """
+        Adds a user record. When the user record does not fit, the aggregated record
+        is completed and the user record starts a new one.
+
+        :param data: The data of the user record, as bytes.
+        :param partition_key: The partition key of the user record.
+        :return: The completed aggregated record, or None.
+        """
+        completed = None
+        added_bytes, key_field, record_field = self._fields(data, partition_key)
+        if self.record_count and self.size() + added_bytes > self.max_bytes:
+            completed = self.flush()
+            added_bytes, key_field, record_field = self._fields(data, partition_key)
+        if key_field is not None:
+            self._key_indexes[partition_key] = len(self._key_fields)
+            self._key_fields.append(key_field)
+        self._record_fields.append(record_field)
+        self._message_bytes += added_bytes
+        self.record_count += 1
+        return completed
+
+    def _fields(self, data, partition_key):
+        key_field = None
+        index = self._key_indexes.get(partition_key)
+        if index is None:
+            index = len(self._key_fields)
+            key_field = _length_delimited(1, partition_key.encode())
+        record = _varint(1 << 3) + _varint(index) + _length_delimited(3, data)
+        record_field = _length_delimited(3, record)
+        added_bytes = len(record_field) + (len(key_field) if key_field else 0)
+        return added_bytes, key_field, record_field
+
+    def flush(self):
+        """
+        Completes the aggregated record and starts a new one.
+
+        :return: The aggregated record as a (data, partition key, record count)
+                 tuple, or None when no user records were added.
+        """
+        if not self.record_count:
+            return None
+        message = b"".join(self._key_fields + self._record_fields)
+        data = KPL_MAGIC + message + hashlib.md5(message).digest()
+        completed = (data, next(iter(self._key_indexes)), self.record_count)
+        self._clear()
+        return completed
+
+
+def put_records_with_retries(
+    kinesis_client, stream_name, entries, make_record=None, on_response=None
+):
+    """
+    Puts records in a stream with put_records. Records that fail, or all of the
+    records when the call fails, are sent again after a random backoff that grows
+    with each attempt.
+
+    :param kinesis_client: A Boto3 Kinesis client.
+    :param stream_name: The name of the stream.
+    :param entries: The entries to put.
+    :param make_record: Makes the put_records record of an entry. When None, each
+                        entry is a record.
+    :param on_response: Called after each put_records call with the entries that
+                        were sent, the result of each record, and the error. The
+                        results are None when the call fails, and the error is None
+                        when it succeeds.
+    :return: The entries that still failed after the maximum number of attempts.
+    """
+    for attempt in range(MAX_PUT_ATTEMPTS):
+        if attempt > 0:
+            time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt)))
+        try:
+            response = kinesis_client.put_records(
+                StreamName=stream_name,
+                Records=[
+                    entry if make_record is None else make_record(entry)
+                    for entry in entries
+                ],
+            )
+        except (ClientError, BotoCoreError) as err:
+            if on_response is not None:
+                on_response(entries, None, err)
+            if (
+                isinstance(err, ClientError)
+                and err.response["Error"]["Code"] in THROTTLE_ERROR_CODES
+            ):
+                logger.info("Puts to stream %s are throttled.", stream_name)
+            else:
+                logger.exception(
+                    "Couldn't put %s records in stream %s.", len(entries), stream_name
+                )
+            continue
+        if on_response is not None:
+            on_response(entries, response["Records"], None)
+        failed = [
+            entry
+            for entry, result in zip(entries, response["Records"])
+            if "ErrorCode" in result
+        ]
+        if not failed:
+            return []
+        logger.info(
+            "%s of %s records failed on attempt %s.",
+            len(failed),
+            len(entries),
+            attempt + 1,
+        )
+        entries = failed
+    logger.error(
+        "Couldn't put %s records in stream %s after %s attempts.",
+        len(entries),
+        stream_name,
+        MAX_PUT_ATTEMPTS,
+    )
+    return entries
+
+
+class BatchProducer:
+    """
+    Buffers records and puts them in a stream in batches from a background thread.
+    A batch is sent when it reaches 500 records or 5 MiB, or when its oldest record
+    has waited for the linger time. Records that put_records reports as failed,
+    such as records that are throttled, are sent again, and records that still fail
+    after several attempts are kept in `failed_records`.
+
+    Use the producer as a context manager, or call close when you are done, so that
+    buffered records are sent.
+    """
+
+    def __init__(
+        self,
+        kinesis_client,
+        stream_name,
+        linger=0.1,
+        aggregate=False,
+        max_buffered_records=10 * MAX_BATCH_RECORDS,
+    ):
+        """
+        :param kinesis_client: A Boto3 Kinesis client.
+        :param stream_name: The name of the stream.
+        :param linger: The maximum number of seconds that a record waits in the
+                       buffer before it is sent.
+        :param aggregate: When True, user records are packed into aggregated records.
+        :param max_buffered_records: The maximum number of Kinesis records that are
+                                     buffered. Putting more records waits until
+                                     some are sent.
+        """
+        self.kinesis_client = kinesis_client
+        self.stream_name = stream_name
+        self.linger = linger
+        self.max_buffered_records = max_buffered_records
+        self.aggregator = RecordAggregator() if aggregate else None
+        self.records_sent = 0
+        self.put_calls = 0
+        self.failed_records = []
+        self._entries = deque()
+        self._buffered_bytes = 0
+        self._oldest = None
+        self._flush_requested = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._sender = threading.Thread(target=self._run, daemon=True)
+        self._sender.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def put(self, data, partition_key):
+        """
+        Buffers a record to put in the stream. The data is formatted as JSON before it
+        is put in the stream.
+
+        :param data: The data to put in the stream.
+        :param partition_key: The partition key to use for the data.
+        """
+        encoded = json.dumps(data).encode()
+        if len(encoded) + len(partition_key.encode()) > MAX_RECORD_BYTES:
+            raise ValueError("The record is larger than the maximum record size.")
+        with self._condition:
+            while len(self._entries) >= self.max_buffered_records and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                raise RuntimeError("The producer is closed.")
+            if self.aggregator is None:
+                self._append(encoded, partition_key, 1)
+            elif not self.aggregator.fits(encoded, partition_key):
+                # A record that is too large to aggregate is sent as it is, after
+                # the records that were put before it.
+                completed = self.aggregator.flush()
+                if completed is not None:
+                    self._append(*completed)
+                self._append(encoded, partition_key, 1)
+            else:
+                completed = self.aggregator.add(encoded, partition_key)
+                if completed is not None:
+                    self._append(*completed)
+            # Wake the sender to start the linger time of the first record, or to
+            # send a full batch.
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+                self._condition.notify_all()
+            elif (
+                len(self._entries) >= MAX_BATCH_RECORDS
+                or self._buffered_bytes >= MAX_BATCH_BYTES
+            ):
+                self._condition.notify_all()
+
+    def flush(self):
+        """
+        Sends all buffered records and waits until they are sent.
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._flush_requested:
+                self._condition.wait()
+
+    def close(self):
+        """
+        Sends all buffered records and stops the background thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._sender.join()
+        logger.info(
+            "Put %s records in stream %s with %s put_records calls, %s failed.",
+            self.records_sent,
+            self.stream_name,
+            self.put_calls,
+            len(self.failed_records),
+        )
+
+    def _append(self, data, partition_key, record_count):
+        size = len(data) + len(partition_key.encode())
+        self._entries.append((data, partition_key, record_count, size))
+        self._buffered_bytes += size
+
+    def _take_batch(self, force):
+        """
+        Takes a batch of records from the buffer when a full batch is buffered or when
+        force is True. Must be called while holding the condition.
+        """
+        if self.aggregator is not None and force:
+            completed = self.aggregator.flush()
+            if completed is not None:
+                self._append(*completed)
+        if not force and (
+            len(self._entries) < MAX_BATCH_RECORDS
+            and self._buffered_bytes < MAX_BATCH_BYTES
+        ):
+            return []
+        batch, batch_bytes = [], 0
+        while (
+            self._entries
+            and len(batch) < MAX_BATCH_RECORDS
+            and batch_bytes + self._entries[0][3] <= MAX_BATCH_BYTES
+        ):
+            entry = self._entries.popleft()
+            batch.append(entry)
+            batch_bytes += entry[3]
+        self._buffered_bytes -= batch_bytes
+        return batch
+
+    def _run(self):
+        """
+        Sends batches of records until the producer is closed. This function runs in
+        the background thread.
+        """
+        with self._condition:
+            while True:
+                force = (
+                    self._closed
+                    or self._flush_requested
+                    or (
+                        self._oldest is not None
+                        and time.monotonic() - self._oldest >= self.linger
+                    )
+                )
+                batch = self._take_batch(force)
+                if batch:
+                    # Wake callers that wait for room in the buffer, and let them
+                    # put more records while the batch is sent.
+                    self._condition.notify_all()
+                    self._condition.release()
+                    try:
+                        self._send(batch)
+                    except Exception:
+                        # Keep the batch instead of stopping the sender, so that
+                        # flush and close still return.
+                        logger.exception(
+                            "Couldn't send %s records to stream %s.",
+                            len(batch),
+                            self.stream_name,
+                        )
+                        self.failed_records += batch
+                    finally:
+                        self._condition.acquire()
+                    continue
+                pending = self.aggregator is not None and self.aggregator.record_count
+                if not self._entries and not pending:
+                    self._oldest = None
+                    self._flush_requested = False
+                    self._condition.notify_all()
+                    if self._closed:
+                        return
+                timeout = None
+                if self._oldest is not None:
+                    timeout = max(self.linger - (time.monotonic() - self._oldest), 0)
+                self._condition.wait(timeout)
+
+    def _send(self, batch):
+        """
+        Puts a batch of records in the stream. Records that still fail after several
+        attempts are kept in failed_records.
+        """
+        self.failed_records += put_records_with_retries(
+            self.kinesis_client,
+            self.stream_name,
+            batch,
+            make_record=lambda entry: {"Data": entry[0], "PartitionKey": entry[1]},
+            on_response=self._count,
+        )
+
+    def _count(self, batch, results, error):
+        """
+        Counts a put_records call and the user records that it sent.
+        """
+        self.put_calls += 1
+        if results is not None:
+            self.records_sent += sum(
+                entry[2]
+                for entry, result in zip(batch, results)
+                if "ErrorCode" not in result
+            )
@@ -0,0 +1,82 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Stores the position that a consumer has reached in each shard of an Amazon Kinesis
+stream, so that a consumer that is stopped and started again continues where it
+left off instead of reading from the tip of the stream.
+
+A checkpoint store is any object with `get` and `put` methods that behave like the
+ones defined here, so checkpoints can be kept in memory, in a local file, or in a
+database such as Amazon DynamoDB.
+"""
+
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# The checkpoint of a shard that is closed and has been read to its end.
+SHARD_END = "SHARD_END"
+
+
+class MemoryCheckpointStore:
+    """Keeps checkpoints in memory for the life of the process."""
+
+    def __init__(self):
+        self._checkpoints = {}
+
+    def get(self, shard_id):
+        """
+        Gets the checkpoint of a shard.
+
+        :param shard_id: The ID of the shard.
+        :return: The sequence number of the last record that was processed, SHARD_END
+                 when the shard has been read to its end, or None when the shard has
+                 no checkpoint.
+        """
+        return self._checkpoints.get(shard_id)
+
+    def put(self, shard_id, checkpoint):
+        """
+        Sets the checkpoint of a shard.
+
+        :param shard_id: The ID of the shard.
+        :param checkpoint: The sequence number of the last record that was processed,
+                           or SHARD_END.
+        """
+        self._checkpoints[shard_id] = checkpoint
+
+
+class FileCheckpointStore(MemoryCheckpointStore):
+    """
+    Keeps checkpoints in a local JSON file. The file is replaced each time a
+    checkpoint is set, so a consumer that stops while it is writing leaves the
+    previous checkpoints in place.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path to the checkpoint file. Checkpoints in an existing file
+                     are loaded.
+        """
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self._checkpoints = json.load(checkpoint_file)
+            logger.info(
+                "Loaded checkpoints for %s shards from %s.",
+                len(self._checkpoints),
+                path,
+            )
+
+    def put(self, shard_id, checkpoint):
+        super().put(shard_id, checkpoint)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(self._checkpoints, checkpoint_file)
+        os.replace(temp_path, self.path)
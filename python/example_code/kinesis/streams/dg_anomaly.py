@@ -48,6 +48,25 @@ def generate(stream_name, kinesis_client, output=True):
         )
 
 
+def generate_batches(batch_size=500):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator.
+    About 1% of heart rates are high.
+    """
+    while True:
+        yield [
+            {
+                "Data": json.dumps(
+                    get_heart_rate(
+                        RateType.high if random.random() < 0.01 else RateType.normal
+                    )
+                ),
+                "PartitionKey": "partitionkey",
+            }
+            for _ in range(batch_size)
+        ]
+
+
 if __name__ == "__main__":
     generate(STREAM_NAME, boto3.client("kinesis"))
 # snippet-end:[kinesisanalytics.python.datagenerator.anomaly]
@@ -61,6 +61,24 @@ def generate(stream_name, kinesis_client):
         )
 
 
+def generate_batches(batch_size=500):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator.
+    About 0.5% of blood pressures are low and 0.5% are high.
+    """
+    pressure_types = [PressureType.low, PressureType.normal, PressureType.high]
+    while True:
+        yield [
+            {
+                "Data": json.dumps(get_blood_pressure(pressure_type)),
+                "PartitionKey": "partitionkey",
+            }
+            for pressure_type in random.choices(
+                pressure_types, weights=[0.005, 0.99, 0.005], k=batch_size
+            )
+        ]
+
+
 if __name__ == "__main__":
     generate(STREAM_NAME, boto3.client("kinesis"))
 # snippet-end:[kinesisanalytics.python.datagenerator.anomalyex]
@@ -16,6 +16,7 @@ from pprint import pprint
 import random
 import time
 import boto3
+import numpy as np
 
 STREAM_NAME = "ExampleInputStream"
 
@@ -64,6 +65,55 @@ def generate(
         time.sleep(0.1)
 
 
+def get_points(field, hotspot, hotspot_weight, count, rng):
+    """
+    Gets points as get_record does, but draws the coordinates of all of them at
+    once with NumPy.
+    """
+    is_hot = rng.random(count) < hotspot_weight
+    left = np.where(is_hot, hotspot["left"], field["left"])
+    top = np.where(is_hot, hotspot["top"], field["top"])
+    width = np.where(is_hot, hotspot["width"], field["width"])
+    height = np.where(is_hot, hotspot["height"], field["height"])
+    xs = left + rng.random(count) * width
+    ys = top + rng.random(count) * height
+    return [
+        {
+            "Data": json.dumps({"x": x, "y": y, "is_hot": "Y" if hot else "N"}),
+            "PartitionKey": "partition_key",
+        }
+        for x, y, hot in zip(xs.tolist(), ys.tolist(), is_hot.tolist())
+    ]
+
+
+def generate_batches(
+    field=None,
+    hotspot_size=1,
+    hotspot_weight=0.2,
+    batch_size=500,
+    seed=None,
+):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator. The
+    points are the same as generate makes, and the hotspot still moves every 1000
+    points. The default field is the one used when this script is run.
+    """
+    if field is None:
+        field = {"left": 0, "width": 10, "top": 0, "height": 10}
+    rng = np.random.default_rng(seed)
+    points_generated = 0
+    hotspot = None
+    while True:
+        batch = []
+        while len(batch) < batch_size:
+            if points_generated % 1000 == 0:
+                hotspot = get_hotspot(field, hotspot_size)
+            count = min(batch_size - len(batch), 1000 - points_generated % 1000)
+            batch += get_points(field, hotspot, hotspot_weight, count, rng)
+            points_generated += count
+        yield batch
+
+
 if __name__ == "__main__":
     generate(
         stream_name=STREAM_NAME,
@@ -41,6 +41,20 @@ def generate(stream_name, kinesis_client):
             time.sleep(10)
 
 
+def generate_batches(batch_size=500, repeat=6):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator. Each
+    event is repeated in the same batch instead of ten seconds apart, so events
+    arrive in bursts of records with the same event time and ticker.
+    """
+    while True:
+        batch = []
+        while len(batch) < batch_size:
+            record = {"Data": json.dumps(get_data()), "PartitionKey": "partitionkey"}
+            batch += [record] * min(repeat, batch_size - len(batch))
+        yield batch
+
+
 if __name__ == "__main__":
     generate(STREAM_NAME, boto3.client("kinesis"))
 # snippet-end:[kinesisanalytics.python.datagenerator.stagger]
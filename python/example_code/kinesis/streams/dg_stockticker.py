@@ -35,6 +35,17 @@ def generate(stream_name, kinesis_client):
         )
 
 
+def generate_batches(batch_size=500):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator.
+    """
+    while True:
+        yield [
+            {"Data": json.dumps(get_data()), "PartitionKey": "partitionkey"}
+            for _ in range(batch_size)
+        ]
+
+
 if __name__ == "__main__":
     generate(STREAM_NAME, boto3.client("kinesis"))
 # snippet-end:[kinesisanalytics.python.datagenerator.stockticker]
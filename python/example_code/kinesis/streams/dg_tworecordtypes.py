@@ -58,6 +58,29 @@ def generate(stream_name, kinesis_client):
         order_id += 1
 
 
+def generate_batches(batch_size=500):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator. Each
+    order is followed by its trades, and an order and its trades can be split
+    across batches.
+    """
+    order_id = 1
+    batch = []
+    while True:
+        ticker = random.choice(["AAAA", "BBBB", "CCCC"])
+        records = [get_order(order_id, ticker)]
+        records += [
+            get_trade(order_id, trade_id, ticker)
+            for trade_id in range(1, random.randint(0, 6))
+        ]
+        for record in records:
+            batch.append({"Data": json.dumps(record), "PartitionKey": PARTITION_KEY})
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        order_id += 1
+
+
 if __name__ == "__main__":
     generate(STREAM_NAME, boto3.client("kinesis"))
 # snippet-end:[kinesisanalytics.python.datagenerator.tworecordtypes]
@@ -33,6 +33,16 @@ def generate(stream_name, kinesis_client):
         )
 
 
+def generate_batches(batch_size=500):
+    """
+    Generates batches of records for put_records, for use with LoadGenerator. The
+    data is the same in every record, so it is formatted once.
+    """
+    record = {"Data": json.dumps(get_data()), "PartitionKey": "partitionkey"}
+    while True:
+        yield [record] * batch_size
+
+
 if __name__ == "__main__":
     generate(STREAM_NAME, boto3.client("kinesis"))
 # snippet-end:[kinesisanalytics.python.datagenerator.weblog]
@@ -10,10 +10,26 @@ manage streams.
 
 import json
 import logging
+import queue
+import threading
+import time
 from botocore.exceptions import ClientError
 
+from streams.batch_producer import BatchProducer
+from streams.checkpoints import SHARD_END, MemoryCheckpointStore
+
 logger = logging.getLogger(__name__)
 
+# GetRecords returns at most 10,000 records. Each shard serves at most five calls
+# per second, so a reader waits between calls, and waits longer when it has caught
+# up with the tip of the shard.
+MIN_RECORDS_LIMIT = 100
+MAX_RECORDS_LIMIT = 10000
+POLL_INTERVAL = 0.2
+IDLE_POLL_INTERVAL = 1.0
+THROTTLE_BACKOFF = 1.0
+SHARD_REFRESH_INTERVAL = 60
+
 
 # snippet-start:[python.example_code.kinesis.KinesisStream.class]
 class KinesisStream:
@@ -125,37 +141,273 @@ class KinesisStream:
 
     # snippet-end:[python.example_code.kinesis.PutRecord]
 
+    def batch_producer(self, linger=0.1, aggregate=False):
+        """
+        Creates a producer that buffers records and puts them in the stream in
+        batches, instead of one put_record call for each record.
+
+        :param linger: The maximum number of seconds that a record waits in the
+                       buffer before it is sent.
+        :param aggregate: When True, many small records are packed into each Kinesis
+                          record in the aggregated record format of the Kinesis
+                          Producer Library.
+        :return: A BatchProducer. Use it as a context manager so that buffered
+                 records are sent when you are done.
+        """
+        return BatchProducer(self.kinesis_client, self.name, linger, aggregate)
+
+    def _list_shards(self):
+        """
+        Lists all shards of the stream, including closed shards that were split or
+        merged and shards that were created by splitting or merging them.
+
+        :return: The list of shards.
+        """
+        shards = []
+        kwargs = {"StreamName": self.name}
+        while True:
+            response = self.kinesis_client.list_shards(**kwargs)
+            shards += response["Shards"]
+            if "NextToken" not in response:
+                return shards
+            kwargs = {"NextToken": response["NextToken"]}
+
+    @staticmethod
+    def _next_limit(limit, record_count, millis_behind):
+        """
+        Adapts the number of records to ask for to how far a reader is behind the tip
+        of its shard. A reader that is behind and gets full batches asks for more, so
+        that it catches up in fewer calls. A reader that has caught up asks for less.
+        """
+        if millis_behind > 0 and record_count >= limit:
+            return min(limit * 2, MAX_RECORDS_LIMIT)
+        if millis_behind == 0 and record_count < limit // 2:
+            return max(limit // 2, MIN_RECORDS_LIMIT)
+        return limit
+
+    def _read_shard(self, shard_id, position, batches, stop):
+        """
+        Reads records from a shard until the shard is closed and read to its end, or
+        until the reader is stopped. This function runs in its own thread.
+
+        Each batch of records is put in the batches queue as a tuple of the shard ID,
+        the records, and None. When the shard has been read to its end, the tuple has
+        None in place of the records. When reading fails, the tuple has the error in
+        place of None.
+
+        :param shard_id: The ID of the shard to read.
+        :param position: The arguments to get_shard_iterator that set where reading
+                         starts.
+        :param batches: The queue that batches of records are put in.
+        :param stop: An event that is set when the reader must stop.
+        """
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    pass
+
+        try:
+            shard_iter = self.kinesis_client.get_shard_iterator(
+                StreamName=self.name, ShardId=shard_id, **position
+            )["ShardIterator"]
+            limit = MIN_RECORDS_LIMIT
+            while shard_iter is not None and not stop.is_set():
+                try:
+                    response = self.kinesis_client.get_records(
+                        ShardIterator=shard_iter, Limit=limit
+                    )
+                except ClientError as err:
+                    code = err.response["Error"]["Code"]
+                    if code == "ProvisionedThroughputExceededException":
+                        logger.info("Reads of shard %s are throttled.", shard_id)
+                        stop.wait(THROTTLE_BACKOFF)
+                        continue
+                    if code == "ExpiredIteratorException":
+                        logger.info("Iterator of shard %s expired.", shard_id)
+                        shard_iter = self.kinesis_client.get_shard_iterator(
+                            StreamName=self.name, ShardId=shard_id, **position
+                        )["ShardIterator"]
+                        continue
+                    raise
+                shard_iter = response.get("NextShardIterator")
+                records = response["Records"]
+                millis_behind = response.get("MillisBehindLatest", 0)
+                logger.info(
+                    "Got %s records from shard %s, %s ms behind.",
+                    len(records),
+                    shard_id,
+                    millis_behind,
+                )
+                if records:
+                    position = {
+                        "ShardIteratorType": "AFTER_SEQUENCE_NUMBER",
+                        "StartingSequenceNumber": records[-1]["SequenceNumber"],
+                    }
+                    put((shard_id, records, None))
+                limit = self._next_limit(limit, len(records), millis_behind)
+                if shard_iter is not None:
+                    stop.wait(
+                        POLL_INTERVAL if millis_behind > 0 else IDLE_POLL_INTERVAL
+                    )
+            if shard_iter is None:
+                logger.info("Read shard %s to its end.", shard_id)
+                put((shard_id, None, None))
+        except Exception as err:
+            put((shard_id, None, err))
+
+    def _start_readers(
+        self, readers, followed, checkpoint_store, initial_position, batches, stop
+    ):
+        """
+        Lists the shards of the stream and starts a reader thread for each shard that
+        is ready to read. A shard that was created by resharding is ready when its
+        parent shards have been read to their end, so that records with the same
+        partition key are read in order.
+
+        A shard with no checkpoint is read from its start when one of its parents
+        is followed, so that records written to the shard between the split and the
+        start of its reader are not lost. The shard is read from the initial
+        position only when every parent was already closed, and had no checkpoint,
+        when this consumer first listed it.
+
+        :param followed: Whether each shard that has been listed is followed. A
+                         shard is followed when it is open or has a checkpoint when
+                         it is first listed.
+        :return: The number of shards that are not read to their end.
+        """
+        shards = self._list_shards()
+        shard_ids = {shard["ShardId"] for shard in shards}
+        for shard in shards:
+            if shard["ShardId"] not in followed:
+                followed[shard["ShardId"]] = (
+                    "EndingSequenceNumber" not in shard["SequenceNumberRange"]
+                    or checkpoint_store.get(shard["ShardId"]) is not None
+                )
+        finished = {
+            shard_id
+            for shard_id in shard_ids
+            if checkpoint_store.get(shard_id) == SHARD_END
+        }
+        for shard in shards:
+            shard_id = shard["ShardId"]
+            if shard_id in readers or shard_id in finished:
+                continue
+            parents = {
+                shard[key]
+                for key in ("ParentShardId", "AdjacentParentShardId")
+                if shard.get(key) in shard_ids
+            }
+            if not parents <= finished:
+                continue
+            checkpoint = checkpoint_store.get(shard_id)
+            if checkpoint is not None:
+                position = {
+                    "ShardIteratorType": "AFTER_SEQUENCE_NUMBER",
+                    "StartingSequenceNumber": checkpoint,
+                }
+            elif any(followed[parent] for parent in parents):
+                position = {"ShardIteratorType": "TRIM_HORIZON"}
+            else:
+                position = {"ShardIteratorType": initial_position}
+            readers[shard_id] = threading.Thread(
+                target=self._read_shard,
+                args=(shard_id, position, batches, stop),
+                daemon=True,
+            )
+            readers[shard_id].start()
+            logger.info("Started reading shard %s from %s.", shard_id, position)
+        return len(shard_ids - finished)
+
     # snippet-start:[python.example_code.kinesis.GetRecords]
-    def get_records(self, max_records):
+    def get_records(
+        self, max_records=None, checkpoint_store=None, initial_position="LATEST"
+    ):
         """
-        Gets records from the stream. This function is a generator that first gets
-        a shard iterator for the stream, then uses the shard iterator to get records
-        in batches from the stream. Each batch of records is yielded back to the
-        caller until the specified maximum number of records has been retrieved.
+        Gets records from the stream. This function is a generator that reads all
+        shards of the stream at the same time, each from its own thread, and yields
+        each batch of records back to the caller as it is read, until the specified
+        maximum number of records has been retrieved or all shards are closed and
+        read to their end.
 
-        :param max_records: The maximum number of records to retrieve.
+        The stream is checked for new shards from time to time and whenever a shard
+        is read to its end, so shards that are created by resharding are read too.
+
+        When the caller asks for the next batch, the last record of the previous batch
+        is stored as the checkpoint of its shard. Reading a shard that has a
+        checkpoint starts after the checkpoint.
+
+        :param max_records: The maximum number of records to retrieve. When None,
+                            records are retrieved until all shards are closed.
+        :param checkpoint_store: Stores the checkpoint of each shard, such as a
+                                 FileCheckpointStore. When None, checkpoints are
+                                 kept in memory.
+        :param initial_position: Where to start reading a shard that has no
+                                 checkpoint: LATEST or TRIM_HORIZON.
         :return: Yields the current batch of retrieved records.
         """
+        if checkpoint_store is None:
+            checkpoint_store = MemoryCheckpointStore()
+        readers = {}
+        followed = {}
+        batches = queue.Queue(maxsize=10)
+        stop = threading.Event()
         try:
-            response = self.kinesis_client.get_shard_iterator(
-                StreamName=self.name,
-                ShardId=self.details["Shards"][0]["ShardId"],
-                ShardIteratorType="LATEST",
+            open_shards = self._start_readers(
+                readers,
+                followed,
+                checkpoint_store,
+                initial_position,
+                batches,
+                stop,
             )
-            shard_iter = response["ShardIterator"]
+            refreshed_at = time.monotonic()
             record_count = 0
-            while record_count < max_records:
-                response = self.kinesis_client.get_records(
-                    ShardIterator=shard_iter, Limit=10
-                )
-                shard_iter = response["NextShardIterator"]
-                records = response["Records"]
-                logger.info("Got %s records.", len(records))
+            while open_shards > 0 and (
+                max_records is None or record_count < max_records
+            ):
+                if time.monotonic() - refreshed_at >= SHARD_REFRESH_INTERVAL:
+                    open_shards = self._start_readers(
+                        readers,
+                        followed,
+                        checkpoint_store,
+                        initial_position,
+                        batches,
+                        stop,
+                    )
+                    refreshed_at = time.monotonic()
+                try:
+                    shard_id, records, error = batches.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if error is not None:
+                    raise error
+                if records is None:
+                    checkpoint_store.put(shard_id, SHARD_END)
+                    del readers[shard_id]
+                    open_shards = self._start_readers(
+                        readers,
+                        followed,
+                        checkpoint_store,
+                        initial_position,
+                        batches,
+                        stop,
+                    )
+                    refreshed_at = time.monotonic()
+                    continue
                 record_count += len(records)
                 yield records
+                checkpoint_store.put(shard_id, records[-1]["SequenceNumber"])
         except ClientError:
             logger.exception("Couldn't get records from stream %s.", self.name)
             raise
+        finally:
+            stop.set()
+            for reader in readers.values():
+                reader.join()
 
 
 # snippet-end:[python.example_code.kinesis.GetRecords]
@@ -0,0 +1,266 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Purpose
+
+Shows how to use the AWS SDK for Python (Boto3) with the Amazon Kinesis API to put
+generated records in a stream at a target rate, for load testing applications that
+read the stream.
+
+Records are generated in batches by any of the dg_* data generators in this folder,
+held to a target number of records or megabytes per second by a token bucket, and
+put in the stream by several concurrent senders. The throughput that is achieved
+and the number of records that the stream throttles are logged as the load runs.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import logging
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from streams.batch_producer import (
+    MAX_BATCH_BYTES,
+    MAX_BATCH_RECORDS,
+    THROTTLE_ERROR_CODES,
+    put_records_with_retries,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SENDERS = 4
+DEFAULT_REPORT_INTERVAL = 5.0
+
+
+class TokenBucket:
+    """
+    Limits the rate at which tokens are taken. Tokens accumulate at a fixed rate up
+    to a burst size, and taking more tokens than are available waits until the
+    shortfall has accumulated. Taking more tokens than the burst size at once is
+    allowed, so a single large batch is delayed instead of refused.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: The number of tokens that accumulate each second.
+        :param burst: The maximum number of tokens that accumulate. Defaults to one
+                      second of tokens.
+        :param clock: Returns the current time, in seconds.
+        :param sleep: Waits for a number of seconds.
+        """
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def take(self, tokens):
+        """
+        Takes tokens from the bucket, waiting when there are not enough of them.
+
+        :param tokens: The number of tokens to take.
+        :return: The number of seconds spent waiting.
+        """
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return 0
+        delay = -self._tokens / self.rate
+        self._sleep(delay)
+        return delay
+
+
+class LoadGenerator:
+    """
+    Puts batches of generated records in a stream with concurrent senders, at a
+    target rate.
+    """
+
+    def __init__(
+        self,
+        kinesis_client,
+        stream_name,
+        records_per_second=None,
+        mb_per_second=None,
+        max_senders=DEFAULT_MAX_SENDERS,
+        report_interval=DEFAULT_REPORT_INTERVAL,
+    ):
+        """
+        :param kinesis_client: A Boto3 Kinesis client.
+        :param stream_name: The name of the stream.
+        :param records_per_second: The target number of records put each second.
+                                   When None, the record rate is not limited.
+        :param mb_per_second: The target number of megabytes of record data and
+                              partition keys put each second. When None, the data
+                              rate is not limited.
+        :param max_senders: The number of put_records calls that can run at once.
+        :param report_interval: The number of seconds between throughput reports.
+        """
+        self.kinesis_client = kinesis_client
+        self.stream_name = stream_name
+        self.max_senders = max_senders
+        self.report_interval = report_interval
+        self.buckets = []
+        if records_per_second is not None:
+            self.buckets.append((TokenBucket(records_per_second), False))
+        if mb_per_second is not None:
+            self.buckets.append((TokenBucket(mb_per_second * 1024 * 1024), True))
+        self.records_sent = 0
+        self.bytes_sent = 0
+        self.put_calls = 0
+        self.throttled = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _record_size(record):
+        return len(record["Data"]) + len(record["PartitionKey"].encode())
+
+    def _chunks(self, batch):
+        """
+        Splits a batch of generated records into chunks that fit in one put_records
+        call. Record data is encoded once, here.
+        """
+        chunk, chunk_bytes = [], 0
+        for record in batch:
+            data = record["Data"]
+            record = {
+                "Data": data.encode() if isinstance(data, str) else data,
+                "PartitionKey": record["PartitionKey"],
+            }
+            size = self._record_size(record)
+            if chunk and (
+                len(chunk) == MAX_BATCH_RECORDS or chunk_bytes + size > MAX_BATCH_BYTES
+            ):
+                yield chunk, chunk_bytes
+                chunk, chunk_bytes = [], 0
+            chunk.append(record)
+            chunk_bytes += size
+        if chunk:
+            yield chunk, chunk_bytes
+
+    def _send(self, records):
+        """
+        Puts records in the stream. Records that still fail after several attempts
+        are counted as failed.
+        """
+        failed = put_records_with_retries(
+            self.kinesis_client, self.stream_name, records, on_response=self._count
+        )
+        with self._lock:
+            self.failed += len(failed)
+
+    def _count(self, records, results, error):
+        """
+        Counts a put_records call and the records that it sent and that were
+        throttled.
+        """
+        with self._lock:
+            self.put_calls += 1
+            if results is None:
+                if (
+                    isinstance(error, ClientError)
+                    and error.response["Error"]["Code"] in THROTTLE_ERROR_CODES
+                ):
+                    self.throttled += len(records)
+                return
+            for record, result in zip(records, results):
+                if "ErrorCode" not in result:
+                    self.records_sent += 1
+                    self.bytes_sent += self._record_size(record)
+                elif result["ErrorCode"] in THROTTLE_ERROR_CODES:
+                    self.throttled += 1
+
+    def _report(self, previous, elapsed):
+        """
+        Logs the throughput since the previous report and the totals so far.
+
+        :param previous: The records sent, bytes sent, and records throttled at the
+                         previous report.
+        :param elapsed: The number of seconds since the previous report.
+        :return: The records sent, bytes sent, and records throttled now.
+        """
+        with self._lock:
+            current = self.records_sent, self.bytes_sent, self.throttled
+            failed = self.failed
+        records, sent_bytes, throttled = (
+            now - before for now, before in zip(current, previous)
+        )
+        logger.info(
+            "%.0f records/s, %.2f MB/s, %s records throttled. "
+            "Total of %s records sent, %s throttled, %s failed.",
+            records / elapsed,
+            sent_bytes / elapsed / 1024 / 1024,
+            throttled,
+            current[0],
+            current[2],
+            failed,
+        )
+        return current
+
+    def run(self, batches, duration=None, max_records=None):
+        """
+        Puts generated records in the stream until the batches run out, the duration
+        has passed, or the maximum number of records has been generated. Each put
+        waits for its records to be covered by the token buckets, and no more than
+        twice as many chunks as there are senders are held at once, so a generator
+        that is faster than the stream does not use unbounded memory.
+
+        :param batches: An iterable of lists of generated records. Each record is a
+                        dict with Data and PartitionKey keys, as put_records takes.
+        :param duration: The number of seconds to run. When None, there is no limit.
+        :param max_records: The number of records to generate. When None, there is
+                            no limit.
+        :return: The number of records that were put in the stream.
+        """
+        start = last_report = time.monotonic()
+        reported = (0, 0, 0)
+        generated = 0
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=self.max_senders) as executor:
+            try:
+                for batch in batches:
+                    if max_records is not None:
+                        batch = batch[: max_records - generated]
+                    for chunk, chunk_bytes in self._chunks(batch):
+                        for bucket, counts_bytes in self.buckets:
+                            bucket.take(chunk_bytes if counts_bytes else len(chunk))
+                        if len(in_flight) >= self.max_senders * 2:
+                            done, in_flight = wait(
+                                in_flight, return_when=FIRST_COMPLETED
+                            )
+                            for future in done:
+                                future.result()
+                        in_flight.add(executor.submit(self._send, chunk))
+                        generated += len(chunk)
+                        now = time.monotonic()
+                        if now - last_report >= self.report_interval:
+                            reported = self._report(reported, now - last_report)
+                            last_report = now
+                    if (max_records is not None and generated >= max_records) or (
+                        duration is not None and time.monotonic() - start >= duration
+                    ):
+                        break
+            except KeyboardInterrupt:
+                logger.info("Stopped generating records.")
+            finally:
+                for future in in_flight:
+                    future.result()
+        elapsed = time.monotonic() - start
+        logger.info(
+            "Put %s records (%.2f MB) in stream %s in %.1f seconds, %.0f records/s. "
+            "%s records were throttled and %s failed.",
+            self.records_sent,
+            self.bytes_sent / 1024 / 1024,
+            self.stream_name,
+            elapsed,
+            self.records_sent / elapsed if elapsed else 0,
+            self.throttled,
+            self.failed,
+        )
+        return self.records_sent
@@ -0,0 +1,173 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for batch_producer.py.
+"""
+
+import json
+import threading
+import time
+
+import boto3
+from botocore.exceptions import EndpointConnectionError
+import pytest
+
+from streams import batch_producer
+from streams.batch_producer import BatchProducer, RecordAggregator, deaggregate
+
+STREAM_NAME = "test-stream"
+PARTITION_KEY = "test-key"
+
+
+def encode(records):
+    return [json.dumps(record).encode() for record in records]
+
+
+@pytest.fixture
+def producer_n_stubber(make_stubber, monkeypatch):
+    monkeypatch.setattr(batch_producer.time, "sleep", lambda _: None)
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    producer = BatchProducer(kinesis_client, STREAM_NAME, linger=60)
+    yield producer, kinesis_stubber
+    producer.close()
+
+
+def test_put_batches(producer_n_stubber):
+    producer, kinesis_stubber = producer_n_stubber
+    records = [{"index": index} for index in range(batch_producer.MAX_BATCH_RECORDS)]
+
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode(records), PARTITION_KEY)
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode(records[:1]), PARTITION_KEY)
+
+    for record in records + records[:1]:
+        producer.put(record, PARTITION_KEY)
+    producer.flush()
+
+    assert producer.records_sent == len(records) + 1
+    assert producer.put_calls == 2
+
+
+def test_put_retries_failed(producer_n_stubber):
+    producer, kinesis_stubber = producer_n_stubber
+    records = [{"index": index} for index in range(3)]
+
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records), PARTITION_KEY, failed_indexes=(0, 2)
+    )
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records[::2]), PARTITION_KEY, failed_indexes=(1,)
+    )
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode(records[2:]), PARTITION_KEY)
+
+    for record in records:
+        producer.put(record, PARTITION_KEY)
+    producer.flush()
+
+    assert producer.records_sent == 3
+    assert producer.failed_records == []
+
+
+def test_put_keeps_failed(producer_n_stubber, monkeypatch):
+    monkeypatch.setattr(batch_producer, "MAX_PUT_ATTEMPTS", 2)
+    producer, kinesis_stubber = producer_n_stubber
+    records = [{"index": index} for index in range(2)]
+
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records), PARTITION_KEY, failed_indexes=(1,)
+    )
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records[1:]), PARTITION_KEY, error_code="TestException"
+    )
+
+    for record in records:
+        producer.put(record, PARTITION_KEY)
+    producer.flush()
+
+    assert producer.records_sent == 1
+    assert [entry[0] for entry in producer.failed_records] == encode(records[1:])
+
+
+@pytest.mark.parametrize(
+    "error", [EndpointConnectionError(endpoint_url="https://test"), KeyError("test")]
+)
+def test_put_keeps_records_on_error(monkeypatch, error):
+    monkeypatch.setattr(batch_producer.time, "sleep", lambda _: None)
+    kinesis_client = boto3.client("kinesis")
+    records = [{"index": index} for index in range(2)]
+
+    def put_records(**kwargs):
+        raise error
+
+    monkeypatch.setattr(kinesis_client, "put_records", put_records)
+    producer = BatchProducer(kinesis_client, STREAM_NAME, linger=60)
+    for record in records:
+        producer.put(record, PARTITION_KEY)
+    flusher = threading.Thread(target=producer.flush, daemon=True)
+    flusher.start()
+    flusher.join(5)
+
+    assert not flusher.is_alive()
+    assert [entry[0] for entry in producer.failed_records] == encode(records)
+    producer.close()
+
+
+def test_put_linger(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    record = {"index": 0}
+
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode([record]), PARTITION_KEY)
+
+    with BatchProducer(kinesis_client, STREAM_NAME, linger=0.01) as producer:
+        producer.put(record, PARTITION_KEY)
+        deadline = time.monotonic() + 5
+        while producer.records_sent == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert producer.records_sent == 1
+
+
+def test_put_aggregated(make_stubber):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    records = [{"index": index} for index in range(100)]
+    aggregator = RecordAggregator()
+    for data in encode(records):
+        aggregator.add(data, PARTITION_KEY)
+    aggregated, _, _ = aggregator.flush()
+
+    kinesis_stubber.stub_put_records(STREAM_NAME, [aggregated], PARTITION_KEY)
+
+    with BatchProducer(
+        kinesis_client, STREAM_NAME, linger=60, aggregate=True
+    ) as producer:
+        for record in records:
+            producer.put(record, PARTITION_KEY)
+
+    assert producer.records_sent == len(records)
+    assert producer.put_calls == 1
+
+
+def test_aggregator():
+    aggregator = RecordAggregator(max_bytes=200)
+    user_records = [
+        (f"data-{index}".encode(), f"key-{index % 3}") for index in range(30)
+    ]
+
+    completed = [aggregator.add(data, key) for data, key in user_records]
+    completed.append(aggregator.flush())
+    aggregated = [record for record in completed if record is not None]
+
+    assert len(aggregated) > 1
+    assert all(len(data) + len(key) <= 200 for data, key, _ in aggregated)
+    assert sum(count for _, _, count in aggregated) == len(user_records)
+    assert [
+        user_record
+        for data, key, _ in aggregated
+        for user_record in deaggregate(data, key)
+    ] == user_records
+
+
+def test_deaggregate_plain_record():
+    assert deaggregate(b"test-data", PARTITION_KEY) == [(b"test-data", PARTITION_KEY)]
@@ -0,0 +1,21 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for checkpoints.py.
+"""
+
+from streams.checkpoints import SHARD_END, FileCheckpointStore
+
+
+def test_file_checkpoint_store(tmp_path):
+    path = tmp_path / "checkpoints.json"
+
+    store = FileCheckpointStore(path)
+    assert store.get("test-shard") is None
+    store.put("test-shard", "12345")
+    store.put("closed-shard", SHARD_END)
+
+    store = FileCheckpointStore(path)
+    assert store.get("test-shard") == "12345"
+    assert store.get("closed-shard") == SHARD_END
@@ -9,6 +9,8 @@ import boto3
 from botocore.exceptions import ClientError
 import pytest
 
+from streams import kinesis_stream
+from streams.checkpoints import SHARD_END, MemoryCheckpointStore
 from streams.kinesis_stream import KinesisStream
 
 
@@ -100,31 +102,205 @@ def test_put_record(make_stubber, error_code):
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
-@pytest.mark.parametrize("error_code", [None, "TestException"])
-def test_get_records(make_stubber, error_code):
+@pytest.fixture
+def no_idle_wait(monkeypatch):
+    monkeypatch.setattr(kinesis_stream, "IDLE_POLL_INTERVAL", 0)
+
+
+@pytest.mark.parametrize(
+    "error_code,stop_on_method",
+    [
+        (None, None),
+        ("TestException", "stub_list_shards"),
+        ("TestException", "stub_get_shard_iterator"),
+        ("TestException", "stub_get_records"),
+    ],
+)
+def test_get_records(
+    make_stubber, stub_runner, no_idle_wait, error_code, stop_on_method
+):
     kinesis_client = boto3.client("kinesis")
     kinesis_stubber = make_stubber(kinesis_client)
     stream = KinesisStream(kinesis_client)
     stream.name = "test-stream"
     shard_id = "test-shard-id"
-    stream.details = {"Shards": [{"ShardId": shard_id}]}
-    max_records = 50
+    max_records = 30
     page_size = 10
     shard_iter = "test-shard-iter"
     records = [f"test-data-{index}" for index in range(page_size)]
 
-    kinesis_stubber.stub_get_shard_iterator(
-        stream.name, shard_id, shard_iter, error_code=error_code
-    )
-    if error_code is None:
-        for _ in range(0, max_records, page_size):
-            kinesis_stubber.stub_get_records(shard_iter, page_size, records)
+    with stub_runner(error_code, stop_on_method) as runner:
+        runner.add(
+            kinesis_stubber.stub_list_shards, stream.name, [{"ShardId": shard_id}]
+        )
+        runner.add(
+            kinesis_stubber.stub_get_shard_iterator, stream.name, shard_id, shard_iter
+        )
+        for index in range(0, max_records, page_size):
+            runner.add(
+                kinesis_stubber.stub_get_records,
+                shard_iter,
+                kinesis_stream.MIN_RECORDS_LIMIT,
+                records,
+                closed=index + page_size >= max_records,
+                millis_behind=0,
+            )
 
     if error_code is None:
-        for got_records in stream.get_records(max_records):
+        got_batches = list(stream.get_records(max_records))
+        assert len(got_batches) == max_records // page_size
+        for got_records in got_batches:
             assert [record["Data"] for record in got_records] == records
     else:
         with pytest.raises(ClientError) as exc_info:
             for _ in stream.get_records(max_records):
                 pass
         assert exc_info.value.response["Error"]["Code"] == error_code
+
+
+def test_get_records_resharded(make_stubber, no_idle_wait):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    shards = [
+        {"ShardId": "parent-shard"},
+        {"ShardId": "child-shard", "ParentShardId": "parent-shard"},
+    ]
+    checkpoint_store = MemoryCheckpointStore()
+
+    # The child shard is read from its start after the parent shard is read to
+    # its end, and reading stops when both shards are read to their end.
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+    kinesis_stubber.stub_get_shard_iterator(stream.name, "parent-shard", "parent-iter")
+    kinesis_stubber.stub_get_records(
+        "parent-iter", kinesis_stream.MIN_RECORDS_LIMIT, ["parent-data"], closed=True
+    )
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "child-shard", "child-iter", iterator_type="TRIM_HORIZON"
+    )
+    kinesis_stubber.stub_get_records(
+        "child-iter", kinesis_stream.MIN_RECORDS_LIMIT, ["child-data"], closed=True
+    )
+    kinesis_stubber.stub_list_shards(stream.name, shards)
+
+    got_data = [
+        record["Data"]
+        for records in stream.get_records(checkpoint_store=checkpoint_store)
+        for record in records
+    ]
+
+    assert got_data == ["parent-data", "child-data"]
+    assert checkpoint_store.get("parent-shard") == SHARD_END
+    assert checkpoint_store.get("child-shard") == SHARD_END
+
+
+@pytest.mark.parametrize(
+    "initial_position,parent_closed,parent_checkpoint,child_position",
+    [
+        ("LATEST", True, None, "LATEST"),
+        ("TRIM_HORIZON", True, None, "TRIM_HORIZON"),
+        ("LATEST", True, SHARD_END, "TRIM_HORIZON"),
+        ("LATEST", False, None, "TRIM_HORIZON"),
+    ],
+)
+def test_get_records_child_position(
+    make_stubber,
+    no_idle_wait,
+    initial_position,
+    parent_closed,
+    parent_checkpoint,
+    child_position,
+):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    child = {"ShardId": "child-shard", "ParentShardId": "parent-shard"}
+    closed_shards = [{"ShardId": "parent-shard", "closed": True}, child]
+    checkpoint_store = MemoryCheckpointStore()
+    if parent_checkpoint is not None:
+        checkpoint_store.put("parent-shard", parent_checkpoint)
+
+    # A parent that is open when it is first listed is followed, even when it
+    # has no records before it is closed, so its child is read from its start.
+    # So is a parent that was read to its end earlier. The child of a parent that
+    # was already closed when it was first listed is read from the initial
+    # position.
+    if parent_closed:
+        kinesis_stubber.stub_list_shards(stream.name, closed_shards)
+    else:
+        kinesis_stubber.stub_list_shards(
+            stream.name, [{"ShardId": "parent-shard"}, child]
+        )
+    if parent_checkpoint is None:
+        kinesis_stubber.stub_get_shard_iterator(
+            stream.name, "parent-shard", "parent-iter", iterator_type=initial_position
+        )
+        kinesis_stubber.stub_get_records(
+            "parent-iter", kinesis_stream.MIN_RECORDS_LIMIT, [], closed=True
+        )
+        kinesis_stubber.stub_list_shards(stream.name, closed_shards)
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name, "child-shard", "child-iter", iterator_type=child_position
+    )
+    kinesis_stubber.stub_get_records(
+        "child-iter", kinesis_stream.MIN_RECORDS_LIMIT, ["child-data"], closed=True
+    )
+    kinesis_stubber.stub_list_shards(stream.name, closed_shards)
+
+    got_data = [
+        record["Data"]
+        for records in stream.get_records(
+            checkpoint_store=checkpoint_store, initial_position=initial_position
+        )
+        for record in records
+    ]
+
+    assert got_data == ["child-data"]
+    assert checkpoint_store.get("child-shard") == SHARD_END
+
+
+def test_get_records_from_checkpoint(make_stubber, no_idle_wait):
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    stream = KinesisStream(kinesis_client)
+    stream.name = "test-stream"
+    checkpoint_store = MemoryCheckpointStore()
+    checkpoint_store.put("done-shard", SHARD_END)
+    checkpoint_store.put("test-shard", "0")
+
+    kinesis_stubber.stub_list_shards(
+        stream.name, [{"ShardId": "done-shard"}, {"ShardId": "test-shard"}]
+    )
+    kinesis_stubber.stub_get_shard_iterator(
+        stream.name,
+        "test-shard",
+        "test-iter",
+        iterator_type="AFTER_SEQUENCE_NUMBER",
+        sequence_number="0",
+    )
+    kinesis_stubber.stub_get_records(
+        "test-iter", kinesis_stream.MIN_RECORDS_LIMIT, ["test-data"], closed=True
+    )
+
+    for _ in stream.get_records(1, checkpoint_store):
+        pass
+
+    assert checkpoint_store.get("test-shard") == "1"
+
+
+@pytest.mark.parametrize(
+    "limit,record_count,millis_behind,expected",
+    [
+        (100, 100, 5000, 200),
+        (10000, 10000, 5000, 10000),
+        (100, 40, 5000, 100),
+        (400, 10, 0, 200),
+        (100, 10, 0, 100),
+        (400, 300, 0, 400),
+    ],
+)
+def test_next_limit(limit, record_count, millis_behind, expected):
+    assert KinesisStream._next_limit(limit, record_count, millis_behind) == expected
@@ -0,0 +1,202 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for load_generator.py and the batch generators of the dg_* scripts.
+"""
+
+import importlib
+import json
+
+import boto3
+from botocore.exceptions import EndpointConnectionError
+import pytest
+
+from streams import batch_producer, load_generator
+from streams.load_generator import LoadGenerator, TokenBucket
+
+STREAM_NAME = "test-stream"
+PARTITION_KEY = "test-key"
+
+
+def make_records(count):
+    return [
+        {"Data": json.dumps({"index": index}), "PartitionKey": PARTITION_KEY}
+        for index in range(count)
+    ]
+
+
+def encode(records):
+    return [record["Data"].encode() for record in records]
+
+
+@pytest.fixture
+def generator_n_stubber(make_stubber, monkeypatch):
+    monkeypatch.setattr(load_generator.time, "sleep", lambda _: None)
+    kinesis_client = boto3.client("kinesis")
+    kinesis_stubber = make_stubber(kinesis_client)
+    return LoadGenerator(kinesis_client, STREAM_NAME, max_senders=1), kinesis_stubber
+
+
+def test_token_bucket():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(100, clock=lambda: now[0], sleep=sleep)
+
+    assert bucket.take(100) == 0
+    assert bucket.take(50) == pytest.approx(0.5)
+    now[0] += 10
+    assert bucket.take(100) == 0
+    assert bucket.take(300) == pytest.approx(3)
+    assert sleeps == [pytest.approx(0.5), pytest.approx(3)]
+
+
+def test_run_splits_batches(generator_n_stubber):
+    generator, kinesis_stubber = generator_n_stubber
+    records = make_records(load_generator.MAX_BATCH_RECORDS + 10)
+
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records[: load_generator.MAX_BATCH_RECORDS]), PARTITION_KEY
+    )
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records[load_generator.MAX_BATCH_RECORDS :]), PARTITION_KEY
+    )
+
+    assert generator.run([records]) == len(records)
+    assert generator.put_calls == 2
+    assert generator.bytes_sent == sum(
+        len(record["Data"]) + len(PARTITION_KEY) for record in records
+    )
+
+
+def test_run_stops_at_max_records(generator_n_stubber):
+    generator, kinesis_stubber = generator_n_stubber
+    records = make_records(5)
+
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode(records), PARTITION_KEY)
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode(records[:2]), PARTITION_KEY)
+
+    def batches():
+        while True:
+            yield records
+
+    assert generator.run(batches(), max_records=7) == 7
+
+
+def test_run_retries_throttled(generator_n_stubber):
+    generator, kinesis_stubber = generator_n_stubber
+    records = make_records(3)
+
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records), PARTITION_KEY, failed_indexes=(0, 2)
+    )
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME,
+        encode(records[::2]),
+        PARTITION_KEY,
+        error_code="ProvisionedThroughputExceededException",
+    )
+    kinesis_stubber.stub_put_records(STREAM_NAME, encode(records[::2]), PARTITION_KEY)
+
+    assert generator.run([records]) == 3
+    assert generator.throttled == 4
+    assert generator.failed == 0
+
+
+def test_run_counts_failed(generator_n_stubber, monkeypatch):
+    monkeypatch.setattr(batch_producer, "MAX_PUT_ATTEMPTS", 2)
+    generator, kinesis_stubber = generator_n_stubber
+    records = make_records(2)
+
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records), PARTITION_KEY, failed_indexes=(1,)
+    )
+    kinesis_stubber.stub_put_records(
+        STREAM_NAME, encode(records[1:]), PARTITION_KEY, error_code="TestException"
+    )
+
+    assert generator.run([records]) == 1
+    assert generator.failed == 1
+
+
+def test_run_counts_connection_errors(generator_n_stubber, monkeypatch):
+    generator, _ = generator_n_stubber
+    records = make_records(3)
+
+    def put_records(**kwargs):
+        raise EndpointConnectionError(endpoint_url="https://test")
+
+    monkeypatch.setattr(generator.kinesis_client, "put_records", put_records)
+
+    assert generator.run([records]) == 0
+    assert generator.failed == 3
+    assert generator.put_calls == batch_producer.MAX_PUT_ATTEMPTS
+
+
+@pytest.mark.parametrize(
+    "module_name",
+    [
+        "streams.dg_anomaly",
+        "streams.dg_anomalyex",
+        "streams.dg_columnlog",
+        "streams.dg_hotspots",
+        "streams.dg_referrer",
+        "streams.dg_regexlog",
+        "streams.dg_stagger",
+        "streams.dg_stockticker",
+        "streams.dg_tworecordtypes",
+        "streams.dg_weblog",
+    ],
+)
+def test_generate_batches(module_name):
+    module = importlib.import_module(module_name)
+    batches = module.generate_batches(batch_size=7)
+
+    for _ in range(3):
+        batch = next(batches)
+        assert len(batch) == 7
+        for record in batch:
+            assert isinstance(json.loads(record["Data"]), dict)
+            assert record["PartitionKey"]
+
+
+def test_generate_hotspot_batches():
+    module = importlib.import_module("streams.dg_hotspots")
+    field = {"left": 0, "width": 10, "top": 0, "height": 10}
+    batches = module.generate_batches(
+        field, hotspot_size=1, hotspot_weight=0.2, batch_size=300, seed=1
+    )
+
+    points = [json.loads(record["Data"]) for _ in range(10) for record in next(batches)]
+
+    for start in range(0, len(points), 1000):
+        hot = [
+            point for point in points[start : start + 1000] if point["is_hot"] == "Y"
+        ]
+        assert 100 < len(hot) < 300
+        xs = [point["x"] for point in hot]
+        ys = [point["y"] for point in hot]
+        assert max(xs) - min(xs) <= 1 and max(ys) - min(ys) <= 1
+    assert all(0 <= point["x"] <= 10 and 0 <= point["y"] <= 10 for point in points)
+
+
+def test_generate_tworecordtypes_batches():
+    module = importlib.import_module("streams.dg_tworecordtypes")
+    batches = module.generate_batches(batch_size=5)
+
+    records = [
+        json.loads(record["Data"]) for _ in range(20) for record in next(batches)
+    ]
+
+    order_id = 0
+    for record in records:
+        if record["RecordType"] == "Order":
+            assert record["Oid"] == order_id + 1
+            order_id = record["Oid"]
+        else:
+            assert record["Toid"] == order_id
@@ -12,21 +12,76 @@ S3 location.
 """
 
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import json
 import logging
+import os
+import threading
 
 import boto3
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# The number of images (and masks) that are copied at the same time for each dataset.
+DEFAULT_MAX_COPIES = 16
 
-def copy_file(s3_resource, source_file, destination_file):
+
+class CopyJournal:
+    """
+    Records the copies that are complete in a local file, so that an export that
+    stops partway through can be run again without copying the same images again.
+    Each line of the file holds the source and destination of one copy.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The path to the journal file. Copies recorded in an existing
+        file are treated as complete.
+        """
+        self.path = path
+        self._copies = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as journal_file:
+                self._copies = {line.rstrip("\n") for line in journal_file}
+            logger.info("Found %s completed copies in %s.", len(self._copies), path)
+        self._journal_file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __contains__(self, copy):
+        source_file, destination_file = copy
+        return f"{source_file}\t{destination_file}" in self._copies
+
+    def add(self, source_file, destination_file):
+        """
+        Records that a copy is complete.
+        :param source_file: The Amazon S3 path to the source file.
+        :param destination_file: The Amazon S3 path to the copy.
+        """
+        line = f"{source_file}\t{destination_file}"
+        with self._lock:
+            self._copies.add(line)
+            self._journal_file.write(line + "\n")
+            self._journal_file.flush()
+
+    def close(self):
+        self._journal_file.close()
+
+    def remove(self):
+        """
+        Closes and deletes the journal file, after the export is complete.
+        """
+        self.close()
+        os.remove(self.path)
+
+
+def copy_file(s3_client, source_file, destination_file):
     """
     Copies a file from a source Amazon S3 folder to a destination
     Amazon S3 folder.
     The destination can be in a different S3 bucket.
-    :param s3: An Amazon S3 Boto3 resource.
+    :param s3_client: An Amazon S3 Boto3 client.
     :param source_file: The Amazon S3 path to the source file.
     :param destination_file: The destination Amazon S3 path for
     the copy operation.
@@ -38,10 +93,14 @@ def copy_file(s3_resource, source_file, destination_file):
     )
 
     try:
-        bucket = s3_resource.Bucket(destination_bucket)
-        dest_object = bucket.Object(destination_key)
-        dest_object.copy_from(CopySource={"Bucket": source_bucket, "Key": source_key})
-        dest_object.wait_until_exists()
+        s3_client.copy_object(
+            Bucket=destination_bucket,
+            Key=destination_key,
+            CopySource={"Bucket": source_bucket, "Key": source_key},
+        )
+        s3_client.get_waiter("object_exists").wait(
+            Bucket=destination_bucket, Key=destination_key
+        )
         logger.info("Copied %s to %s", source_file, destination_file)
     except ClientError as error:
         if error.response["Error"]["Code"] == "404":
@@ -54,10 +113,10 @@ def copy_file(s3_resource, source_file, destination_file):
         raise
 
 
-def upload_manifest_file(s3_resource, manifest_file, destination):
+def upload_manifest_file(s3_client, manifest_file, destination):
     """
     Uploads a manifest file to a destination Amazon S3 folder.
-    :param s3: An Amazon S3 Boto3 resource.
+    :param s3_client: An Amazon S3 Boto3 client.
     :param manifest_file: The manifest file that you want to upload.
     :destination: The Amazon S3 folder location to upload the manifest
     file to.
@@ -65,18 +124,16 @@ def upload_manifest_file(s3_resource, manifest_file, destination):
 
     destination_bucket, destination_key = destination.replace("s3://", "").split("/", 1)
 
-    bucket = s3_resource.Bucket(destination_bucket)
-
     put_data = open(manifest_file, "rb")
-    obj = bucket.Object(destination_key + manifest_file)
+    key = destination_key + manifest_file
 
     try:
-        obj.put(Body=put_data)
-        obj.wait_until_exists()
-        logger.info("Put manifest file '%s' to bucket '%s'.", obj.key, obj.bucket_name)
+        s3_client.put_object(Bucket=destination_bucket, Key=key, Body=put_data)
+        s3_client.get_waiter("object_exists").wait(Bucket=destination_bucket, Key=key)
+        logger.info("Put manifest file '%s' to bucket '%s'.", key, destination_bucket)
     except ClientError:
         logger.exception(
-            "Couldn't put manifest file '%s' to bucket '%s'.", obj.key, obj.bucket_name
+            "Couldn't put manifest file '%s' to bucket '%s'.", key, destination_bucket
         )
         raise
     finally:
@@ -108,16 +165,18 @@ def get_dataset_types(lookoutvision_client, project):
         raise
 
 
-def process_json_line(s3_resource, entry, dataset_type, destination):
+def process_json_line(s3_client, entry, dataset_type, destination, journal=None):
     """
     Creates a JSON line for a new manifest file, copies image and mask to
     destination.
-    :param s3_resource: An Amazon S3 Boto3 resource.
+    :param s3_client: An Amazon S3 Boto3 client.
     :param entry: A JSON line from the manifest file.
     :param dataset_type: The type (train or test) of the dataset that
     you want to create the manifest file for.
     :param destination: The destination Amazon S3 folder for the manifest
     file and dataset images.
+    :param journal: A CopyJournal of the copies that are complete. Copies that
+    are in the journal are skipped. When None, every file is copied.
     :return: A JSON line with details for the destination location.
     """
     entry_json = json.loads(entry)
@@ -130,7 +189,9 @@ def process_json_line(s3_resource, entry, dataset_type, destination):
 
     destination_image_location = destination + dataset_type + "/images/" + key
 
-    copy_file(s3_resource, entry_json["source-ref"], destination_image_location)
+    copy_journaled_file(
+        s3_client, entry_json["source-ref"], destination_image_location, journal
+    )
 
     # Update JSON for writing.
     entry_json["source-ref"] = destination_image_location
@@ -142,23 +203,56 @@ def process_json_line(s3_resource, entry, dataset_type, destination):
         destination_mask_location = destination + dataset_type + "/masks/" + mask_key
         entry_json["anomaly-mask-ref"] = destination_mask_location
 
-        copy_file(s3_resource, source_anomaly_ref, entry_json["anomaly-mask-ref"])
+        copy_journaled_file(
+            s3_client, source_anomaly_ref, entry_json["anomaly-mask-ref"], journal
+        )
 
     return entry_json
 
 
+def copy_journaled_file(s3_client, source_file, destination_file, journal):
+    """
+    Copies a file unless the journal shows that the copy is complete, and records
+    the copy in the journal.
+    :param s3_client: An Amazon S3 Boto3 client.
+    :param source_file: The Amazon S3 path to the source file.
+    :param destination_file: The destination Amazon S3 path for
+    the copy operation.
+    :param journal: A CopyJournal, or None to always copy the file.
+    """
+    if journal is not None and (source_file, destination_file) in journal:
+        logger.info("Skipped %s, which is already copied.", source_file)
+        return
+    copy_file(s3_client, source_file, destination_file)
+    if journal is not None:
+        journal.add(source_file, destination_file)
+
+
 def write_manifest_file(
-    lookoutvision_client, s3_resource, project, dataset_type, destination
+    lookoutvision_client,
+    s3_client,
+    project,
+    dataset_type,
+    destination,
+    max_copies=DEFAULT_MAX_COPIES,
+    journal=None,
 ):
     """
     Creates a manifest file for a dataset. Copies the manifest file and
     dataset images (and masks, if present) to the specified Amazon S3 destination.
+    Dataset entries are copied by a pool of threads while more entries are listed.
+    The manifest file keeps the order of the entries in the dataset.
     :param lookoutvision_client: A Lookout for Vision Boto3 client.
+    :param s3_client: An Amazon S3 Boto3 client. Clients, unlike resources, can be
+    shared by the copy threads.
     :param project: The Lookout for Vision project that you want to use.
     :param dataset_type: The type (train or test) of the dataset that
     you want to create the manifest file for.
     :param destination: The destination Amazon S3 folder for the manifest file
     and dataset images.
+    :param max_copies: The maximum number of entries to copy at the same time.
+    :param journal: A CopyJournal of the copies that are complete. Copies that
+    are in the journal are skipped. When None, every file is copied.
     """
 
     try:
@@ -175,37 +269,77 @@ def write_manifest_file(
         output_manifest_file = dataset_type + ".manifest"
 
         # Create manifest file then upload to Amazon S3 with images.
-        with open(output_manifest_file, "w", encoding="utf-8") as manifest_file:
-            for page in page_iterator:
-                for entry in page["DatasetEntries"]:
-                    try:
-                        entry_json = process_json_line(
-                            s3_resource, entry, dataset_type, destination
+        with open(
+            output_manifest_file, "w", encoding="utf-8"
+        ) as manifest_file, ThreadPoolExecutor(max_workers=max_copies) as executor:
+            # Copies are written to the manifest file in the order they are listed,
+            # so listing waits when the oldest copy is far behind.
+            copies = deque()
+            try:
+                for page in page_iterator:
+                    for entry in page["DatasetEntries"]:
+                        copies.append(
+                            (
+                                entry,
+                                executor.submit(
+                                    process_json_line,
+                                    s3_client,
+                                    entry,
+                                    dataset_type,
+                                    destination,
+                                    journal,
+                                ),
+                            )
                         )
-
-                        manifest_file.write(json.dumps(entry_json) + "\n")
-
-                    except ClientError as error:
-                        if error.response["Error"]["Code"] == "404":
-                            print(error.response["Error"]["Message"])
-                            print(f"Excluded JSON line: {entry}")
-                        else:
-                            raise
-        upload_manifest_file(
-            s3_resource, output_manifest_file, destination + "datasets/"
-        )
+                        if len(copies) >= 2 * max_copies:
+                            _write_manifest_line(manifest_file, *copies.popleft())
+                while copies:
+                    _write_manifest_line(manifest_file, *copies.popleft())
+            finally:
+                for _, copy in copies:
+                    copy.cancel()
+        upload_manifest_file(s3_client, output_manifest_file, destination + "datasets/")
 
     except ClientError:
         logger.exception("Problem getting dataset_entries")
         raise
 
 
-def export_datasets(lookoutvision_client, s3_resource, project, destination):
+def _write_manifest_line(manifest_file, entry, copy):
+    """
+    Waits for the copy of a dataset entry and writes its JSON line to the manifest
+    file. Entries whose images are not found are excluded from the manifest file.
+    """
+    try:
+        entry_json = copy.result()
+        manifest_file.write(json.dumps(entry_json) + "\n")
+    except ClientError as error:
+        if error.response["Error"]["Code"] == "404":
+            print(error.response["Error"]["Message"])
+            print(f"Excluded JSON line: {entry}")
+        else:
+            raise
+
+
+def export_datasets(
+    lookoutvision_client,
+    s3_resource,
+    project,
+    destination,
+    max_copies=DEFAULT_MAX_COPIES,
+    journal_folder=None,
+):
     """
     Exports the datasets from an Amazon Lookout for Vision project to a specified
-    Amazon S3 destination.
+    Amazon S3 destination. The train and test datasets are exported at the same time.
     :param project: The Lookout for Vision project that you want to use.
     :param destination: The destination Amazon S3 folder for the exported datasets.
+    :param max_copies: The maximum number of entries to copy at the same time for
+    each dataset.
+    :param journal_folder: The local folder for the journal of each dataset. When
+    an export stops partway through, running it again skips the copies in the
+    journal. The journal is deleted when its dataset is exported. When None, no
+    journal is kept.
     """
     # Add trailing backslash, if missing.
     destination = destination if destination[-1] == "/" else destination + "/"
@@ -215,12 +349,22 @@ def export_datasets(lookoutvision_client, s3_resource, project, destination):
     # Get each dataset and export to destination.
 
     dataset_types = get_dataset_types(lookoutvision_client, project)
-    for dataset in dataset_types:
-        logger.info("Copying %s dataset to %s.", dataset, destination)
-
-        write_manifest_file(
-            lookoutvision_client, s3_resource, project, dataset, destination
-        )
+    with ThreadPoolExecutor(max_workers=max(len(dataset_types), 1)) as executor:
+        exports = [
+            executor.submit(
+                _export_dataset,
+                lookoutvision_client,
+                s3_resource.meta.client,
+                project,
+                dataset,
+                destination,
+                max_copies,
+                journal_folder,
+            )
+            for dataset in dataset_types
+        ]
+        for export in exports:
+            export.result()
 
     print("Exported dataset locations")
     for dataset in dataset_types:
@@ -229,6 +373,42 @@ def export_datasets(lookoutvision_client, s3_resource, project, destination):
     print("Done.")
 
 
+def _export_dataset(
+    lookoutvision_client,
+    s3_client,
+    project,
+    dataset_type,
+    destination,
+    max_copies,
+    journal_folder,
+):
+    """
+    Exports one dataset, keeping a journal of its copies when a journal folder is
+    specified.
+    """
+    logger.info("Copying %s dataset to %s.", dataset_type, destination)
+    journal = None
+    if journal_folder is not None:
+        journal = CopyJournal(os.path.join(journal_folder, f"{dataset_type}.journal"))
+    try:
+        write_manifest_file(
+            lookoutvision_client,
+            s3_client,
+            project,
+            dataset_type,
+            destination,
+            max_copies,
+            journal,
+        )
+    except Exception:
+        if journal is not None:
+            journal.close()
+            logger.info("Completed copies are recorded in %s.", journal.path)
+        raise
+    if journal is not None:
+        journal.remove()
+
+
 def add_arguments(parser):
     """
     Adds command line arguments to the parser.
@@ -237,6 +417,17 @@ def add_arguments(parser):
 
     parser.add_argument("project", help="The project that contains the dataset.")
     parser.add_argument("destination", help="The destination Amazon S3 folder.")
+    parser.add_argument(
+        "--max-copies",
+        type=int,
+        default=DEFAULT_MAX_COPIES,
+        help="The number of images to copy at the same time for each dataset.",
+    )
+    parser.add_argument(
+        "--journal-folder",
+        default=".",
+        help="The local folder for the journals that let an export resume.",
+    )
 
 
 def main():
@@ -256,7 +447,12 @@ def main():
         s3_resource = session.resource("s3")
 
         export_datasets(
-            lookoutvision_client, s3_resource, args.project, args.destination
+            lookoutvision_client,
+            s3_resource,
+            args.project,
+            args.destination,
+            args.max_copies,
+            args.journal_folder,
         )
     except ClientError as err:
         logger.exception(err)
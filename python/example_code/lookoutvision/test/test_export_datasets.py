@@ -5,10 +5,16 @@
 Unit tests for export_datasets.py.
 """
 
+import json
+import random
+import threading
+import time
+
 import boto3
 from botocore.exceptions import ClientError
 import pytest
 
+from export_datasets import CopyJournal
 from export_datasets import export_datasets
 from export_datasets import copy_file
 from export_datasets import upload_manifest_file
@@ -85,8 +91,8 @@ def test_export_datasets(make_stubber, stub_runner, error_code, stop_on_method):
     "error_code,stop_on_method", [(None, None), ("TestException", "stub_copy_object")]
 )
 def test_copy_file(make_stubber, stub_runner, error_code, stop_on_method):
-    s3_resource = boto3.resource("s3")
-    s3_stubber = make_stubber(s3_resource.meta.client)
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
     source_file = "s3://bucket/folder/image.jpg"
     destination_file = "s3://bucket2/folder/image.jpg"
     src_bucket_name = "bucket"
@@ -106,10 +112,10 @@ def test_copy_file(make_stubber, stub_runner, error_code, stop_on_method):
             runner.add(s3_stubber.stub_head_object, dest_bucket_name, dest_key)
 
     if error_code is None:
-        copy_file(s3_resource, source_file, destination_file)
+        copy_file(s3_client, source_file, destination_file)
     else:
         with pytest.raises(ClientError) as exc_info:
-            copy_file(s3_resource, source_file, destination_file)
+            copy_file(s3_client, source_file, destination_file)
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
@@ -117,8 +123,8 @@ def test_copy_file(make_stubber, stub_runner, error_code, stop_on_method):
     "error_code,stop_on_method", [(None, None), ("TestException", "stub_put_object")]
 )
 def test_upload_manifest_file(make_stubber, stub_runner, error_code, stop_on_method):
-    s3_resource = boto3.resource("s3")
-    s3_stubber = make_stubber(s3_resource.meta.client)
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
 
     dest_bucket_name = "dest-bucket"
     manifest_folder = "stubber_test/datasets/"
@@ -139,10 +145,10 @@ def test_upload_manifest_file(make_stubber, stub_runner, error_code, stop_on_met
             )
 
     if error_code is None:
-        upload_manifest_file(s3_resource, manifest_file, destination)
+        upload_manifest_file(s3_client, manifest_file, destination)
     else:
         with pytest.raises(ClientError) as exc_info:
-            upload_manifest_file(s3_resource, manifest_file, destination)
+            upload_manifest_file(s3_client, manifest_file, destination)
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
@@ -176,8 +182,8 @@ def test_get_dataset_types(make_stubber, stub_runner, error_code, stop_on_method
     "error_code,stop_on_method", [(None, None), ("TestException", "stub_copy_object")]
 )
 def test_process_json_line(make_stubber, stub_runner, error_code, stop_on_method):
-    s3_resource = boto3.resource("s3")
-    s3_stubber = make_stubber(s3_resource.meta.client)
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
 
     destination_folder = "s3://bucket2/folder/"
     src_bucket_name = "bucket"
@@ -203,10 +209,10 @@ def test_process_json_line(make_stubber, stub_runner, error_code, stop_on_method
             runner.add(s3_stubber.stub_head_object, dest_bucket_name, dest_key)
 
     if error_code is None:
-        process_json_line(s3_resource, json_line, "train", destination_folder)
+        process_json_line(s3_client, json_line, "train", destination_folder)
     else:
         with pytest.raises(ClientError) as exc_info:
-            process_json_line(s3_resource, json_line, "train", destination_folder)
+            process_json_line(s3_client, json_line, "train", destination_folder)
         assert exc_info.value.response["Error"]["Code"] == error_code
 
 
@@ -227,8 +233,8 @@ def test_write_manifest_file(make_stubber, stub_runner, error_code, stop_on_meth
     dataset_type = "train"
     json_lines_file = "test/test_manifests/updates.manifest"
 
-    s3_resource = boto3.resource("s3")
-    s3_stubber = make_stubber(s3_resource.meta.client)
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
     src_bucket_name = "bucket"
     src_key = "cookies/Anomaly/anomaly-1.jpg"
     dest_bucket_name = "dest-bucket"
@@ -260,11 +266,211 @@ def test_write_manifest_file(make_stubber, stub_runner, error_code, stop_on_meth
 
     if error_code is None:
         write_manifest_file(
-            lookoutvision_client, s3_resource, project_name, "train", s3_path
+            lookoutvision_client, s3_client, project_name, "train", s3_path
         )
     else:
         with pytest.raises(ClientError) as exc_info:
             write_manifest_file(
-                lookoutvision_client, s3_resource, project_name, "train", s3_path
+                lookoutvision_client, s3_client, project_name, "train", s3_path
             )
         assert exc_info.value.response["Error"]["Code"] == error_code
+
+
+def test_copy_journal(tmp_path):
+    journal_path = tmp_path / "train.journal"
+    source_file = "s3://bucket/folder/image.jpg"
+    destination_file = "s3://bucket2/folder/image.jpg"
+
+    journal = CopyJournal(journal_path)
+    assert (source_file, destination_file) not in journal
+    journal.add(source_file, destination_file)
+    journal.close()
+
+    journal = CopyJournal(journal_path)
+    assert (source_file, destination_file) in journal
+    assert ("s3://bucket/folder/other.jpg", destination_file) not in journal
+    journal.remove()
+    assert not journal_path.exists()
+
+
+@pytest.mark.parametrize("journaled", [False, True])
+def test_process_json_line_journal(make_stubber, tmp_path, journaled):
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
+    destination_folder = "s3://dest-bucket/files/"
+    source_file = "s3://bucket/cookies/Anomaly/anomaly-1.jpg"
+    dest_bucket_name = "dest-bucket"
+    dest_key = "files/train/images/cookies/Anomaly/anomaly-1.jpg"
+    destination_file = f"s3://{dest_bucket_name}/{dest_key}"
+    journal = CopyJournal(tmp_path / "train.journal")
+
+    with open("test/test_manifests/updates.manifest", encoding="utf-8") as json_file:
+        json_line = json_file.read()
+
+    if journaled:
+        journal.add(source_file, destination_file)
+    else:
+        s3_stubber.stub_copy_object(
+            "bucket", "cookies/Anomaly/anomaly-1.jpg", dest_bucket_name, dest_key
+        )
+        s3_stubber.stub_head_object(dest_bucket_name, dest_key)
+
+    entry_json = process_json_line(
+        s3_client, json_line, "train", destination_folder, journal
+    )
+
+    assert entry_json["source-ref"] == destination_file
+    assert (source_file, destination_file) in journal
+    journal.close()
+
+
+def test_write_manifest_file_resume(make_stubber, tmp_path):
+    lookoutvision_client = boto3.client("lookoutvision")
+    lookoutvision_stubber = make_stubber(lookoutvision_client)
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
+    project_name = "test-project"
+    s3_path = "s3://dest-bucket/stubber_test/"
+    dest_bucket_name = "dest-bucket"
+    manifest_key = "stubber_test/datasets/train.manifest"
+    journal = CopyJournal(tmp_path / "train.journal")
+    journal.add(
+        "s3://bucket/cookies/Anomaly/anomaly-1.jpg",
+        f"{s3_path}train/images/cookies/Anomaly/anomaly-1.jpg",
+    )
+
+    with open("test/test_manifests/updates.manifest", encoding="utf-8") as json_file:
+        json_lines = json_file.read()
+
+    lookoutvision_stubber.stub_list_dataset_entries(project_name, "train", json_lines)
+    s3_stubber.stub_put_object(dest_bucket_name, manifest_key)
+    s3_stubber.stub_head_object(dest_bucket_name, manifest_key)
+
+    write_manifest_file(
+        lookoutvision_client,
+        s3_client,
+        project_name,
+        "train",
+        s3_path,
+        journal=journal,
+    )
+    journal.close()
+
+
+class FakeLookoutVisionClient:
+    """
+    Lists dataset entries one to a page. Before each page, it records how many
+    entries have been listed and how many of their copies have finished.
+    """
+
+    def __init__(self, entries, s3_client):
+        self.entries = entries
+        self.s3_client = s3_client
+        self.ahead = []
+
+    def get_paginator(self, operation_name):
+        return self
+
+    def paginate(self, **kwargs):
+        for listed, entry in enumerate(self.entries):
+            self.ahead.append(listed - self.s3_client.finished())
+            yield {"DatasetEntries": [entry]}
+
+
+class FakeS3Client:
+    """
+    Copies objects after a random delay, so that copies finish out of order. It
+    can be called from several threads at once, unlike a Stubber.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.copied = []
+        self.failed = []
+        self.manifest = None
+        self._lock = threading.Lock()
+
+    def finished(self):
+        with self._lock:
+            return len(self.copied) + len(self.failed)
+
+    def copy_object(self, Bucket, Key, CopySource):
+        time.sleep(random.uniform(0, 0.01))
+        error_code = self.errors.get(CopySource["Key"])
+        with self._lock:
+            if error_code is not None:
+                self.failed.append(CopySource["Key"])
+                raise ClientError(
+                    {"Error": {"Code": error_code, "Message": "Test error"}},
+                    "CopyObject",
+                )
+            self.copied.append(CopySource["Key"])
+
+    def put_object(self, Bucket, Key, Body):
+        self.manifest = Body.read().decode()
+
+    def get_waiter(self, waiter_name):
+        return self
+
+    def wait(self, **kwargs):
+        pass
+
+
+def make_entries(count):
+    return [
+        json.dumps({"source-ref": f"s3://bucket/images/image-{index}.jpg"})
+        for index in range(count)
+    ]
+
+
+def test_write_manifest_file_order(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries = make_entries(40)
+    s3_client = FakeS3Client({"images/image-7.jpg": "404"})
+    lookoutvision_client = FakeLookoutVisionClient(entries, s3_client)
+    max_copies = 3
+
+    write_manifest_file(
+        lookoutvision_client,
+        s3_client,
+        "test-project",
+        "train",
+        "s3://dest-bucket/export/",
+        max_copies=max_copies,
+    )
+
+    # Entries are written in the order they are listed, and the entry whose image
+    # is not found is left out.
+    assert [
+        json.loads(line)["source-ref"] for line in s3_client.manifest.splitlines()
+    ] == [
+        f"s3://dest-bucket/export/train/images/images/image-{index}.jpg"
+        for index in range(40)
+        if index != 7
+    ]
+    # Listing never gets more than twice as many entries ahead as there are copies.
+    assert max(lookoutvision_client.ahead) <= 2 * max_copies
+
+
+def test_write_manifest_file_cancels_on_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    entries = make_entries(40)
+    s3_client = FakeS3Client({"images/image-3.jpg": "AccessDenied"})
+    lookoutvision_client = FakeLookoutVisionClient(entries, s3_client)
+    max_copies = 2
+
+    with pytest.raises(ClientError) as exc_info:
+        write_manifest_file(
+            lookoutvision_client,
+            s3_client,
+            "test-project",
+            "train",
+            "s3://dest-bucket/export/",
+            max_copies=max_copies,
+        )
+
+    assert exc_info.value.response["Error"]["Code"] == "AccessDenied"
+    # Listing stops at the error and copies that have not started are cancelled.
+    assert len(lookoutvision_client.ahead) <= 4 + 2 * max_copies
+    assert s3_client.finished() <= 4 + 2 * max_copies
+    assert s3_client.manifest is None
@@ -20,7 +20,7 @@ import os
 
 import boto3
 from botocore.exceptions import ClientError
-from threading import Thread
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # Import the wrapper for the service functionality.
 from medicalimaging import MedicalImagingWrapper
@@ -55,6 +55,10 @@ IDC_IMAGE_CHOICES = [
 
 IMPORT_JOB_MANIFEST_FILE_NAME = "job-output-manifest.json"
 
+# Objects larger than this are copied in parts of MULTIPART_CHUNKSIZE bytes.
+MULTIPART_THRESHOLD = 256 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 128 * 1024 * 1024
+
 
 class MedicalImagingWorkflowScenario:
     input_bucket_name = ""
@@ -66,6 +70,8 @@ class MedicalImagingWorkflowScenario:
         self.medical_imaging_wrapper = medical_imaging_wrapper
         self.s3_client = s3_client
         self.cf_resource = cf_resource
+        self.multipart_threshold = MULTIPART_THRESHOLD
+        self.multipart_chunksize = MULTIPART_CHUNKSIZE
 
     def run_scenario(self):
         print("-" * 88)
@@ -133,8 +139,13 @@ class MedicalImagingWorkflowScenario:
             f"\t\tto the folder {input_directory}/{from_directory}in the bucket {self.input_bucket_name}."
         )
         q.ask("\t\tPress Enter to start the copy.")
+        os.makedirs("output", exist_ok=True)
         self.copy_images(
-            IDC_S3_BUCKET_NAME, from_directory, self.input_bucket_name, input_directory
+            IDC_S3_BUCKET_NAME,
+            from_directory,
+            self.input_bucket_name,
+            input_directory,
+            checkpoint_file=f"output/copy_{from_directory}.checkpoint",
         )
 
         print(
@@ -203,7 +214,7 @@ class MedicalImagingWorkflowScenario:
         all_image_frame_ids = []
         for image_set in image_sets:
             image_frames = self.medical_imaging_wrapper.get_image_frames_for_image_set(
-                self.data_store_id, image_set, out_dir
+                self.data_store_id, image_set
             )
 
             all_image_frame_ids.extend(image_frames)
@@ -248,45 +259,180 @@ class MedicalImagingWorkflowScenario:
         print("-" * 88)
 
     # snippet-start:[python.example_code.medical-imaging.workflow.copy]
-    def copy_single_object(self, key, source_bucket, target_bucket, target_directory):
+    def copy_single_object(
+        self, key, source_bucket, target_bucket, target_directory, size=0
+    ):
         """
-        Copies a single object from a source to a target bucket.
+        Copies a single object from a source to a target bucket. Objects larger
+        than the multipart threshold are copied in parts.
 
         :param key: The key of the object to copy.
         :param source_bucket: The source bucket for the copy.
         :param target_bucket: The target bucket for the copy.
         :param target_directory: The target directory for the copy.
+        :param size: The size of the object in bytes.
         """
         new_key = target_directory + "/" + key
         copy_source = {"Bucket": source_bucket, "Key": key}
-        self.s3_client.copy_object(
-            CopySource=copy_source, Bucket=target_bucket, Key=new_key
-        )
-        print(f"\n\t\tCopying {key}.")
+        if size > self.multipart_threshold:
+            self.copy_multipart_object(copy_source, target_bucket, new_key, size)
+        else:
+            self.s3_client.copy_object(
+                CopySource=copy_source, Bucket=target_bucket, Key=new_key
+            )
+
+    def copy_multipart_object(self, copy_source, target_bucket, new_key, size):
+        """
+        Copies a large object in parts with a multipart upload. When a part fails
+        to copy, the upload is aborted so that its parts don't incur storage charges.
+
+        :param copy_source: The bucket and key of the object to copy.
+        :param target_bucket: The target bucket for the copy.
+        :param new_key: The key of the copy in the target bucket.
+        :param size: The size of the object in bytes.
+        """
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=target_bucket, Key=new_key
+        )["UploadId"]
+        try:
+            parts = []
+            for part_number, start in enumerate(
+                range(0, size, self.multipart_chunksize), start=1
+            ):
+                end = min(start + self.multipart_chunksize, size) - 1
+                response = self.s3_client.upload_part_copy(
+                    Bucket=target_bucket,
+                    Key=new_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    CopySource=copy_source,
+                    CopySourceRange=f"bytes={start}-{end}",
+                )
+                parts.append(
+                    {
+                        "PartNumber": part_number,
+                        "ETag": response["CopyPartResult"]["ETag"],
+                    }
+                )
+            self.s3_client.complete_multipart_upload(
+                Bucket=target_bucket,
+                Key=new_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except ClientError:
+            self.s3_client.abort_multipart_upload(
+                Bucket=target_bucket, Key=new_key, UploadId=upload_id
+            )
+            raise
+
+    def list_objects(self, bucket, prefix):
+        """
+        Lists all objects under a prefix, one page at a time.
+
+        :param bucket: The bucket to list.
+        :param prefix: The prefix of the objects to list.
+        :return: A generator of the listed objects.
+        """
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            yield from page.get("Contents", [])
 
     def copy_images(
-        self, source_bucket, source_directory, target_bucket, target_directory
+        self,
+        source_bucket,
+        source_directory,
+        target_bucket,
+        target_directory,
+        checkpoint_file=None,
+        max_workers=10,
+        max_in_flight=None,
     ):
         """
         Copies the images from the source to the target bucket using multiple threads.
 
+        Objects are listed one page at a time and copied by a pool of threads, with
+        a limit on the number of copies that are queued at once. When a checkpoint
+        file is specified, the key of each copied object is appended to it, and
+        objects that are already listed in it are skipped, so a copy that fails
+        partway through can be resumed by running it again.
+
         :param source_bucket: The source bucket for the images.
         :param source_directory: Directory within the source bucket.
         :param target_bucket: The target bucket for the images.
         :param target_directory: Directory within the target bucket.
+        :param checkpoint_file: The file that records the keys of copied objects.
+        :param max_workers: The number of threads that copy objects.
+        :param max_in_flight: The maximum number of copies that are queued or
+                              running at once. Defaults to twice the number of threads.
         """
-
-        # Get list of all objects in source bucket.
-        list_response = self.s3_client.list_objects_v2(
-            Bucket=source_bucket, Prefix=source_directory
+        if max_in_flight is None:
+            max_in_flight = max_workers * 2
+        completed = set()
+        if checkpoint_file is not None and os.path.exists(checkpoint_file):
+            with open(checkpoint_file) as checkpoint:
+                completed = {line.rstrip("\n") for line in checkpoint}
+            print(f"\t\tResuming copy. {len(completed)} objects were already copied.")
+
+        copied = 0
+        copied_bytes = 0
+        errors = []
+        start_time = time.perf_counter()
+        checkpoint = open(checkpoint_file, "a") if checkpoint_file else None
+
+        def finish(done):
+            nonlocal copied, copied_bytes
+            for future in done:
+                key, size = in_flight.pop(future)
+                try:
+                    future.result()
+                except ClientError as err:
+                    logger.error("Couldn't copy %s: %s", key, err)
+                    errors.append(err)
+                    continue
+                copied += 1
+                copied_bytes += size
+                if checkpoint is not None:
+                    checkpoint.write(key + "\n")
+                    checkpoint.flush()
+                if copied % 100 == 0:
+                    print(
+                        f"\t\tCopied {copied} objects "
+                        f"({copied_bytes / 1_000_000:.1f} MB)."
+                    )
+
+        in_flight = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for obj in self.list_objects(source_bucket, source_directory):
+                    if obj["Key"] in completed:
+                        continue
+                    future = executor.submit(
+                        self.copy_single_object,
+                        obj["Key"],
+                        source_bucket,
+                        target_bucket,
+                        target_directory,
+                        obj.get("Size", 0),
+                    )
+                    in_flight[future] = (obj["Key"], obj.get("Size", 0))
+                    # Wait for a free slot before listing more objects, so the
+                    # queue of copies stays bounded however many objects there are.
+                    if len(in_flight) >= max_in_flight:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        finish(done)
+                finish(wait(in_flight).done)
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"\t\tCopied {copied} objects ({copied_bytes / 1_000_000:.1f} MB) "
+            f"in {elapsed:.1f} seconds."
         )
-        objs = list_response["Contents"]
-        keys = [obj["Key"] for obj in objs]
-
-        # Copy the objects in the bucket.
-        for key in keys:
-            self.copy_single_object(key, source_bucket, target_bucket, target_directory)
-
+        if errors:
+            raise errors[0]
         print("\t\tDone copying all objects.")
 
     # snippet-end:[python.example_code.medical-imaging.workflow.copy]
@@ -3,17 +3,136 @@
 
 import logging
 import boto3
-import os
 import gzip
 import zlib
 import openjpeg
 import json
+import ijson
 import jmespath
 import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
 from botocore.exceptions import ClientError
 
 logger = logging.getLogger(__name__)
 
+# The number of image frames that are downloaded at the same time.
+DEFAULT_MAX_FETCH_WORKERS = 8
+
+
+def decode_image_frame_checksum(image_blob):
+    """
+    Decodes an HTJ2K image frame in memory and calculates the CRC32 checksum of
+    the decoded pixels. This is a module function so that it can run in a
+    separate process.
+
+    :param image_blob: The encoded image frame.
+    :return: The CRC32 checksum of the decoded bitmap.
+    """
+    # Use format 2 for the JPH data.
+    return zlib.crc32(openjpeg.utils.decode(image_blob, 2))
+
+
+class ImageFrame:
+    """The information from image set metadata that identifies and validates an image frame."""
+
+    __slots__ = (
+        "image_set_id",
+        "image_frame_id",
+        "rescale_intercept",
+        "rescale_slope",
+        "min_pixel_value",
+        "max_pixel_value",
+        "full_resolution_checksum",
+    )
+
+    def __init__(
+        self,
+        image_set_id,
+        image_frame_id,
+        rescale_intercept,
+        rescale_slope,
+        min_pixel_value,
+        max_pixel_value,
+        full_resolution_checksum,
+    ):
+        self.image_set_id = image_set_id
+        self.image_frame_id = image_frame_id
+        self.rescale_intercept = rescale_intercept
+        self.rescale_slope = rescale_slope
+        self.min_pixel_value = min_pixel_value
+        self.max_pixel_value = max_pixel_value
+        self.full_resolution_checksum = full_resolution_checksum
+
+    def __repr__(self):
+        return f"ImageFrame({self.image_set_id!r}, {self.image_frame_id!r})"
+
+
+def iter_image_frames(metadata_stream, image_set_id):
+    """
+    Parses image set metadata incrementally and yields its image frames. The
+    metadata is read in small chunks and only one instance is held in memory at a
+    time, so memory use does not grow with the size of a series.
+
+    The image frames are found at Study.Series.<series UID>.Instances.<instance UID>.
+    UIDs contain dots, so the path to each value is tracked as a list of keys
+    instead of through the dotted prefixes that ijson provides.
+
+    :param metadata_stream: A file-like object that contains the metadata JSON.
+    :param image_set_id: The ID of the image set.
+    :return: A generator of ImageFrame objects.
+    """
+    # The key of each enclosing map, or None for an enclosing array.
+    keys = []
+    builder = None
+    builder_depth = 0
+    for _, event, value in ijson.parse(metadata_stream, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                builder_depth += 1
+            elif event in ("end_map", "end_array"):
+                builder_depth -= 1
+                if builder_depth == 0:
+                    yield from _instance_image_frames(builder.value, image_set_id)
+                    builder = None
+        elif event == "map_key":
+            keys[-1] = value
+        elif event == "start_map" and (
+            len(keys) == 5
+            and keys[:2] == ["Study", "Series"]
+            and keys[3] == "Instances"
+        ):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            builder_depth = 1
+        elif event in ("start_map", "start_array"):
+            keys.append(None)
+        elif event in ("end_map", "end_array"):
+            keys.pop()
+
+
+def _instance_image_frames(instance, image_set_id):
+    dicom = instance.get("DICOM", {})
+    for image_frame in instance.get("ImageFrames", []):
+        checksum = max(
+            image_frame["PixelDataChecksumFromBaseToFullResolution"],
+            key=lambda checksum: checksum["Width"],
+        )
+        yield ImageFrame(
+            image_set_id,
+            image_frame["ID"],
+            dicom.get("RescaleIntercept"),
+            dicom.get("RescaleSlope"),
+            image_frame["MinPixelValue"],
+            image_frame["MaxPixelValue"],
+            checksum["Checksum"],
+        )
+
 
 # snippet-start:[python.example_code.medical-imaging.MedicalImagingWorkflowWrapper.class]
 # snippet-start:[python.example_code.medical-imaging.MedicalImagingWorkflowWrapper.decl]
@@ -194,45 +313,30 @@ class MedicalImagingWrapper:
     # snippet-end:[python.example_code.medical-imaging.workflow.SearchImageSets]
 
     # snippet-start:[python.example_code.medical-imaging.workflow.GetImageFrames]
-    def get_image_frames_for_image_set(self, datastore_id, image_set_id, out_directory):
+    def get_image_frames_for_image_set(self, datastore_id, image_set_id):
         """
         Get the image frames for an image set.
 
         :param datastore_id: The ID of the data store.
         :param image_set_id: The ID of the image set.
-        :param out_directory: The directory to save the file.
         :return: The image frames.
         """
-        image_frames = []
-        file_name = os.path.join(out_directory, f"{image_set_id}_metadata.json.gzip")
-        file_name = file_name.replace("/", "\\\\")
-        self.get_image_set_metadata(file_name, datastore_id, image_set_id)
+        return list(self.iter_image_frames_for_image_set(datastore_id, image_set_id))
+
+    def iter_image_frames_for_image_set(self, datastore_id, image_set_id):
+        """
+        Get the image frames for an image set as they are parsed. The gzipped
+        metadata is decompressed and parsed as it streams from the response, without
+        being written to a file or loaded into memory as a whole.
+
+        :param datastore_id: The ID of the data store.
+        :param image_set_id: The ID of the image set.
+        :return: A generator of ImageFrame objects.
+        """
         try:
-            with gzip.open(file_name, "rb") as f_in:
-                doc = json.load(f_in)
-            instances = jmespath.search("Study.Series.*.Instances[].*[]", doc)
-            for instance in instances:
-                rescale_slope = jmespath.search("DICOM.RescaleSlope", instance)
-                rescale_intercept = jmespath.search("DICOM.RescaleIntercept", instance)
-                image_frames_json = jmespath.search("ImageFrames[][]", instance)
-                for image_frame in image_frames_json:
-                    checksum_json = jmespath.search(
-                        "max_by(PixelDataChecksumFromBaseToFullResolution, &Width)",
-                        image_frame,
-                    )
-                    image_frame_info = {
-                        "imageSetId": image_set_id,
-                        "imageFrameId": image_frame["ID"],
-                        "rescaleIntercept": rescale_intercept,
-                        "rescaleSlope": rescale_slope,
-                        "minPixelValue": image_frame["MinPixelValue"],
-                        "maxPixelValue": image_frame["MaxPixelValue"],
-                        "fullResolutionChecksum": checksum_json["Checksum"],
-                    }
-                    image_frames.append(image_frame_info)
-            return image_frames
-        except TypeError:
-            return {}
+            image_set_metadata = self.medical_imaging_client.get_image_set_metadata(
+                imageSetId=image_set_id, datastoreId=datastore_id
+            )
         except ClientError as err:
             logger.error(
                 "Couldn't get image frames for image set. Here's why: %s: %s",
@@ -240,7 +344,10 @@ class MedicalImagingWrapper:
                 err.response["Error"]["Message"],
             )
             raise
-        return image_frames
+        with gzip.GzipFile(
+            fileobj=image_set_metadata["imageSetMetadataBlob"]
+        ) as metadata_stream:
+            yield from iter_image_frames(metadata_stream, image_set_id)
 
     # snippet-end:[python.example_code.medical-imaging.workflow.GetImageFrames]
 
@@ -279,38 +386,120 @@ class MedicalImagingWrapper:
 
     # snippet-start:[python.example_code.medical-imaging.workflow.downloadAndCheck]
     def download_decode_and_check_image_frames(
-        self, data_store_id, image_frames, out_directory
+        self,
+        data_store_id,
+        image_frames,
+        out_directory,
+        max_fetch_workers=DEFAULT_MAX_FETCH_WORKERS,
+        decode_processes=None,
     ):
         """
         Downloads image frames, decodes them, and uses the checksum to validate
         the decoded images.
 
         :param data_store_id: The HealthImaging data store ID.
-        :param image_frames: A list of dicts containing image frame information.
+        :param image_frames: A list of ImageFrame objects.
         :param out_directory: A directory for the downloaded images.
+        :param max_fetch_workers: The number of image frames to download at the same time.
+        :param decode_processes: The number of processes that decode images. Defaults
+                                 to the number of processors on the machine.
         :return: True if the function succeeded; otherwise, False.
         """
         total_result = True
-        for image_frame in image_frames:
-            image_file_path = f"{out_directory}/image_{image_frame['imageFrameId']}.jph"
-            self.get_pixel_data(
-                image_file_path,
-                data_store_id,
-                image_frame["imageSetId"],
-                image_frame["imageFrameId"],
-            )
-
-            image_array = self.jph_image_to_opj_bitmap(image_file_path)
-            crc32_checksum = image_frame["fullResolutionChecksum"]
-            # Verify checksum.
-            crc32_calculated = zlib.crc32(image_array)
-            image_result = crc32_checksum == crc32_calculated
+        for frame_result in self.iter_checked_image_frames(
+            data_store_id,
+            image_frames,
+            out_directory,
+            max_fetch_workers=max_fetch_workers,
+            decode_processes=decode_processes,
+        ):
+            image_result = frame_result["checksumVerified"]
             print(
-                f"\t\tImage checksum verified for {image_frame['imageFrameId']}: {image_result }"
+                f"\t\tImage checksum verified for {frame_result['imageFrameId']}: {image_result}"
             )
             total_result = total_result and image_result
         return total_result
 
+    def iter_checked_image_frames(
+        self,
+        data_store_id,
+        image_frames,
+        out_directory=None,
+        max_fetch_workers=DEFAULT_MAX_FETCH_WORKERS,
+        decode_processes=None,
+    ):
+        """
+        Downloads, decodes, and validates image frames as a pipeline. Downloads run
+        on a pool of threads and overlap with each other, and each downloaded frame
+        is decoded in memory on a pool of processes, so that decoding is not
+        limited by the global interpreter lock. The number of frames that are
+        downloaded but not yet decoded is bounded, so memory use stays flat for
+        image sets with thousands of frames.
+
+        :param data_store_id: The HealthImaging data store ID.
+        :param image_frames: An iterable of ImageFrame objects.
+        :param out_directory: When specified, each downloaded image is also written
+                              to a file in this directory.
+        :param max_fetch_workers: The number of image frames to download at the same time.
+        :param decode_processes: The number of processes that decode images. Defaults
+                                 to the number of processors on the machine.
+        :return: A generator that yields the result for each image frame as soon as it
+                 is validated, in the order that validation completes.
+        """
+        max_in_flight = max_fetch_workers * 2
+        image_frames = iter(image_frames)
+        fetches = {}
+        decodes = {}
+        with ThreadPoolExecutor(max_workers=max_fetch_workers) as fetch_executor:
+            with ProcessPoolExecutor(max_workers=decode_processes) as decode_executor:
+                try:
+                    while True:
+                        while len(fetches) + len(decodes) < max_in_flight:
+                            image_frame = next(image_frames, None)
+                            if image_frame is None:
+                                break
+                            future = fetch_executor.submit(
+                                self._fetch_image_frame,
+                                data_store_id,
+                                image_frame,
+                                out_directory,
+                            )
+                            fetches[future] = image_frame
+                        if not fetches and not decodes:
+                            break
+                        done, _ = wait(
+                            [*fetches, *decodes], return_when=FIRST_COMPLETED
+                        )
+                        for future in done:
+                            if future in fetches:
+                                image_frame = fetches.pop(future)
+                                decodes[
+                                    decode_executor.submit(
+                                        decode_image_frame_checksum, future.result()
+                                    )
+                                ] = image_frame
+                            else:
+                                image_frame = decodes.pop(future)
+                                yield {
+                                    "imageSetId": image_frame.image_set_id,
+                                    "imageFrameId": image_frame.image_frame_id,
+                                    "checksumVerified": future.result()
+                                    == image_frame.full_resolution_checksum,
+                                }
+                finally:
+                    for future in [*fetches, *decodes]:
+                        future.cancel()
+
+    def _fetch_image_frame(self, data_store_id, image_frame, out_directory):
+        image_blob = self.get_image_frame_blob(
+            data_store_id, image_frame.image_set_id, image_frame.image_frame_id
+        )
+        if out_directory is not None:
+            image_file_path = f"{out_directory}/image_{image_frame.image_frame_id}.jph"
+            with open(image_file_path, "wb") as f:
+                f.write(image_blob)
+        return image_blob
+
     @staticmethod
     def jph_image_to_opj_bitmap(jph_file):
         """
@@ -359,6 +548,30 @@ class MedicalImagingWrapper:
 
     # snippet-end:[python.example_code.medical-imaging.workflow.GetPixelData]
 
+    def get_image_frame_blob(self, datastore_id, image_set_id, image_frame_id):
+        """
+        Get an image frame's pixel data in memory.
+
+        :param datastore_id: The ID of the data store.
+        :param image_set_id: The ID of the image set.
+        :param image_frame_id: The ID of the image frame.
+        :return: The image frame's HTJ2K encoded pixel data.
+        """
+        try:
+            image_frame = self.medical_imaging_client.get_image_frame(
+                datastoreId=datastore_id,
+                imageSetId=image_set_id,
+                imageFrameInformation={"imageFrameId": image_frame_id},
+            )
+            return image_frame["imageFrameBlob"].read()
+        except ClientError as err:
+            logger.error(
+                "Couldn't get image frame. Here's why: %s: %s",
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            raise
+
     # snippet-start:[python.example_code.medical-imaging.workflow.DeleteImageSet]
     def delete_image_set(self, datastore_id, image_set_id):
         """
@@ -7,10 +7,13 @@ Tests for imaging_set_and_frames workflow.
 
 import boto3
 from botocore.exceptions import ClientError
+import numpy
+import openjpeg
 import pytest
 import os
+import zlib
 
-from medicalimaging import MedicalImagingWrapper
+from medicalimaging import ImageFrame, MedicalImagingWrapper
 from imaging_set_and_frames import MedicalImagingWorkflowScenario
 
 
@@ -186,13 +189,62 @@ def test_get_image_frames_for_image_set(make_stubber, error_code):
     wrapper = MedicalImagingWrapper(medical_imaging_client, s3_client)
     datastore_id = "abcdedf1234567890abcdef123456789"
     image_set_id = "cccccc1234567890abcdef123456789"
-    directory = "output"
+    # Series and instance UIDs contain dots.
+    metadata = {
+        "SchemaVersion": "1.1",
+        "Study": {
+            "DICOM": {"StudyInstanceUID": "1.2.3"},
+            "Series": {
+                "1.2.3.4": {
+                    "DICOM": {"Modality": "CT"},
+                    "Instances": {
+                        f"1.2.3.4.{index}": {
+                            "ImageFrames": [
+                                {
+                                    "ID": f"frame-{index}",
+                                    "MinPixelValue": 0,
+                                    "MaxPixelValue": 4095,
+                                    "PixelDataChecksumFromBaseToFullResolution": [
+                                        {"Width": 256, "Height": 256, "Checksum": 1},
+                                        {"Width": 512, "Height": 512, "Checksum": 2},
+                                        {"Width": 128, "Height": 128, "Checksum": 3},
+                                    ],
+                                }
+                            ],
+                            "DICOM": {"RescaleSlope": 1, "RescaleIntercept": -1024},
+                        }
+                        for index in range(2)
+                    },
+                }
+            },
+        },
+    }
+    medical_imaging_stubber.stub_get_image_set_metadata(
+        datastore_id, image_set_id, metadata=metadata, error_code=error_code
+    )
 
     if error_code is None:
-        medical_imaging_stubber.stub_get_image_set_metadata(
-            datastore_id, image_set_id, error_code=error_code
+        image_frames = wrapper.get_image_frames_for_image_set(
+            datastore_id, image_set_id
         )
-        wrapper.get_image_frames_for_image_set(datastore_id, image_set_id, directory)
+        assert [
+            (
+                image_frame.image_set_id,
+                image_frame.image_frame_id,
+                image_frame.rescale_intercept,
+                image_frame.rescale_slope,
+                image_frame.min_pixel_value,
+                image_frame.max_pixel_value,
+                image_frame.full_resolution_checksum,
+            )
+            for image_frame in image_frames
+        ] == [
+            (image_set_id, f"frame-{index}", -1024, 1, 0, 4095, 2) for index in range(2)
+        ]
+    else:
+        with pytest.raises(ClientError) as exc_info:
+            wrapper.get_image_frames_for_image_set(datastore_id, image_set_id)
+        assert exc_info.value.response["Error"]["Code"] == error_code
 
 
 @pytest.mark.parametrize("error_code", [None, "TestException"])
@@ -242,3 +294,151 @@ def test_delete_image_set(make_stubber, error_code):
         with pytest.raises(ClientError) as exc_info:
             wrapper.delete_image_set(datastore_id, image_set_id)
         assert exc_info.value.response["Error"]["Code"] == error_code
+
+
+@pytest.mark.parametrize("error_code", [None, "TestException"])
+def test_copy_images(make_stubber, tmp_path, error_code):
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
+    scenario = MedicalImagingWorkflowScenario(None, s3_client, None)
+    source_bucket = "source-bucket"
+    target_bucket = "target-bucket"
+    source_directory = "source-dir"
+    pages = [
+        [("source-dir/1.dcm", 10), ("source-dir/2.dcm", 20)],
+        [("source-dir/3.dcm", 30)],
+    ]
+    checkpoint_file = tmp_path / "copy.checkpoint"
+    checkpoint_file.write_text("source-dir/1.dcm\n")
+
+    # A single thread with a single copy in flight keeps the stubbed calls in order.
+    s3_stubber.stub_list_objects_v2(
+        source_bucket, pages[0], prefix=source_directory, next_continuation_token="t1"
+    )
+    s3_stubber.stub_copy_object(
+        source_bucket,
+        "source-dir/2.dcm",
+        target_bucket,
+        "input/source-dir/2.dcm",
+        error_code=error_code,
+    )
+    s3_stubber.stub_list_objects_v2(
+        source_bucket, pages[1], prefix=source_directory, continuation_token="t1"
+    )
+    s3_stubber.stub_copy_object(
+        source_bucket, "source-dir/3.dcm", target_bucket, "input/source-dir/3.dcm"
+    )
+
+    kwargs = {"checkpoint_file": checkpoint_file, "max_workers": 1, "max_in_flight": 1}
+    if error_code is None:
+        scenario.copy_images(
+            source_bucket, source_directory, target_bucket, "input", **kwargs
+        )
+        assert checkpoint_file.read_text().split() == [
+            "source-dir/1.dcm",
+            "source-dir/2.dcm",
+            "source-dir/3.dcm",
+        ]
+    else:
+        with pytest.raises(ClientError) as exc_info:
+            scenario.copy_images(
+                source_bucket, source_directory, target_bucket, "input", **kwargs
+            )
+        assert exc_info.value.response["Error"]["Code"] == error_code
+        assert checkpoint_file.read_text().split() == [
+            "source-dir/1.dcm",
+            "source-dir/3.dcm",
+        ]
+
+
+@pytest.mark.parametrize("error_code", [None, "TestException"])
+def test_copy_single_object_multipart(make_stubber, error_code):
+    s3_client = boto3.client("s3")
+    s3_stubber = make_stubber(s3_client)
+    scenario = MedicalImagingWorkflowScenario(None, s3_client, None)
+    scenario.multipart_threshold = 100
+    scenario.multipart_chunksize = 100
+    source_bucket = "source-bucket"
+    target_bucket = "target-bucket"
+    key = "source-dir/large.dcm"
+    new_key = "input/" + key
+    upload_id = "test-upload-id"
+
+    s3_stubber.stub_create_multipart_upload(target_bucket, new_key, upload_id)
+    s3_stubber.stub_upload_part_copy(
+        source_bucket, key, target_bucket, new_key, upload_id, 1, (0, 99), "etag-1"
+    )
+    s3_stubber.stub_upload_part_copy(
+        source_bucket,
+        key,
+        target_bucket,
+        new_key,
+        upload_id,
+        2,
+        (100, 149),
+        "etag-2",
+        error_code=error_code,
+    )
+    if error_code is None:
+        s3_stubber.stub_complete_multipart_upload(
+            target_bucket, new_key, upload_id, ["etag-1", "etag-2"]
+        )
+        scenario.copy_single_object(key, source_bucket, target_bucket, "input", 150)
+    else:
+        s3_stubber.stub_abort_multipart_upload(target_bucket, new_key, upload_id)
+        with pytest.raises(ClientError) as exc_info:
+            scenario.copy_single_object(key, source_bucket, target_bucket, "input", 150)
+        assert exc_info.value.response["Error"]["Code"] == error_code
+
+
+@pytest.mark.parametrize("error_code", [None, "TestException"])
+def test_download_decode_and_check_image_frames(make_stubber, tmp_path, error_code):
+    medical_imaging_client = boto3.client("medical-imaging")
+    medical_imaging_stubber = make_stubber(medical_imaging_client)
+    wrapper = MedicalImagingWrapper(medical_imaging_client, None)
+    datastore_id = "abcdedf1234567890abcdef123456789"
+    image_set_id = "cccccc1234567890abcdef123456789"
+    pixels = (numpy.arange(64 * 64, dtype=numpy.uint16) % 4000).reshape(64, 64)
+    image_blob = bytes(openjpeg.encode(pixels, bits_stored=12, codec_format=1))
+    image_frames = [
+        ImageFrame(
+            image_set_id, f"frame-{index}", 0, 1, 0, 4000, zlib.crc32(pixels) + index
+        )
+        for index in range(2)
+    ]
+    if error_code is not None:
+        image_frames = image_frames[:1]
+    # A single download at a time keeps the stubbed calls in order.
+    for image_frame in image_frames:
+        medical_imaging_stubber.stub_get_pixel_data(
+            datastore_id,
+            image_set_id,
+            image_frame.image_frame_id,
+            data_string=image_blob,
+            error_code=error_code,
+        )
+
+    if error_code is None:
+        results = list(
+            wrapper.iter_checked_image_frames(
+                datastore_id,
+                image_frames,
+                tmp_path,
+                max_fetch_workers=1,
+                decode_processes=1,
+            )
+        )
+        assert sorted(
+            (result["imageFrameId"], result["checksumVerified"]) for result in results
+        ) == [("frame-0", True), ("frame-1", False)]
+        assert (tmp_path / "image_frame-0.jph").read_bytes() == image_blob
+    else:
+        with pytest.raises(ClientError) as exc_info:
+            wrapper.download_decode_and_check_image_frames(
+                datastore_id,
+                image_frames,
+                tmp_path,
+                max_fetch_workers=1,
+                decode_processes=1,
+            )
+        assert exc_info.value.response["Error"]["Code"] == error_code
@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class AcmStubber(ExampleStubber):
+class AcmStubber(ExampleStubber, service_name="acm"):
     """
     A class that implements stub functions used by ACM unit tests.
 
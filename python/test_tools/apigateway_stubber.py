@@ -13,7 +13,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class ApiGatewayStubber(ExampleStubber):
+class ApiGatewayStubber(ExampleStubber, service_name="apigateway"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon API Gateway unit tests.
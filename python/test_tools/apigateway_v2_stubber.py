@@ -13,7 +13,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class ApiGatewayV2Stubber(ExampleStubber):
+class ApiGatewayV2Stubber(ExampleStubber, service_name="apigatewayv2"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon API Gateway v2 unit tests.
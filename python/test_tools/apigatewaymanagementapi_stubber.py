@@ -11,7 +11,9 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class ApiGatewayManagementApiStubber(ExampleStubber):
+class ApiGatewayManagementApiStubber(
+    ExampleStubber, service_name="apigatewaymanagementapi"
+):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon API Gateway Management API unit tests.
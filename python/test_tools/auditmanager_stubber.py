@@ -8,7 +8,7 @@ Stub functions that are used by the AWS Audit Manager unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class AuditManagerStubber(ExampleStubber):
+class AuditManagerStubber(ExampleStubber, service_name="auditmanager"):
     """
     A class that implements stub functions used by Audit Manager unit tests.
     """
@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon EC2 Auto Scaling unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class AutoScalingStubber(ExampleStubber):
+class AutoScalingStubber(ExampleStubber, service_name="autoscaling"):
     """
     A class that implements stub functions used by Amazon EC2 Auto Scaling unit tests.
     """
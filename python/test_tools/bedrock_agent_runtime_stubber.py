@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class BedrockAgentRuntimeStubber(ExampleStubber):
+class BedrockAgentRuntimeStubber(ExampleStubber, service_name="bedrock-agent-runtime"):
     """
     A class that implements stub functions used by Agents for Amazon Bedrock Runtime unit tests.
     """
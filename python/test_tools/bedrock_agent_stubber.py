@@ -8,7 +8,7 @@ Stub functions that are used by the Agents for Amazon Bedrock unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class BedrockAgentStubber(ExampleStubber):
+class BedrockAgentStubber(ExampleStubber, service_name="bedrock-agent"):
     """
     A class that implements stub functions used by Amazon Bedrock Agent unit tests.
     """
@@ -13,7 +13,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class BedrockRuntimeStubber(ExampleStubber):
+class BedrockRuntimeStubber(ExampleStubber, service_name="bedrock-runtime"):
     """
     A class that implements stub functions used by Amazon Bedrock Runtime unit tests.
     """
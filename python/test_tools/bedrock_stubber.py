@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon Bedrock unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class BedrockStubber(ExampleStubber):
+class BedrockStubber(ExampleStubber, service_name="bedrock"):
     """
     A class that implements stub functions used by Amazon Bedrock unit tests.
     """
@@ -0,0 +1,78 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Measures how much startup time each PyTest session saves because the stubber
+factory imports stubber modules lazily.
+
+Each measurement starts a fresh Python process and imports the common fixtures,
+either alone, with a single stubber (a typical test folder), or with every
+stubber module (what each session paid when the factory imported all stubbers
+up front). The per-session difference is then scaled by the number of test
+folders that run_all_tests runs as separate sessions.
+
+This script must be run from the root of the GitHub repo.
+
+    py -m python.test_tools.benchmark_stubber_imports
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# This is needed so Python can find test_tools on the path.
+sys.path.append("python")
+from test_tools.run_all_tests import find_test_dirs
+from test_tools.stubber_factory import STUBBER_MODULES
+
+
+def time_imports(modules, repeat):
+    """
+    Times a fresh interpreter that imports the common fixtures and a set of modules.
+
+    :param modules: The modules to import after the common fixtures.
+    :param repeat: The number of processes to time.
+    :return: The median wall time of the processes, in seconds.
+    """
+    code = "; ".join(
+        ["import test_tools.fixtures.common"] + [f"import {m}" for m in modules]
+    )
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd="python", check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=10,
+        help="The number of processes to time for each measurement.",
+    )
+    args = parser.parse_args()
+
+    folder_count = len(find_test_dirs())
+    fixtures_only = time_imports([], args.repeat)
+    one_stubber = time_imports([STUBBER_MODULES["s3"]], args.repeat)
+    all_stubbers = time_imports(list(STUBBER_MODULES.values()), args.repeat)
+    saved = all_stubbers - one_stubber
+
+    print(f"Test folders:                 {folder_count}")
+    print(f"Fixtures only:                {fixtures_only * 1000:8.1f} ms")
+    print(f"Fixtures and one stubber:     {one_stubber * 1000:8.1f} ms")
+    print(
+        f"Fixtures and all {len(STUBBER_MODULES)} stubbers: "
+        f"{all_stubbers * 1000:8.1f} ms"
+    )
+    print(f"Saved per session:            {saved * 1000:8.1f} ms")
+    print(f"Saved across all sessions:    {saved * folder_count:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
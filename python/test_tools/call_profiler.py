@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Counts and times the service calls that a test makes through Boto 3 clients,
+by using the botocore event hooks.
+
+For each service operation, the profiler records:
+
+* calls: The number of times the operation was called.
+* build_time: The time spent building the request, which includes parameter
+  validation and serialization.
+* code_time: The wall time spent in the code under test between the end of the
+  previous call and the start of this one.
+
+A high call count for a single operation in a single test, such as a get_item
+inside a loop, often means that the example could batch its requests.
+"""
+
+import threading
+import time
+import uuid
+
+
+class CallProfiler:
+    """Collects call statistics for one test across any number of clients."""
+
+    def __init__(self, test_id):
+        """
+        :param test_id: The ID of the test that is profiled.
+        """
+        self.test_id = test_id
+        self.operations = {}
+        self._last_call_end = None
+        self._lock = threading.Lock()
+        self._hook_id = f"call-profiler-{uuid.uuid4()}"
+
+    def attach(self, client):
+        """
+        Registers the event hooks that time the requests of a client.
+
+        :param client: A Boto 3 service client.
+        """
+        events = client.meta.events
+        events.register_first(
+            "provide-client-params.*.*",
+            self._start_call,
+            unique_id=f"{self._hook_id}-start",
+        )
+        # Registered first so that it runs before a stubber's response handler,
+        # which ends the event when it returns a response.
+        events.register_first(
+            "before-call.*.*", self._end_build, unique_id=f"{self._hook_id}-build"
+        )
+        events.register(
+            "after-call.*.*", self._end_call, unique_id=f"{self._hook_id}-end"
+        )
+
+    def detach(self, client):
+        """
+        Unregisters the event hooks from a client.
+
+        :param client: A Boto 3 service client.
+        """
+        events = client.meta.events
+        events.unregister(
+            "provide-client-params.*.*", unique_id=f"{self._hook_id}-start"
+        )
+        events.unregister("before-call.*.*", unique_id=f"{self._hook_id}-build")
+        events.unregister("after-call.*.*", unique_id=f"{self._hook_id}-end")
+
+    def _start_call(self, model, context, **kwargs):
+        now = time.perf_counter()
+        context["profiler_start"] = now
+        with self._lock:
+            stats = self._stats(model)
+            stats["calls"] += 1
+            if self._last_call_end is not None:
+                stats["code_time"] += now - self._last_call_end
+
+    def _end_build(self, model, context, **kwargs):
+        if "profiler_start" in context:
+            build_time = time.perf_counter() - context["profiler_start"]
+            with self._lock:
+                self._stats(model)["build_time"] += build_time
+
+    def _end_call(self, model, context, **kwargs):
+        with self._lock:
+            self._last_call_end = time.perf_counter()
+
+    def _stats(self, model):
+        key = f"{model.service_model.service_name}.{model.name}"
+        if key not in self.operations:
+            self.operations[key] = {"calls": 0, "build_time": 0.0, "code_time": 0.0}
+        return self.operations[key]
+
+    def report(self):
+        """
+        :return: The statistics of the test, as a dict that can be written as JSON.
+        """
+        return {"test": self.test_id, "operations": self.operations}
@@ -0,0 +1,229 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A cassette that records the requests and responses that Boto 3 clients exchange
+with AWS, and replays them later without calling AWS.
+
+Interactions are indexed by service operation and by a hash of the normalized
+request parameters. During replay, a request that matches a recorded hash gets
+the responses recorded for that hash, in recorded order. A request that doesn't
+match, such as one that contains a generated unique name, gets the next unused
+response that was recorded for the same operation.
+"""
+
+import base64
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import uuid
+
+from botocore.awsrequest import AWSResponse
+from botocore.response import StreamingBody
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+
+class CassetteMiss(Exception):
+    """Raised when a replayed request has no recorded response."""
+
+    pass
+
+
+def _encode(value):
+    """
+    Converts a value from a Boto 3 response into a form that can be written as JSON.
+    Streaming bodies are read and replaced by an in-memory copy so that the
+    caller can still read them.
+    """
+    if isinstance(value, dict):
+        return {key: _encode(val) for key, val in value.items()}
+    elif isinstance(value, list):
+        return [_encode(val) for val in value]
+    elif isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    elif isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode()}
+    elif isinstance(value, StreamingBody):
+        return {"__stream__": base64.b64encode(value.read()).decode()}
+    return value
+
+
+def _decode(value):
+    """Converts a recorded value back into the form that Boto 3 returns."""
+    if isinstance(value, dict):
+        if "__datetime__" in value:
+            return datetime.datetime.fromisoformat(value["__datetime__"])
+        elif "__bytes__" in value:
+            return base64.b64decode(value["__bytes__"])
+        elif "__stream__" in value:
+            data = base64.b64decode(value["__stream__"])
+            return StreamingBody(io.BytesIO(data), len(data))
+        return {key: _decode(val) for key, val in value.items()}
+    elif isinstance(value, list):
+        return [_decode(val) for val in value]
+    return value
+
+
+def _hash_default(value):
+    """Reduces values that JSON can't represent to stable strings for hashing."""
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    elif isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    # File-like objects can't be read without consuming them.
+    return type(value).__name__
+
+
+def params_hash(model, params):
+    """
+    Computes a stable hash of the parameters of a request. Idempotency tokens are
+    left out because Boto 3 generates a new one for every request.
+
+    :param model: The botocore operation model of the request.
+    :param params: The request parameters.
+    :return: The hash as a short hex string.
+    """
+    members = model.input_shape.members if model.input_shape is not None else {}
+    normalized = {
+        key: val
+        for key, val in params.items()
+        if not (key in members and members[key].metadata.get("idempotencyToken"))
+    }
+    canonical = json.dumps(
+        normalized, sort_keys=True, separators=(",", ":"), default=_hash_default
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+class Cassette:
+    """
+    Records and replays the interactions of any number of Boto 3 clients.
+    A single cassette is typically used for a single test.
+    """
+
+    def __init__(self, path, record=False):
+        """
+        :param path: The path of the cassette file.
+        :param record: When True, let requests through to AWS and record them.
+                       Otherwise, replay recorded responses.
+        """
+        self.path = path
+        self.record = record
+        self.interactions = {}
+        self._used = set()
+        self._hook_id = f"cassette-{uuid.uuid4()}"
+        if not record:
+            self.load()
+
+    def load(self):
+        """Loads recorded interactions from the cassette file."""
+        try:
+            with open(self.path) as cassette_file:
+                data = json.load(cassette_file)
+        except FileNotFoundError:
+            raise CassetteMiss(
+                f"No cassette at {self.path}. Run the test with "
+                f"--stub-cassettes=record to record one."
+            )
+        self.interactions = data["interactions"]
+
+    def save(self):
+        """Writes recorded interactions to the cassette file."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as cassette_file:
+            json.dump(
+                {"version": CASSETTE_VERSION, "interactions": self.interactions},
+                cassette_file,
+                separators=(",", ":"),
+            )
+
+    def attach(self, client):
+        """
+        Registers the event hooks that record or replay the requests of a client.
+
+        :param client: A Boto 3 service client.
+        """
+        events = client.meta.events
+        events.register(
+            "before-parameter-build.*.*",
+            self._keep_params,
+            unique_id=f"{self._hook_id}-params",
+        )
+        if self.record:
+            events.register(
+                "after-call.*.*", self._record, unique_id=f"{self._hook_id}-record"
+            )
+        else:
+            events.register(
+                "before-call.*.*", self._replay, unique_id=f"{self._hook_id}-replay"
+            )
+
+    def detach(self, client):
+        """
+        Unregisters the event hooks from a client.
+
+        :param client: A Boto 3 service client.
+        """
+        events = client.meta.events
+        events.unregister(
+            "before-parameter-build.*.*", unique_id=f"{self._hook_id}-params"
+        )
+        events.unregister("after-call.*.*", unique_id=f"{self._hook_id}-record")
+        events.unregister("before-call.*.*", unique_id=f"{self._hook_id}-replay")
+
+    @staticmethod
+    def _operation_key(model):
+        return f"{model.service_model.service_name}.{model.name}"
+
+    def _keep_params(self, model, params, context, **kwargs):
+        context["cassette_params_hash"] = params_hash(model, params)
+
+    def _record(self, http_response, parsed, model, context, **kwargs):
+        response = dict(parsed)
+        response.pop("ResponseMetadata", None)
+        encoded = _encode(response)
+        # Reading a streaming body consumes it, so hand the caller a fresh copy.
+        for key, val in parsed.items():
+            if isinstance(val, StreamingBody):
+                parsed[key] = _decode(encoded[key])
+        self.interactions.setdefault(self._operation_key(model), {}).setdefault(
+            context["cassette_params_hash"], []
+        ).append({"status": http_response.status_code, "response": encoded})
+
+    def _take(self, operation, params_key, index, interaction):
+        self._used.add((operation, params_key, index))
+        return interaction
+
+    def _next_recorded(self, operation, params_key):
+        by_params = self.interactions.get(operation, {})
+        recorded = by_params.get(params_key)
+        if recorded:
+            for index, interaction in enumerate(recorded):
+                if (operation, params_key, index) not in self._used:
+                    return self._take(operation, params_key, index, interaction)
+            # Repeat the final response when a request, such as a poll for
+            # status, is made more times than it was recorded.
+            return recorded[-1]
+        for key, responses in by_params.items():
+            for index, interaction in enumerate(responses):
+                if (operation, key, index) not in self._used:
+                    logger.info(
+                        "No exact match for %s, replaying the next recorded response.",
+                        operation,
+                    )
+                    return self._take(operation, key, index, interaction)
+        raise CassetteMiss(f"No recorded response for {operation} in {self.path}.")
+
+    def _replay(self, model, context, **kwargs):
+        interaction = self._next_recorded(
+            self._operation_key(model), context["cassette_params_hash"]
+        )
+        parsed = _decode(interaction["response"])
+        parsed["ResponseMetadata"] = {"HTTPStatusCode": interaction["status"]}
+        return AWSResponse(None, interaction["status"], {}, None), parsed
@@ -9,7 +9,7 @@ from datetime import datetime
 from test_tools.example_stubber import ExampleStubber
 
 
-class CloudFormationStubber(ExampleStubber):
+class CloudFormationStubber(ExampleStubber, service_name="cloudformation"):
     """
     A class that implements stub functions used by CloudFormation unit tests.
     """
@@ -12,7 +12,7 @@ import datetime
 from test_tools.example_stubber import ExampleStubber
 
 
-class CloudFrontStubber(ExampleStubber):
+class CloudFrontStubber(ExampleStubber, service_name="cloudfront"):
     """
     A class that implements stub functions used by CloudFront unit tests.
 
@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon CloudWatch unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class CloudWatchStubber(ExampleStubber):
+class CloudWatchStubber(ExampleStubber, service_name="cloudwatch"):
     """
     A class that implements stub functions used by Amazon CloudWatch unit tests.
 
@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon Cognito Identity Provider unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class CognitoIdpStubber(ExampleStubber):
+class CognitoIdpStubber(ExampleStubber, service_name="cognito-idp"):
     """
     A class that implements stub functions used by Amazon Cognito Identity Provider
     unit tests.
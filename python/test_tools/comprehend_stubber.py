@@ -9,7 +9,7 @@ import datetime
 from test_tools.example_stubber import ExampleStubber
 
 
-class ComprehendStubber(ExampleStubber):
+class ComprehendStubber(ExampleStubber, service_name="comprehend"):
     """
     A class that implements stub functions used by Amazon Comprehend unit tests.
 
@@ -8,7 +8,7 @@ Stub functions that are used by the AWS Config unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class ConfigStubber(ExampleStubber):
+class ConfigStubber(ExampleStubber, service_name="config"):
     """
     A class that implements stub functions used by AWS Config unit tests.
 
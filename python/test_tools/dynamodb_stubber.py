@@ -13,7 +13,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class DynamoStubber(ExampleStubber):
+class DynamoStubber(ExampleStubber, service_name="dynamodb"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon DynamoDB unit tests.
@@ -214,17 +214,28 @@ class DynamoStubber(ExampleStubber):
         expression_attrs=None,
         start_key=None,
         last_key=None,
+        segment=None,
+        total_segments=None,
+        limit=None,
+        expression_attr_vals=None,
         error_code=None,
     ):
         expected_params = {"TableName": table_name}
         if select:
             expected_params["Select"] = select
+        if segment is not None:
+            expected_params["Segment"] = segment
+            expected_params["TotalSegments"] = total_segments
+        if limit is not None:
+            expected_params["Limit"] = limit
         if filter_expression:
             expected_params["FilterExpression"] = filter_expression
         if projection_expression:
             expected_params["ProjectionExpression"] = projection_expression
         if expression_attrs:
             expected_params["ExpressionAttributeNames"] = expression_attrs
+        if expression_attr_vals is not None:
+            expected_params["ExpressionAttributeValues"] = expression_attr_vals
         if start_key:
             expected_params["ExclusiveStartKey"] = start_key
         response = {
@@ -242,32 +253,42 @@ class DynamoStubber(ExampleStubber):
         projection=None,
         expression_attrs=None,
         expression_attr_vals=None,
+        index_name=None,
+        limit=None,
+        start_key=None,
+        last_key=None,
         error_code=None,
     ):
         expected_params = {"TableName": table_name}
+        if index_name is not None:
+            expected_params["IndexName"] = index_name
         if key_condition is not None:
             expected_params["KeyConditionExpression"] = key_condition
+        if limit is not None:
+            expected_params["Limit"] = limit
+        if start_key is not None:
+            expected_params["ExclusiveStartKey"] = start_key
         if projection is not None:
             expected_params["ProjectionExpression"] = projection
         if expression_attrs is not None:
             expected_params["ExpressionAttributeNames"] = expression_attrs
         if expression_attr_vals is not None:
             expected_params["ExpressionAttributeValues"] = expression_attr_vals
-        response_items = [
-            self._build_out_item(output_item) for output_item in output_items
-        ]
-        self._stub_bifurcator(
-            "query", expected_params, {"Items": response_items}, error_code=error_code
-        )
+        response = {
+            "Items": [self._build_out_item(output_item) for output_item in output_items]
+        }
+        if last_key is not None:
+            response["LastEvaluatedKey"] = last_key
+        self._stub_bifurcator("query", expected_params, response, error_code=error_code)
 
     def stub_batch_write_item(
         self, request_items, unprocessed_items=None, error_code=None
     ):
         expected_params = {"RequestItems": request_items}
         response = {
-            "UnprocessedItems": unprocessed_items
-            if unprocessed_items is not None
-            else {}
+            "UnprocessedItems": (
+                unprocessed_items if unprocessed_items is not None else {}
+            )
         }
         self._stub_bifurcator(
             "batch_write_item", expected_params, response, error_code=error_code
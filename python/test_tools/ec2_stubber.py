@@ -13,7 +13,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class Ec2Stubber(ExampleStubber):
+class Ec2Stubber(ExampleStubber, service_name="ec2"):
     """
     A class that implements a variety of stub functions that are used by the
     EC2 unit tests.
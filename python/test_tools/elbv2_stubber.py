@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class ELBv2Stubber(ExampleStubber):
+class ELBv2Stubber(ExampleStubber, service_name="elbv2"):
     """
     A class that implements stub functions used by ELB v2 unit tests.
 
@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class EmrStubber(ExampleStubber):
+class EmrStubber(ExampleStubber, service_name="emr"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon EMR unit tests.
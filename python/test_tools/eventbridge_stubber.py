@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class EventBridgeStubber(ExampleStubber):
+class EventBridgeStubber(ExampleStubber, service_name="events"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon EventBridge unit tests.
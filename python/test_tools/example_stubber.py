@@ -15,8 +15,26 @@ class ExampleStubber(Stubber):
     intercept requests during tests or pass calls through to AWS.
 
     All stubbers used in Python unit tests must inherit from this base class.
+    Subclasses declare the service they stub, which registers them with the
+    stubber factory:
+
+        class SqsStubber(ExampleStubber, service_name="sqs"):
     """
 
+    # Maps service names to the stubber classes that have registered for them.
+    registry = {}
+
+    def __init_subclass__(cls, service_name=None, **kwargs):
+        """
+        Registers a subclass as the stubber for the service it declares.
+
+        :param service_name: The name of the service that is used by Boto 3.
+        """
+        super().__init_subclass__(**kwargs)
+        if service_name is not None:
+            cls.service_name = service_name
+            ExampleStubber.registry[service_name] = cls
+
     def __init__(self, client, use_stubs=True):
         """
         Initializes the object with a specific client and configures it for
@@ -28,11 +46,36 @@ class ExampleStubber(Stubber):
         """
         self.use_stubs = use_stubs
         self.region_name = client.meta.region_name
+        self.cassette = None
         if self.use_stubs:
             super().__init__(client)
         else:
             self.client = client
 
+    def use_cassette(self, cassette):
+        """
+        Records requests to a cassette or replays them from it instead of using
+        stubs. Stubbed responses that are added afterward are ignored.
+
+        :param cassette: The cassette that records or replays requests.
+        """
+        self.use_stubs = False
+        self.cassette = cassette
+
+    def activate(self):
+        """Activates stubs or the cassette on the client."""
+        if self.use_stubs:
+            super().activate()
+        elif self.cassette is not None:
+            self.cassette.attach(self.client)
+
+    def deactivate(self):
+        """Deactivates stubs or the cassette on the client."""
+        if self.use_stubs:
+            super().deactivate()
+        elif self.cassette is not None:
+            self.cassette.detach(self.client)
+
     def add_response(self, method, service_response, expected_params=None):
         """When using stubs, add a stubbed response."""
         if self.use_stubs:
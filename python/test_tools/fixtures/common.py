@@ -7,31 +7,147 @@ code examples.
 """
 
 import contextlib
+import json
 import logging
+import os
 import time
 import pytest
 
+from test_tools.call_profiler import CallProfiler
+from test_tools.cassette import Cassette
 from test_tools.stubber_factory import stubber_factory
 
 logger = logging.getLogger(__name__)
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup("stubs")
+    # Each test folder's conftest imports this hook, so it is called once for each
+    # folder when a session spans more than one folder.
+    if group.options:
+        return
+    group.addoption(
+        "--stub-cassettes",
+        choices=["record", "replay"],
+        default=None,
+        help="Record AWS requests to cassettes, or replay them from cassettes, "
+        "instead of using stubs. Recording calls AWS and is likely to incur "
+        "charges on your account.",
+    )
+    group.addoption(
+        "--cassette-dir",
+        default=os.path.join("test", "cassettes"),
+        help="The folder where cassettes are recorded and replayed.",
+    )
+    group.addoption(
+        "--stub-profile",
+        default=None,
+        metavar="PATH",
+        help="Count and time the service calls made through stubbed clients in "
+        "each test, and write the results as JSON to PATH.",
+    )
+
+
 def pytest_configure(config):
     config.addinivalue_line(
         "markers",
         "integ: integration test that requires and uses AWS resources. "
         "Use of this tag is likely to incur charges on your account.",
     )
+    path = config.getoption("--stub-profile", default=None)
+    if path is not None and not config.pluginmanager.has_plugin("stub-profile"):
+        config.pluginmanager.register(StubProfileReport(path), "stub-profile")
+
+
+class StubProfileReport:
+    """
+    Collects the call profiles of all tests in a session and writes them as a
+    single report when the session finishes. It is registered as a plugin so
+    that its hooks run once, however many conftest files import this module.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.profiles = []
+
+    def pytest_sessionfinish(self, session):
+        with open(self.path, "w") as profile_file:
+            json.dump(self.profiles, profile_file, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        busiest = sorted(
+            (
+                (stats["calls"], profile["test"], operation)
+                for profile in self.profiles
+                for operation, stats in profile["operations"].items()
+            ),
+            reverse=True,
+        )[:10]
+        terminalreporter.section("stubbed service calls")
+        for calls, test, operation in busiest:
+            terminalreporter.write_line(f"{calls:6} {operation} in {test}")
+        terminalreporter.write_line(f"Full profile written to {self.path}.")
+
+
+@pytest.fixture(name="stub_cassette")
+def fixture_stub_cassette(request):
+    """
+    Return the cassette for the current test when the --stub-cassettes option
+    is set, otherwise None. In record mode, the cassette is saved after the
+    test completes.
+
+    :param request: An object that contains configuration parameters.
+    :return: The cassette, or None when stubs are used.
+    """
+    mode = request.config.getoption("--stub-cassettes", default=None)
+    if mode is None:
+        return None
+
+    path = os.path.join(
+        request.config.getoption("--cassette-dir"),
+        request.node.module.__name__.split(".")[-1],
+        f"{request.node.name}.json",
+    )
+    cassette = Cassette(path, record=mode == "record")
+    if cassette.record:
+        request.addfinalizer(cassette.save)
+    return cassette
+
+
+@pytest.fixture(name="stub_profiler")
+def fixture_stub_profiler(request):
+    """
+    Return the call profiler for the current test when the --stub-profile option
+    is set, otherwise None. The statistics of the test are added to the run
+    report after the test completes.
+
+    :param request: An object that contains configuration parameters.
+    :return: The call profiler, or None when profiling is off.
+    """
+    report = request.config.pluginmanager.get_plugin("stub-profile")
+    if report is None:
+        return None
+
+    profiler = CallProfiler(request.node.nodeid)
+
+    def fin():
+        if profiler.operations:
+            report.profiles.append(profiler.report())
+
+    request.addfinalizer(fin)
+    return profiler
 
 
 @pytest.fixture(name="make_stubber")
-def fixture_make_stubber(request, monkeypatch):
+def fixture_make_stubber(request, monkeypatch, stub_cassette, stub_profiler):
     """
     Return a factory function that makes an object configured either
     to pass calls through to AWS or to use stubs.
 
     :param request: An object that contains configuration parameters.
     :param monkeypatch: The Pytest monkeypatch object.
+    :param stub_cassette: The cassette to record to or replay from, if any.
+    :param stub_profiler: The profiler that counts and times calls, if any.
     :return: A factory function that makes the stubber object.
     """
 
@@ -52,13 +168,19 @@ def fixture_make_stubber(request, monkeypatch):
         """
         fact = stubber_factory(service_client.meta.service_model.service_name)
         stubber = fact(service_client)
+        if stub_cassette is not None:
+            stubber.use_cassette(stub_cassette)
 
         def fin():
             stubber.assert_no_pending_responses()
             stubber.deactivate()
+            if stub_profiler is not None:
+                stub_profiler.detach(service_client)
 
         request.addfinalizer(fin)
         stubber.activate()
+        if stub_profiler is not None:
+            stub_profiler.attach(service_client)
 
         return stubber
 
@@ -10,7 +10,7 @@ import io
 from test_tools.example_stubber import ExampleStubber
 
 
-class GlacierStubber(ExampleStubber):
+class GlacierStubber(ExampleStubber, service_name="glacier"):
     """
     A class that implements stub functions used by Amazon S3 Glacier unit tests.
 
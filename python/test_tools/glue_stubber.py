@@ -10,7 +10,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class GlueStubber(ExampleStubber):
+class GlueStubber(ExampleStubber, service_name="glue"):
     """
     A class that implements stub functions used by AWS Glue unit tests.
 
@@ -20,7 +20,7 @@ def random_string(length):
     return "".join([random.choice(string.ascii_lowercase) for _ in range(length)])
 
 
-class IamStubber(ExampleStubber):
+class IamStubber(ExampleStubber, service_name="iam"):
     """
     A class that implements a variety of stub functions that are used by the
     IAM unit tests.
@@ -9,7 +9,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class KeyspacesStubber(ExampleStubber):
+class KeyspacesStubber(ExampleStubber, service_name="keyspaces"):
     """
     A class that implements stub functions used by Amazon Keyspaces unit tests.
 
@@ -9,7 +9,7 @@ import datetime
 from test_tools.example_stubber import ExampleStubber
 
 
-class KinesisAnalyticsV2Stubber(ExampleStubber):
+class KinesisAnalyticsV2Stubber(ExampleStubber, service_name="kinesisanalyticsv2"):
     """
     A class that implements stub functions used by Amazon Kinesis Data Analytics v2
     unit tests.
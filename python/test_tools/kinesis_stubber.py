@@ -10,7 +10,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class KinesisStubber(ExampleStubber):
+class KinesisStubber(ExampleStubber, service_name="kinesis"):
     """
     A class that implements stub functions used by Amazon Kinesis unit tests.
 
@@ -72,43 +72,109 @@ class KinesisStubber(ExampleStubber):
             "put_record", expected_params, response, error_code=error_code
         )
 
-    def stub_put_records(self, stream, batch, partition_key, error_code=None):
+    def stub_put_records(
+        self, stream, batch, partition_key, failed_indexes=(), error_code=None
+    ):
+        """
+        :param batch: The records in the batch. Records that are bytes are expected
+                      as they are, other records are expected formatted as JSON.
+        :param failed_indexes: The indexes of the records that fail.
+        """
         expected_params = {
             "StreamName": stream,
             "Records": [
-                {"Data": json.dumps(record), "PartitionKey": partition_key}
+                {
+                    "Data": record if isinstance(record, bytes) else json.dumps(record),
+                    "PartitionKey": partition_key,
+                }
                 for record in batch
             ],
         }
         response = {
-            "Records": [{"ShardId": "test-id", "SequenceNumber": "test-number"}]
+            "Records": [
+                (
+                    {
+                        "ErrorCode": "ProvisionedThroughputExceededException",
+                        "ErrorMessage": "Rate exceeded for shard.",
+                    }
+                    if index in failed_indexes
+                    else {"ShardId": "test-id", "SequenceNumber": "test-number"}
+                )
+                for index in range(len(batch))
+            ],
         }
+        if failed_indexes:
+            response["FailedRecordCount"] = len(failed_indexes)
         self._stub_bifurcator(
             "put_records", expected_params, response, error_code=error_code
         )
 
+    def stub_list_shards(self, stream_name, shards, error_code=None):
+        expected_params = {"StreamName": stream_name}
+        response = {"Shards": []}
+        for shard in shards:
+            sequence_range = {"StartingSequenceNumber": "0"}
+            # A closed shard has an ending sequence number.
+            if shard.get("closed"):
+                sequence_range["EndingSequenceNumber"] = "1"
+            response["Shards"].append(
+                {
+                    "ShardId": shard["ShardId"],
+                    "HashKeyRange": {"StartingHashKey": "0", "EndingHashKey": "1"},
+                    "SequenceNumberRange": sequence_range,
+                    **{
+                        key: shard[key]
+                        for key in ("ParentShardId", "AdjacentParentShardId")
+                        if key in shard
+                    },
+                }
+            )
+        self._stub_bifurcator(
+            "list_shards", expected_params, response, error_code=error_code
+        )
+
     def stub_get_shard_iterator(
-        self, stream_name, shard_id, shard_iter, error_code=None
+        self,
+        stream_name,
+        shard_id,
+        shard_iter,
+        iterator_type="LATEST",
+        sequence_number=None,
+        error_code=None,
     ):
         expected_params = {
             "StreamName": stream_name,
             "ShardId": shard_id,
-            "ShardIteratorType": "LATEST",
+            "ShardIteratorType": iterator_type,
         }
+        if sequence_number is not None:
+            expected_params["StartingSequenceNumber"] = sequence_number
         response = {"ShardIterator": shard_iter}
         self._stub_bifurcator(
             "get_shard_iterator", expected_params, response, error_code=error_code
         )
 
-    def stub_get_records(self, shard_iter, limit, records, error_code=None):
+    def stub_get_records(
+        self,
+        shard_iter,
+        limit,
+        records,
+        closed=False,
+        millis_behind=None,
+        error_code=None,
+    ):
         expected_params = {"ShardIterator": shard_iter, "Limit": limit}
         response = {
-            "NextShardIterator": shard_iter,
             "Records": [
                 {"Data": record, "SequenceNumber": "1", "PartitionKey": "partition_key"}
                 for record in records
             ],
         }
+        # A closed shard that has been read to its end has no next iterator.
+        if not closed:
+            response["NextShardIterator"] = shard_iter
+        if millis_behind is not None:
+            response["MillisBehindLatest"] = millis_behind
         self._stub_bifurcator(
             "get_records", expected_params, response, error_code=error_code
         )
@@ -9,7 +9,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class KmsStubber(ExampleStubber):
+class KmsStubber(ExampleStubber, service_name="kms"):
     """
     Implements stub functions used by AWS KMS unit tests.
     """
@@ -13,7 +13,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class LambdaStubber(ExampleStubber):
+class LambdaStubber(ExampleStubber, service_name="lambda"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS Lambda unit tests.
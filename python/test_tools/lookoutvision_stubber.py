@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon Lookout for Vision unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class LookoutVisionStubber(ExampleStubber):
+class LookoutVisionStubber(ExampleStubber, service_name="lookoutvision"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon Lookout for Vision unit tests.
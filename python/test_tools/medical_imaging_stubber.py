@@ -12,7 +12,7 @@ import gzip
 import json
 
 
-class MedicalImagingStubber(ExampleStubber):
+class MedicalImagingStubber(ExampleStubber, service_name="medical-imaging"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS HealthImaging unit tests.
@@ -182,17 +182,24 @@ class MedicalImagingStubber(ExampleStubber):
             "get_image_set", expected_params, response, error_code=error_code
         )
 
-    def stub_get_image_set_metadata(self, datastore_id, image_set_id, error_code=None):
+    def stub_get_image_set_metadata(
+        self, datastore_id, image_set_id, metadata=None, error_code=None
+    ):
         expected_params = {"datastoreId": datastore_id, "imageSetId": image_set_id}
 
-        data_string = b'"{data: akdelfaldkflakdflkajs}"'
+        if metadata is None:
+            data_string = b'"{data: akdelfaldkflakdflkajs}"'
+        else:
+            data_string = json.dumps(metadata).encode()
 
         gzip_stream = io.BytesIO()
         with gzip.open(gzip_stream, "wb") as f:
             f.write(data_string)
         gzip_stream.seek(0)
 
-        stream = botocore.response.StreamingBody(gzip_stream, 49)
+        stream = botocore.response.StreamingBody(
+            gzip_stream, len(gzip_stream.getvalue())
+        )
 
         response = {
             "contentType": " text/plain",
@@ -205,7 +212,12 @@ class MedicalImagingStubber(ExampleStubber):
         )
 
     def stub_get_pixel_data(
-        self, datastore_id, image_set_id, image_frame_id, error_code=None
+        self,
+        datastore_id,
+        image_set_id,
+        image_frame_id,
+        data_string=b"akdelfaldkflakdflkajs",
+        error_code=None,
     ):
         expected_params = {
             "datastoreId": datastore_id,
@@ -213,7 +225,6 @@ class MedicalImagingStubber(ExampleStubber):
             "imageFrameInformation": {"imageFrameId": image_frame_id},
         }
 
-        data_string = b"akdelfaldkflakdflkajs"
         stream = botocore.response.StreamingBody(
             io.BytesIO(data_string), len(data_string)
         )
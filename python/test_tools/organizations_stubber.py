@@ -13,7 +13,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class OrganizationsStubber(ExampleStubber):
+class OrganizationsStubber(ExampleStubber, service_name="organizations"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS Organizations unit tests.
@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto 3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class PinpointEmailStubber(ExampleStubber):
+class PinpointEmailStubber(ExampleStubber, service_name="pinpoint-email"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon Pinpoint Email unit tests.
@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon Polly unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class PollyStubber(ExampleStubber):
+class PollyStubber(ExampleStubber, service_name="polly"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon Polly unit tests.
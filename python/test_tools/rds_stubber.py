@@ -10,7 +10,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class RdsStubber(ExampleStubber):
+class RdsStubber(ExampleStubber, service_name="rds"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon RDS unit tests.
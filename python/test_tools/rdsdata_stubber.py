@@ -19,7 +19,7 @@ VALUE_KEYS = {
 }
 
 
-class RdsDataStubber(ExampleStubber):
+class RdsDataStubber(ExampleStubber, service_name="rds-data"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon RDS Data Service unit tests.
@@ -88,6 +88,7 @@ class RdsDataStubber(ExampleStubber):
         sql,
         sql_param_sets=None,
         generated_field_sets=None,
+        transaction_id=None,
         error_code=None,
     ):
         expected_params = {
@@ -98,6 +99,8 @@ class RdsDataStubber(ExampleStubber):
         }
         if sql_param_sets is not None:
             expected_params["parameterSets"] = sql_param_sets
+        if transaction_id is not None:
+            expected_params["transactionId"] = transaction_id
         response = {}
         if generated_field_sets is not None:
             response["updateResults"] = [
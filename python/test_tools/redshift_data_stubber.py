@@ -10,7 +10,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class RedshiftDataStubber(ExampleStubber):
+class RedshiftDataStubber(ExampleStubber, service_name="redshift-data"):
     """
     A class that implements stub functions used by Amazon Redshift Data unit tests.
 
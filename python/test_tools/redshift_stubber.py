@@ -11,7 +11,7 @@ from datetime import datetime
 from test_tools.example_stubber import ExampleStubber
 
 
-class RedshiftStubber(ExampleStubber):
+class RedshiftStubber(ExampleStubber, service_name="redshift"):
     """
     A class that implements stub functions used by Amazon Redshift unit tests.
 
@@ -8,7 +8,7 @@ Stub functions that are used by the Amazon Rekognition unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class RekognitionStubber(ExampleStubber):
+class RekognitionStubber(ExampleStubber, service_name="rekognition"):
     """
     A class that implements stub functions used by Amazon Rekognition unit tests.
 
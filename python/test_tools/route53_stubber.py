@@ -9,7 +9,7 @@ import datetime
 from test_tools.example_stubber import ExampleStubber
 
 
-class Route53Stubber(ExampleStubber):
+class Route53Stubber(ExampleStubber, service_name="route53"):
     """
     A class that implements stub functions used by Route 53 unit tests.
 
@@ -3,18 +3,37 @@
 
 """
 Finds all modules in the Python folder that have unit tests and runs them all
-sequentially as separate PyTest sessions.
+as separate PyTest sessions, scheduled in parallel across a pool of worker
+processes.
 
 This script must be run from the root of the GitHub repo.
 
     py -m python.test_tools.run_all_tests
+
+Folders are scheduled longest first, based on the durations recorded by earlier
+runs, so that slow folders don't hold up the end of the run. A run that is not
+sharded records its durations in python/test_tools/.test_durations.json.
+
+To split the work across several CI nodes, run each node with its own shard and
+the same pinned durations file, such as one that is recorded by an unsharded run
+and kept with the CI configuration:
+
+    py -m python.test_tools.run_all_tests --shard 1/4 \
+        --durations-file ci/test_durations.json --junitxml results-1.xml
+
+Sharded runs don't update the durations file, so every node computes the same
+shards and each folder runs on exactly one node.
 """
 
 import argparse
+import json
 import os
-import platform
+import subprocess
 import sys
-import pytest
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 IGNORE_FOLDERS = {
     "venv",
@@ -24,38 +43,281 @@ IGNORE_FOLDERS = {
     "node_modules",
 }
 
+DEFAULT_DURATIONS_FILE = os.path.join("python", "test_tools", ".test_durations.json")
+# Used for folders that have no recorded duration yet.
+DEFAULT_DURATION = 10.0
+# PyTest exits with this code when a session collects no tests, such as when an
+# integration run reaches a folder that has only unit tests.
+PYTEST_NO_TESTS_COLLECTED = 5
+
 
-def main():
+def find_test_dirs(root="python"):
     """
     Finds all subfolders of the `python` folder that contain a `test` folder and
     assume the parent folder is testable.
-    Runs each testable folder as a separate PyTest session.
+
+    :param root: The folder to search.
+    :return: The list of testable folders, in sorted order.
+    """
+    test_dirs = []
+    for folder, dirs, _ in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in IGNORE_FOLDERS]
+        if "test" in dirs:
+            test_dirs.append(folder)
+    return sorted(test_dirs)
+
+
+def load_durations(path):
+    """
+    Loads the per-folder durations recorded by an earlier run.
+
+    :param path: The path to the durations file.
+    :return: A dict of folder to duration in seconds. Empty when the file does not
+             exist or can't be read.
+    """
+    try:
+        with open(path) as durations_file:
+            return json.load(durations_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(path, durations):
+    """
+    Writes per-folder durations so later runs can balance their work.
+
+    :param path: The path to the durations file.
+    :param durations: A dict of folder to duration in seconds.
+    """
+    with open(path, "w") as durations_file:
+        json.dump(dict(sorted(durations.items())), durations_file, indent=2)
+        durations_file.write("\n")
+
+
+def parse_shard(value):
+    """
+    Parses a shard specification of the form `i/n`, where shards are numbered
+    from 1 to n.
+
+    :param value: The shard specification from the command line.
+    :return: The shard index and shard count as a tuple.
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Shard must be in the form i/n, such as 1/4, but got '{value}'."
+        )
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(
+            f"Shard index must be between 1 and {count}, but got '{value}'."
+        )
+    return index, count
+
+
+def schedule(test_dirs, durations, shard_count=1):
+    """
+    Splits test folders into shards of roughly equal total duration, using the
+    longest-processing-time-first heuristic. The result is deterministic, so every
+    CI node that uses the same durations computes the same shards.
+
+    :param test_dirs: The folders to schedule.
+    :param durations: A dict of folder to its recorded duration in seconds.
+    :param shard_count: The number of shards to split the folders into.
+    :return: A list of shards. Each shard is a list of folders ordered longest first.
+    """
+    ordered = sorted(test_dirs, key=lambda d: (-durations.get(d, DEFAULT_DURATION), d))
+    shards = [[] for _ in range(shard_count)]
+    totals = [0.0] * shard_count
+    for test_dir in ordered:
+        lightest = min(range(shard_count), key=lambda i: (totals[i], i))
+        shards[lightest].append(test_dir)
+        totals[lightest] += durations.get(test_dir, DEFAULT_DURATION)
+    return shards
+
+
+def run_test_dir(test_dir, test_kind, report_dir):
+    """
+    Runs the tests in a single folder as a separate PyTest session.
+
+    :param test_dir: The folder to test, relative to the root of the repo.
+    :param test_kind: The PyTest marker expression that selects tests to run.
+    :param report_dir: The folder where the JUnit report for the session is written.
+    :return: The outcome of the session.
+    """
+    report_path = os.path.join(
+        report_dir, test_dir.replace(os.sep, "_").replace("/", "_") + ".xml"
+    )
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pytest",
+            "-m",
+            test_kind,
+            f"--junitxml={report_path}",
+        ],
+        cwd=os.path.abspath(test_dir),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    return {
+        "folder": test_dir,
+        "returncode": proc.returncode,
+        "passed": proc.returncode in (0, PYTEST_NO_TESTS_COLLECTED),
+        "duration": time.perf_counter() - start,
+        "report": report_path,
+        "output": proc.stdout,
+    }
+
+
+def merge_junit_reports(results, output_path):
+    """
+    Merges the JUnit reports of all sessions into a single report. Each folder
+    becomes a test suite that is named after the folder.
+
+    :param results: The outcomes of the sessions.
+    :param output_path: The path of the merged report.
+    """
+    merged = ET.Element("testsuites")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    total_time = 0.0
+    for result in sorted(results, key=lambda r: r["folder"]):
+        try:
+            root = ET.parse(result["report"]).getroot()
+        except (OSError, ET.ParseError):
+            # The session crashed before it could write a report, so record the
+            # whole folder as an error.
+            suite = ET.SubElement(
+                merged, "testsuite", name=result["folder"], tests="1", errors="1"
+            )
+            case = ET.SubElement(suite, "testcase", name="session", classname="")
+            ET.SubElement(
+                case, "error", message=f"exit code {result['returncode']}"
+            ).text = result["output"]
+            totals["tests"] += 1
+            totals["errors"] += 1
+            continue
+        suites = [root] if root.tag == "testsuite" else list(root)
+        for suite in suites:
+            suite.set("name", result["folder"])
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+            total_time += float(suite.get("time", 0))
+            merged.append(suite)
+    for key, value in totals.items():
+        merged.set(key, str(value))
+    merged.set("time", f"{total_time:.3f}")
+    ET.ElementTree(merged).write(output_path, encoding="utf-8", xml_declaration=True)
+
+
+def write_json_report(results, output_path):
+    """
+    Writes a summary of all sessions as JSON.
+
+    :param results: The outcomes of the sessions.
+    :param output_path: The path of the JSON report.
+    """
+    report = {
+        "passed": all(result["passed"] for result in results),
+        "folders": [
+            {key: result[key] for key in ("folder", "returncode", "passed", "duration")}
+            for result in sorted(results, key=lambda r: r["folder"])
+        ],
+    }
+    with open(output_path, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+
+
+def main(argv=None):
+    """
+    Finds all testable folders, selects the ones that belong to this shard, and
+    runs them in parallel.
+
+    :param argv: The command line arguments. Defaults to the arguments of the process.
+    :return: The exit status, which is nonzero when any session fails.
     """
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--integ", action="store_true", help="When specified, run integration tests."
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The number of PyTest sessions to run at the same time.",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=(1, 1),
+        help="Run only shard i of n, such as 2/4.",
+    )
+    parser.add_argument(
+        "--durations-file",
+        help="The file of per-folder durations used to balance the work. Required "
+        "with --shard. Defaults to the durations recorded by unsharded runs, which "
+        "update the file with the durations they measure.",
+    )
+    parser.add_argument("--junitxml", help="Write a merged JUnit report to this path.")
+    parser.add_argument("--json", help="Write a JSON summary to this path.")
+    args = parser.parse_args(argv)
 
-    test_dirs = []
-    for root, dirs, files in os.walk("python"):
-        dirs[:] = [d for d in dirs if d not in IGNORE_FOLDERS]
-        if "test" in dirs:
-            test_dirs.append(root)
-
-    original_path = sys.path.copy()
-    root_dir = os.getcwd()
-    for test_dir in test_dirs:
-        test_path = os.path.join(root_dir, test_dir)
-        sys.path.append(test_path)
-        os.chdir(test_path)
-        test_kind = "integ" if args.integ else "not integ"
-        if platform.system() == "Windows":
-            os.system(f'py -m pytest -m "{test_kind}"')
-        else:
-            os.system(f'python -m pytest -m "{test_kind}"')
-        sys.path = original_path.copy()
+    shard_index, shard_count = args.shard
+    if shard_count > 1:
+        # Every node must schedule from the same durations, so a sharded run reads
+        # a pinned file and leaves it as it is.
+        if args.durations_file is None:
+            parser.error("--shard requires --durations-file.")
+        if not os.path.isfile(args.durations_file):
+            parser.error(f"Durations file '{args.durations_file}' doesn't exist.")
+    durations_file = args.durations_file or DEFAULT_DURATIONS_FILE
+    durations = load_durations(durations_file)
+    test_dirs = schedule(find_test_dirs(), durations, shard_count)[shard_index - 1]
+    test_kind = "integ" if args.integ else "not integ"
+    print(
+        f"Running {len(test_dirs)} test folders in shard {shard_index}/{shard_count} "
+        f"with {args.jobs} workers."
+    )
+
+    results = []
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as report_dir:
+        with ThreadPoolExecutor(max_workers=max(args.jobs, 1)) as executor:
+            futures = [
+                executor.submit(run_test_dir, test_dir, test_kind, report_dir)
+                for test_dir in test_dirs
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                status = "PASSED" if result["passed"] else "FAILED"
+                print(f"\n{status} {result['folder']} ({result['duration']:.1f}s)")
+                print(result["output"])
+        if args.junitxml:
+            merge_junit_reports(results, args.junitxml)
+    if args.json:
+        write_json_report(results, args.json)
+
+    if shard_count == 1:
+        durations.update({result["folder"]: result["duration"] for result in results})
+        try:
+            save_durations(durations_file, durations)
+        except OSError as err:
+            print(f"Couldn't save durations to {durations_file}: {err}")
+
+    failed = [result["folder"] for result in results if not result["passed"]]
+    print(
+        f"\n{len(results) - len(failed)} of {len(results)} test folders passed "
+        f"in {time.perf_counter() - start:.1f}s."
+    )
+    for folder in sorted(failed):
+        print(f"FAILED {folder}")
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
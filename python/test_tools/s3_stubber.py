@@ -15,7 +15,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class S3Stubber(ExampleStubber):
+class S3Stubber(ExampleStubber, service_name="s3"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon S3 unit tests.
@@ -306,6 +306,7 @@ class S3Stubber(ExampleStubber):
         object_keys=None,
         prefix=None,
         delimiter=None,
+        e_tags=None,
         error_code=None,
     ):
         if not object_keys:
@@ -316,10 +317,42 @@ class S3Stubber(ExampleStubber):
         if delimiter is not None:
             expected_params["Delimiter"] = delimiter
         response = {"Contents": [{"Key": key} for key in object_keys]}
+        if e_tags is not None:
+            for content, e_tag in zip(response["Contents"], e_tags):
+                content["ETag"] = e_tag
         self._stub_bifurcator(
             "list_objects", expected_params, response, error_code=error_code
         )
 
+    def stub_list_objects_v2(
+        self,
+        bucket_name,
+        objects=None,
+        prefix=None,
+        continuation_token=None,
+        next_continuation_token=None,
+        start_after=None,
+        error_code=None,
+    ):
+        if not objects:
+            objects = []
+        expected_params = {"Bucket": bucket_name}
+        if prefix is not None:
+            expected_params["Prefix"] = prefix
+        if start_after is not None:
+            expected_params["StartAfter"] = start_after
+        if continuation_token is not None:
+            expected_params["ContinuationToken"] = continuation_token
+        response = {
+            "Contents": [{"Key": key, "Size": size} for key, size in objects],
+            "IsTruncated": next_continuation_token is not None,
+        }
+        if next_continuation_token is not None:
+            response["NextContinuationToken"] = next_continuation_token
+        self._stub_bifurcator(
+            "list_objects_v2", expected_params, response, error_code=error_code
+        )
+
     def stub_delete_objects(self, bucket_name, object_keys, error_code=None):
         expected_params = {
             "Bucket": bucket_name,
@@ -343,6 +376,70 @@ class S3Stubber(ExampleStubber):
             "copy_object", expected_params, response, error_code=error_code
         )
 
+    def stub_create_multipart_upload(
+        self, bucket_name, object_key, upload_id, error_code=None
+    ):
+        expected_params = {"Bucket": bucket_name, "Key": object_key}
+        response = {"Bucket": bucket_name, "Key": object_key, "UploadId": upload_id}
+        self._stub_bifurcator(
+            "create_multipart_upload", expected_params, response, error_code=error_code
+        )
+
+    def stub_upload_part_copy(
+        self,
+        src_bucket,
+        src_object_key,
+        dest_bucket,
+        dest_object_key,
+        upload_id,
+        part_number,
+        byte_range,
+        etag,
+        error_code=None,
+    ):
+        expected_params = {
+            "Bucket": dest_bucket,
+            "Key": dest_object_key,
+            "UploadId": upload_id,
+            "PartNumber": part_number,
+            "CopySource": {"Bucket": src_bucket, "Key": src_object_key},
+            "CopySourceRange": f"bytes={byte_range[0]}-{byte_range[1]}",
+        }
+        response = {"CopyPartResult": {"ETag": etag}}
+        self._stub_bifurcator(
+            "upload_part_copy", expected_params, response, error_code=error_code
+        )
+
+    def stub_complete_multipart_upload(
+        self, bucket_name, object_key, upload_id, etags, error_code=None
+    ):
+        expected_params = {
+            "Bucket": bucket_name,
+            "Key": object_key,
+            "UploadId": upload_id,
+            "MultipartUpload": {
+                "Parts": [
+                    {"PartNumber": number, "ETag": etag}
+                    for number, etag in enumerate(etags, start=1)
+                ]
+            },
+        }
+        self._stub_bifurcator(
+            "complete_multipart_upload", expected_params, error_code=error_code
+        )
+
+    def stub_abort_multipart_upload(
+        self, bucket_name, object_key, upload_id, error_code=None
+    ):
+        expected_params = {
+            "Bucket": bucket_name,
+            "Key": object_key,
+            "UploadId": upload_id,
+        }
+        self._stub_bifurcator(
+            "abort_multipart_upload", expected_params, error_code=error_code
+        )
+
     def stub_put_object_acl(self, bucket_name, object_key, email, error_code=None):
         expected_params = {
             "Bucket": bucket_name,
@@ -15,7 +15,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class S3ControlStubber(ExampleStubber):
+class S3ControlStubber(ExampleStubber, service_name="s3control"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS S3 Control unit tests.
@@ -8,7 +8,7 @@ Stub functions that are used by the AWS Secrets Manager unit tests.
 from test_tools.example_stubber import ExampleStubber
 
 
-class SecretsManagerStubber(ExampleStubber):
+class SecretsManagerStubber(ExampleStubber, service_name="secretsmanager"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS Secrets Manager unit tests.
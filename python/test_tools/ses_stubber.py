@@ -10,7 +10,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class SesStubber(ExampleStubber):
+class SesStubber(ExampleStubber, service_name="ses"):
     """
     A class that implements stub functions used by Amazon SES unit tests.
 
@@ -10,7 +10,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class SnsStubber(ExampleStubber):
+class SnsStubber(ExampleStubber, service_name="sns"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon SNS unit tests.
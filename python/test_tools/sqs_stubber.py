@@ -13,7 +13,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class SqsStubber(ExampleStubber):
+class SqsStubber(ExampleStubber, service_name="sqs"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon SQS unit tests.
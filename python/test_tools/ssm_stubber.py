@@ -14,7 +14,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class SsmStubber(ExampleStubber):
+class SsmStubber(ExampleStubber, service_name="ssm"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS Systems Manager unit tests.
@@ -10,7 +10,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class StepFunctionsStubber(ExampleStubber):
+class StepFunctionsStubber(ExampleStubber, service_name="stepfunctions"):
     """
     A class that implements stub functions used by Amazon Step Functions unit tests.
 
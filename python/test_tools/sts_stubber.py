@@ -16,7 +16,7 @@ from botocore.stub import ANY
 from test_tools.example_stubber import ExampleStubber
 
 
-class StsStubber(ExampleStubber):
+class StsStubber(ExampleStubber, service_name="sts"):
     """
     A class that implements a variety of stub functions that are used by the
     AWS STS Control unit tests.
@@ -5,64 +5,78 @@
 A factory function that returns the stubber for an AWS service, based on the
 name of the service that is used by Boto 3.
 
+Stubber modules are imported only the first time their service is requested, so
+a test session pays the import cost of only the services that it uses. When a
+stubber module is imported, its stubber class registers itself with
+ExampleStubber under the service name it declares.
+
 This factory is used by the make_stubber fixture found in the set of common fixtures.
 """
 
-from test_tools.acm_stubber import AcmStubber
-from test_tools.apigateway_stubber import ApiGatewayStubber
-from test_tools.apigatewaymanagementapi_stubber import ApiGatewayManagementApiStubber
-from test_tools.apigateway_v2_stubber import ApiGatewayV2Stubber
-from test_tools.auditmanager_stubber import AuditManagerStubber
-from test_tools.autoscaling_stubber import AutoScalingStubber
-from test_tools.bedrock_stubber import BedrockStubber
-from test_tools.bedrock_runtime_stubber import BedrockRuntimeStubber
-from test_tools.bedrock_agent_stubber import BedrockAgentStubber
-from test_tools.bedrock_agent_runtime_stubber import BedrockAgentRuntimeStubber
-from test_tools.cloudformation_stubber import CloudFormationStubber
-from test_tools.cloudfront_stubber import CloudFrontStubber
-from test_tools.cloudwatch_stubber import CloudWatchStubber
-from test_tools.cloudwatch_logs_stubber import CloudWatchLogsStubber
-from test_tools.cognito_idp_stubber import CognitoIdpStubber
-from test_tools.comprehend_stubber import ComprehendStubber
-from test_tools.config_stubber import ConfigStubber
-from test_tools.dynamodb_stubber import DynamoStubber
-from test_tools.ec2_stubber import Ec2Stubber
-from test_tools.elbv2_stubber import ELBv2Stubber
-from test_tools.emr_stubber import EmrStubber
-from test_tools.eventbridge_stubber import EventBridgeStubber
-from test_tools.glacier_stubber import GlacierStubber
-from test_tools.glue_stubber import GlueStubber
-from test_tools.iam_stubber import IamStubber
-from test_tools.keyspaces_stubber import KeyspacesStubber
-from test_tools.kinesis_stubber import KinesisStubber
-from test_tools.kinesis_analytics_v2_stubber import KinesisAnalyticsV2Stubber
-from test_tools.kms_stubber import KmsStubber
-from test_tools.lambda_stubber import LambdaStubber
-from test_tools.lookoutvision_stubber import LookoutVisionStubber
-from test_tools.organizations_stubber import OrganizationsStubber
-from test_tools.pinpoint_stubber import PinpointStubber
-from test_tools.pinpoint_email_stubber import PinpointEmailStubber
-from test_tools.pinpoint_sms_voice_stubber import PinpointSmsVoiceStubber
-from test_tools.polly_stubber import PollyStubber
-from test_tools.rdsdata_stubber import RdsDataStubber
-from test_tools.rds_stubber import RdsStubber
-from test_tools.rekognition_stubber import RekognitionStubber
-from test_tools.route53_stubber import Route53Stubber
-from test_tools.s3_stubber import S3Stubber
-from test_tools.s3control_stubber import S3ControlStubber
-from test_tools.secretsmanager_stubber import SecretsManagerStubber
-from test_tools.ses_stubber import SesStubber
-from test_tools.sns_stubber import SnsStubber
-from test_tools.sqs_stubber import SqsStubber
-from test_tools.ssm_stubber import SsmStubber
-from test_tools.stepfunctions_stubber import StepFunctionsStubber
-from test_tools.sts_stubber import StsStubber
-from test_tools.support_stubber import SupportStubber
-from test_tools.textract_stubber import TextractStubber
-from test_tools.transcribe_stubber import TranscribeStubber
-from test_tools.medical_imaging_stubber import MedicalImagingStubber
-from test_tools.redshift_stubber import RedshiftStubber
-from test_tools.redshift_data_stubber import RedshiftDataStubber
+import importlib
+
+from test_tools.example_stubber import ExampleStubber
+
+# Maps each service name that is used by Boto 3 to the module that implements
+# its stubber. When you add a new stubber, add its module here and declare the
+# same service name on its class.
+STUBBER_MODULES = {
+    "acm": "test_tools.acm_stubber",
+    "apigateway": "test_tools.apigateway_stubber",
+    "apigatewaymanagementapi": "test_tools.apigatewaymanagementapi_stubber",
+    "apigatewayv2": "test_tools.apigateway_v2_stubber",
+    "auditmanager": "test_tools.auditmanager_stubber",
+    "autoscaling": "test_tools.autoscaling_stubber",
+    "bedrock": "test_tools.bedrock_stubber",
+    "bedrock-agent": "test_tools.bedrock_agent_stubber",
+    "bedrock-agent-runtime": "test_tools.bedrock_agent_runtime_stubber",
+    "bedrock-runtime": "test_tools.bedrock_runtime_stubber",
+    "cloudformation": "test_tools.cloudformation_stubber",
+    "cloudfront": "test_tools.cloudfront_stubber",
+    "cloudwatch": "test_tools.cloudwatch_stubber",
+    "cognito-idp": "test_tools.cognito_idp_stubber",
+    "comprehend": "test_tools.comprehend_stubber",
+    "config": "test_tools.config_stubber",
+    "dynamodb": "test_tools.dynamodb_stubber",
+    "ec2": "test_tools.ec2_stubber",
+    "elbv2": "test_tools.elbv2_stubber",
+    "emr": "test_tools.emr_stubber",
+    "events": "test_tools.eventbridge_stubber",
+    "glacier": "test_tools.glacier_stubber",
+    "glue": "test_tools.glue_stubber",
+    "iam": "test_tools.iam_stubber",
+    "keyspaces": "test_tools.keyspaces_stubber",
+    "kinesis": "test_tools.kinesis_stubber",
+    "kinesisanalyticsv2": "test_tools.kinesis_analytics_v2_stubber",
+    "kms": "test_tools.kms_stubber",
+    "lambda": "test_tools.lambda_stubber",
+    "logs": "test_tools.cloudwatch_logs_stubber",
+    "lookoutvision": "test_tools.lookoutvision_stubber",
+    "medical-imaging": "test_tools.medical_imaging_stubber",
+    "organizations": "test_tools.organizations_stubber",
+    "pinpoint": "test_tools.pinpoint_stubber",
+    "pinpoint-email": "test_tools.pinpoint_email_stubber",
+    "pinpoint-sms-voice": "test_tools.pinpoint_sms_voice_stubber",
+    "polly": "test_tools.polly_stubber",
+    "rds": "test_tools.rds_stubber",
+    "rds-data": "test_tools.rdsdata_stubber",
+    "redshift": "test_tools.redshift_stubber",
+    "redshift-data": "test_tools.redshift_data_stubber",
+    "rekognition": "test_tools.rekognition_stubber",
+    "route53": "test_tools.route53_stubber",
+    "s3": "test_tools.s3_stubber",
+    "s3control": "test_tools.s3control_stubber",
+    "secretsmanager": "test_tools.secretsmanager_stubber",
+    "ses": "test_tools.ses_stubber",
+    "sns": "test_tools.sns_stubber",
+    "sqs": "test_tools.sqs_stubber",
+    "ssm": "test_tools.ssm_stubber",
+    "stepfunctions": "test_tools.stepfunctions_stubber",
+    "sts": "test_tools.sts_stubber",
+    "support": "test_tools.support_stubber",
+    "textract": "test_tools.textract_stubber",
+    "transcribe": "test_tools.transcribe_stubber",
+}
 
 
 class StubberFactoryNotImplemented(Exception):
@@ -70,117 +84,17 @@ class StubberFactoryNotImplemented(Exception):
 
 
 def stubber_factory(service_name):
-    if service_name == "acm":
-        return AcmStubber
-    elif service_name == "apigateway":
-        return ApiGatewayStubber
-    elif service_name == "apigatewaymanagementapi":
-        return ApiGatewayManagementApiStubber
-    elif service_name == "apigatewayv2":
-        return ApiGatewayV2Stubber
-    elif service_name == "auditmanager":
-        return AuditManagerStubber
-    elif service_name == "autoscaling":
-        return AutoScalingStubber
-    elif service_name == "bedrock":
-        return BedrockStubber
-    elif service_name == "bedrock-runtime":
-        return BedrockRuntimeStubber
-    elif service_name == "bedrock-agent":
-        return BedrockAgentStubber
-    elif service_name == "bedrock-agent-runtime":
-        return BedrockAgentRuntimeStubber
-    elif service_name == "cloudformation":
-        return CloudFormationStubber
-    elif service_name == "cloudfront":
-        return CloudFrontStubber
-    elif service_name == "cloudwatch":
-        return CloudWatchStubber
-    elif service_name == "logs":
-        return CloudWatchLogsStubber
-    elif service_name == "cognito-idp":
-        return CognitoIdpStubber
-    elif service_name == "comprehend":
-        return ComprehendStubber
-    elif service_name == "config":
-        return ConfigStubber
-    elif service_name == "dynamodb":
-        return DynamoStubber
-    elif service_name == "ec2":
-        return Ec2Stubber
-    elif service_name == "elbv2":
-        return ELBv2Stubber
-    elif service_name == "emr":
-        return EmrStubber
-    elif service_name == "events":
-        return EventBridgeStubber
-    elif service_name == "glacier":
-        return GlacierStubber
-    elif service_name == "glue":
-        return GlueStubber
-    elif service_name == "iam":
-        return IamStubber
-    elif service_name == "keyspaces":
-        return KeyspacesStubber
-    elif service_name == "kinesis":
-        return KinesisStubber
-    elif service_name == "kinesisanalyticsv2":
-        return KinesisAnalyticsV2Stubber
-    elif service_name == "kms":
-        return KmsStubber
-    elif service_name == "lambda":
-        return LambdaStubber
-    elif service_name == "lookoutvision":
-        return LookoutVisionStubber
-    elif service_name == "medical-imaging":
-        return MedicalImagingStubber
-    elif service_name == "organizations":
-        return OrganizationsStubber
-    elif service_name == "pinpoint":
-        return PinpointStubber
-    elif service_name == "pinpoint-email":
-        return PinpointEmailStubber
-    elif service_name == "pinpoint-sms-voice":
-        return PinpointSmsVoiceStubber
-    elif service_name == "polly":
-        return PollyStubber
-    elif service_name == "rds":
-        return RdsStubber
-    elif service_name == "rds-data":
-        return RdsDataStubber
-    elif service_name == "redshift":
-        return RedshiftStubber
-    elif service_name == "redshift-data":
-        return RedshiftDataStubber
-    elif service_name == "rekognition":
-        return RekognitionStubber
-    elif service_name == "route53":
-        return Route53Stubber
-    elif service_name == "s3":
-        return S3Stubber
-    elif service_name == "s3control":
-        return S3ControlStubber
-    elif service_name == "secretsmanager":
-        return SecretsManagerStubber
-    elif service_name == "ses":
-        return SesStubber
-    elif service_name == "sns":
-        return SnsStubber
-    elif service_name == "sqs":
-        return SqsStubber
-    elif service_name == "ssm":
-        return SsmStubber
-    elif service_name == "stepfunctions":
-        return StepFunctionsStubber
-    elif service_name == "sts":
-        return StsStubber
-    elif service_name == "support":
-        return SupportStubber
-    elif service_name == "textract":
-        return TextractStubber
-    elif service_name == "transcribe":
-        return TranscribeStubber
-    else:
+    """
+    Gets the stubber class for a service, importing its module on first use.
+
+    :param service_name: The name of the service that is used by Boto 3.
+    :return: The stubber class for the service.
+    """
+    if service_name not in ExampleStubber.registry and service_name in STUBBER_MODULES:
+        importlib.import_module(STUBBER_MODULES[service_name])
+    try:
+        return ExampleStubber.registry[service_name]
+    except KeyError:
         raise StubberFactoryNotImplemented(
             "If you see this exception, it probably means that you forgot to add "
             "a new stubber to stubber_factory.py."
@@ -10,7 +10,7 @@ import json
 from test_tools.example_stubber import ExampleStubber
 
 
-class SupportStubber(ExampleStubber):
+class SupportStubber(ExampleStubber, service_name="support"):
     """
     A class that implements stub functions used by AWS Support unit tests.
 
@@ -0,0 +1,92 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for call_profiler.py and the --stub-profile option.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import boto3
+
+from test_tools.call_profiler import CallProfiler
+
+REGION = "us-east-1"
+URL = "https://example.com/test-queue"
+PROFILED_TESTS = f"""
+import boto3
+
+def test_calls(make_stubber):
+    sqs_client = boto3.client("sqs", region_name="{REGION}")
+    sqs_stubber = make_stubber(sqs_client)
+    for _ in range(3):
+        sqs_stubber.stub_list_queues(["{URL}"])
+        sqs_client.list_queues()
+
+def test_no_calls():
+    pass
+"""
+
+
+def test_report(make_stubber):
+    sqs_client = boto3.client("sqs", region_name=REGION)
+    sqs_stubber = make_stubber(sqs_client)
+    profiler = CallProfiler("test-id")
+    profiler.attach(sqs_client)
+
+    sqs_stubber.stub_get_queue_url("test-queue", URL)
+    sqs_stubber.stub_get_queue_url("test-queue", URL)
+    sqs_stubber.stub_list_queues([URL])
+
+    sqs_client.get_queue_url(QueueName="test-queue")
+    sqs_client.get_queue_url(QueueName="test-queue")
+    sqs_client.list_queues()
+    profiler.detach(sqs_client)
+    sqs_stubber.stub_list_queues([URL])
+    sqs_client.list_queues()
+
+    report = profiler.report()
+    assert report["test"] == "test-id"
+    assert set(report["operations"]) == {"sqs.GetQueueUrl", "sqs.ListQueues"}
+    get_stats = report["operations"]["sqs.GetQueueUrl"]
+    list_stats = report["operations"]["sqs.ListQueues"]
+    assert get_stats["calls"] == 2
+    assert list_stats["calls"] == 1
+    for stats in (get_stats, list_stats):
+        assert stats["build_time"] > 0
+        assert stats["code_time"] >= 0
+
+
+def test_stub_profile_option(tmp_path):
+    (tmp_path / "conftest.py").write_text("from test_tools.fixtures.common import *\n")
+    (tmp_path / "test_profiled.py").write_text(PROFILED_TESTS)
+    profile_path = tmp_path / "profile.json"
+    python_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pytest",
+            "-p",
+            "no:cacheprovider",
+            f"--stub-profile={profile_path}",
+        ],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": os.path.abspath(python_dir)},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stdout
+    assert "stubbed service calls" in result.stdout
+    assert "sqs.ListQueues in test_profiled.py::test_calls" in result.stdout
+    with open(profile_path) as profile_file:
+        profiles = json.load(profile_file)
+    assert len(profiles) == 1
+    assert profiles[0]["test"] == "test_profiled.py::test_calls"
+    assert profiles[0]["operations"]["sqs.ListQueues"]["calls"] == 3
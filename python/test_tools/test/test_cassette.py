@@ -0,0 +1,163 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for cassette.py.
+"""
+
+import datetime
+import io
+
+import boto3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+import pytest
+
+from test_tools.cassette import Cassette, CassetteMiss, params_hash
+from test_tools.stubber_factory import stubber_factory
+
+REGION = "us-east-1"
+
+
+def queue_url(name):
+    return f"https://sqs.{REGION}.amazonaws.com/123456789012/{name}"
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    return str(tmp_path / "cassettes" / "test.json")
+
+
+def record_queue_urls(path, names):
+    """
+    Records get_queue_url calls for queue names. The responses come from a
+    botocore Stubber, which stands in for AWS while the cassette records.
+    """
+    sqs_client = boto3.client("sqs", region_name=REGION)
+    cassette = Cassette(path, record=True)
+    cassette.attach(sqs_client)
+    with Stubber(sqs_client) as stubber:
+        for name in names:
+            stubber.add_response(
+                "get_queue_url", {"QueueUrl": queue_url(name)}, {"QueueName": name}
+            )
+            sqs_client.get_queue_url(QueueName=name)
+    cassette.detach(sqs_client)
+    cassette.save()
+
+
+def replay_client(path):
+    sqs_client = boto3.client("sqs", region_name=REGION)
+    cassette = Cassette(path)
+    cassette.attach(sqs_client)
+    return sqs_client
+
+
+def test_record_then_replay(cassette_path):
+    s3_client = boto3.client("s3", region_name=REGION)
+    modified = datetime.datetime(2024, 5, 6, 7, 8, 9, tzinfo=datetime.timezone.utc)
+    cassette = Cassette(cassette_path, record=True)
+    cassette.attach(s3_client)
+    with Stubber(s3_client) as stubber:
+        stubber.add_response(
+            "get_object",
+            {
+                "Body": StreamingBody(io.BytesIO(b"test-data"), 9),
+                "LastModified": modified,
+            },
+            {"Bucket": "test-bucket", "Key": "test-key"},
+        )
+        recorded = s3_client.get_object(Bucket="test-bucket", Key="test-key")
+    cassette.save()
+
+    # Recording reads the body, so the caller must get a fresh copy of it.
+    assert recorded["Body"].read() == b"test-data"
+
+    s3_client = boto3.client("s3", region_name=REGION)
+    Cassette(cassette_path).attach(s3_client)
+    replayed = s3_client.get_object(Bucket="test-bucket", Key="test-key")
+
+    assert replayed["Body"].read() == b"test-data"
+    assert replayed["LastModified"] == modified
+    assert replayed["ResponseMetadata"]["HTTPStatusCode"] == 200
+
+
+def test_replay_matches_params(cassette_path):
+    record_queue_urls(cassette_path, ["queue-1", "queue-2"])
+    sqs_client = replay_client(cassette_path)
+
+    for name in ["queue-2", "queue-1", "queue-2"]:
+        assert sqs_client.get_queue_url(QueueName=name)["QueueUrl"] == queue_url(name)
+
+
+def test_replay_falls_back_in_recorded_order(cassette_path):
+    record_queue_urls(cassette_path, ["queue-1", "queue-2"])
+    sqs_client = replay_client(cassette_path)
+
+    # A request that doesn't match, such as one with a generated name, takes the
+    # next unused response for the operation, whichever request it was recorded for.
+    assert sqs_client.get_queue_url(QueueName="other-2")["QueueUrl"] == queue_url(
+        "queue-1"
+    )
+    # So an exact match whose response was already taken repeats that response.
+    assert sqs_client.get_queue_url(QueueName="queue-1")["QueueUrl"] == queue_url(
+        "queue-1"
+    )
+    assert sqs_client.get_queue_url(QueueName="other-1")["QueueUrl"] == queue_url(
+        "queue-2"
+    )
+    with pytest.raises(CassetteMiss):
+        sqs_client.get_queue_url(QueueName="other-3")
+
+
+def test_replay_miss(cassette_path):
+    record_queue_urls(cassette_path, ["queue-1"])
+    sqs_client = replay_client(cassette_path)
+
+    with pytest.raises(CassetteMiss):
+        sqs_client.list_queues()
+
+
+def test_replay_without_cassette(cassette_path):
+    with pytest.raises(CassetteMiss):
+        Cassette(cassette_path)
+
+
+def test_params_hash_ignores_idempotency_token():
+    model = boto3.client("ec2", region_name=REGION).meta.service_model
+    operation = model.operation_model("RunInstances")
+    params = {"ImageId": "ami-12345678", "MinCount": 1, "MaxCount": 1}
+
+    assert params_hash(operation, {**params, "ClientToken": "a"}) == params_hash(
+        operation, {**params, "ClientToken": "b"}
+    )
+    assert params_hash(operation, params) != params_hash(
+        operation, {**params, "MaxCount": 2}
+    )
+
+
+def test_use_cassette_replaces_stubs(cassette_path):
+    record_queue_urls(cassette_path, ["queue-1"])
+    sqs_client = boto3.client("sqs", region_name=REGION)
+    sqs_stubber = stubber_factory("sqs")(sqs_client)
+
+    assert sqs_stubber.use_stubs
+    sqs_stubber.use_cassette(Cassette(cassette_path))
+    assert not sqs_stubber.use_stubs
+
+    # Stubbed responses are ignored, so the replayed response is returned.
+    sqs_stubber.stub_get_queue_url("queue-1", "https://example.com/stubbed")
+    sqs_stubber.activate()
+    assert sqs_client.get_queue_url(QueueName="queue-1")["QueueUrl"] == queue_url(
+        "queue-1"
+    )
+    sqs_stubber.assert_no_pending_responses()
+    sqs_stubber.deactivate()
+
+    # Once deactivated, the cassette no longer answers requests.
+    with Stubber(sqs_client) as stubber:
+        stubber.add_response("get_queue_url", {"QueueUrl": "https://example.com/stub"})
+        assert (
+            sqs_client.get_queue_url(QueueName="queue-1")["QueueUrl"]
+            == "https://example.com/stub"
+        )
@@ -0,0 +1,166 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unit tests for run_all_tests.py.
+"""
+
+import argparse
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from test_tools import run_all_tests
+from test_tools.run_all_tests import merge_junit_reports, parse_shard, schedule
+
+FOLDERS = [f"python/example_code/folder{index}" for index in range(7)]
+DURATIONS = {
+    FOLDERS[0]: 40.0,
+    FOLDERS[1]: 35.0,
+    FOLDERS[2]: 30.0,
+    FOLDERS[3]: 20.0,
+    FOLDERS[4]: 15.0,
+    FOLDERS[5]: 5.0,
+}
+JUNIT_REPORT = """<?xml version="1.0" encoding="utf-8"?>
+<testsuites>
+  <testsuite name="pytest" tests="{tests}" failures="{failures}" errors="0"
+             skipped="1" time="{time}">
+    <testcase classname="test_example" name="test_one" time="0.1"/>
+  </testsuite>
+</testsuites>
+"""
+
+
+def test_schedule_balances_longest_first():
+    shards = schedule(FOLDERS, DURATIONS, shard_count=2)
+
+    # The folder with no recorded duration counts as DEFAULT_DURATION.
+    assert shards == [
+        [FOLDERS[0], FOLDERS[3], FOLDERS[4], FOLDERS[5]],
+        [FOLDERS[1], FOLDERS[2], FOLDERS[6]],
+    ]
+    totals = [
+        sum(DURATIONS.get(folder, run_all_tests.DEFAULT_DURATION) for folder in shard)
+        for shard in shards
+    ]
+    assert totals == [80.0, 75.0]
+
+
+def test_schedule_is_deterministic():
+    durations = {folder: 10.0 for folder in FOLDERS}
+
+    shards = schedule(FOLDERS, durations, shard_count=3)
+
+    assert shards == schedule(list(reversed(FOLDERS)), dict(durations), 3)
+    assert sorted(folder for shard in shards for folder in shard) == FOLDERS
+
+
+@pytest.mark.parametrize(
+    "value,expected", [("1/1", (1, 1)), ("2/4", (2, 4)), ("4/4", (4, 4))]
+)
+def test_parse_shard(value, expected):
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["1", "a/4", "1/2/3", "0/4", "5/4", "1/0"])
+def test_parse_shard_error(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_shard(value)
+
+
+def test_merge_junit_reports(tmp_path):
+    first = tmp_path / "first.xml"
+    first.write_text(JUNIT_REPORT.format(tests=3, failures=1, time=1.5))
+    second = tmp_path / "second.xml"
+    second.write_text(JUNIT_REPORT.format(tests=2, failures=0, time=0.5))
+    results = [
+        {"folder": "python/b", "report": str(second), "returncode": 0, "output": ""},
+        {"folder": "python/a", "report": str(first), "returncode": 1, "output": ""},
+        {
+            "folder": "python/c",
+            "report": str(tmp_path / "missing.xml"),
+            "returncode": 2,
+            "output": "crashed",
+        },
+    ]
+    output_path = tmp_path / "merged.xml"
+
+    merge_junit_reports(results, output_path)
+
+    merged = ET.parse(output_path).getroot()
+    assert [suite.get("name") for suite in merged] == [
+        "python/a",
+        "python/b",
+        "python/c",
+    ]
+    assert {key: merged.get(key) for key in ("tests", "failures", "errors")} == {
+        "tests": "6",
+        "failures": "1",
+        "errors": "1",
+    }
+    assert merged.get("skipped") == "2"
+    assert merged.get("time") == "2.000"
+    assert merged.find("testsuite[@name='python/c']/testcase/error").text == "crashed"
+
+
+@pytest.fixture
+def fake_runs(monkeypatch):
+    ran = []
+
+    def run_test_dir(test_dir, test_kind, report_dir):
+        ran.append(test_dir)
+        returncode = 1 if test_dir == FOLDERS[1] else 0
+        return {
+            "folder": test_dir,
+            "returncode": returncode,
+            "passed": returncode == 0,
+            "duration": 1.0,
+            "report": "",
+            "output": "",
+        }
+
+    monkeypatch.setattr(run_all_tests, "find_test_dirs", lambda: FOLDERS[:3])
+    monkeypatch.setattr(run_all_tests, "run_test_dir", run_test_dir)
+    return ran
+
+
+def test_main_fails_when_a_folder_fails(fake_runs, tmp_path):
+    durations_file = tmp_path / "durations.json"
+
+    assert run_all_tests.main(["--durations-file", str(durations_file)]) == 1
+    assert sorted(fake_runs) == FOLDERS[:3]
+    with open(durations_file) as saved:
+        assert json.load(saved) == {folder: 1.0 for folder in FOLDERS[:3]}
+
+
+def test_main_passes(fake_runs, tmp_path, monkeypatch):
+    monkeypatch.setattr(run_all_tests, "find_test_dirs", lambda: [FOLDERS[0]])
+
+    assert (
+        run_all_tests.main(["--durations-file", str(tmp_path / "durations.json")]) == 0
+    )
+
+
+def test_main_shard_keeps_durations_file(fake_runs, tmp_path):
+    durations_file = tmp_path / "durations.json"
+    durations_file.write_text(json.dumps(DURATIONS))
+
+    run_all_tests.main(["--shard", "2/2", "--durations-file", str(durations_file)])
+
+    assert sorted(fake_runs) == FOLDERS[1:3]
+    assert json.loads(durations_file.read_text()) == DURATIONS
+
+
+@pytest.mark.parametrize("pinned", [False, True])
+def test_main_shard_requires_durations_file(fake_runs, tmp_path, pinned):
+    args = ["--shard", "1/2"]
+    if pinned:
+        args += ["--durations-file", str(tmp_path / "missing.json")]
+
+    with pytest.raises(SystemExit) as exc_info:
+        run_all_tests.main(args)
+
+    assert exc_info.value.code == 2
+    assert fake_runs == []
@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class TextractStubber(ExampleStubber):
+class TextractStubber(ExampleStubber, service_name="textract"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon Textract unit tests.
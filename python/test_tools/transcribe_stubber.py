@@ -11,7 +11,7 @@ set up stubs and passes all calls through to the Boto3 client.
 from test_tools.example_stubber import ExampleStubber
 
 
-class TranscribeStubber(ExampleStubber):
+class TranscribeStubber(ExampleStubber, service_name="transcribe"):
     """
     A class that implements a variety of stub functions that are used by the
     Amazon Transcribe unit tests.
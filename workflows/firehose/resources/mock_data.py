@@ -1,45 +1,123 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: Apache-2.0
+"""
+Generates fake network alert records for the Amazon Data Firehose put-actions
+scenario.
+
+Values are drawn in batches from pools that are built once, so generating millions
+of records for a load test takes seconds. Records are written as they are generated,
+either as a JSON array or as newline-delimited JSON (NDJSON), so memory use does not
+grow with the number of records. Faker is used to build the IP address pool when it
+is installed.
+
+    python mock_data.py --count 1000000 --format ndjson --output records.ndjson
+"""
+
+import argparse
+import itertools
+import json
 import random
 import time
-import json
-from faker import Faker
 
-# Initialize Faker
-fake = Faker()
+try:
+    from faker import Faker
+except ImportError:
+    Faker = None
+
+ALERT_LEVELS = ["Low", "Medium", "High", "Critical"]
+IP_POOL_SIZE = 10_000
+BATCH_SIZE = 10_000
+SAMPLE_COUNT = 5
+
+
+def make_ip_pool(size, rand):
+    """
+    Makes a pool of fake public IPv4 addresses.
+
+    :param size: The number of addresses in the pool.
+    :param rand: The random number generator that the pool is drawn from. Faker is
+                 seeded from it, so a seeded generator makes the same pool each time.
+    :return: The list of addresses.
+    """
+    if Faker is not None:
+        fake = Faker()
+        fake.seed_instance(rand.getrandbits(64))
+        return [fake.ipv4_public() for _ in range(size)]
+    return [
+        f"{rand.randint(1, 223)}.{rand.randint(0, 255)}."
+        f"{rand.randint(0, 255)}.{rand.randint(1, 254)}"
+        for _ in range(size)
+    ]
+
+
+def generate_records(count, seed=None, ip_pool_size=IP_POOL_SIZE):
+    """
+    Generates fake network alert records.
 
+    :param count: The number of records to generate.
+    :param seed: Seeds the random number generator, so the same records are
+                 generated each time. Timestamps still come from the clock.
+    :param ip_pool_size: The number of distinct IP addresses in the records.
+    :return: An iterator of records.
+    """
+    rand = random.Random(seed)
+    ip_pool = make_ip_pool(ip_pool_size, rand)
+    for start in range(0, count, BATCH_SIZE):
+        size = min(BATCH_SIZE, count - start)
+        timestamp = int(time.time())
+        for ip_address, alert_level in zip(
+            rand.choices(ip_pool, k=size), rand.choices(ALERT_LEVELS, k=size)
+        ):
+            yield {
+                "ip_address": ip_address,
+                "timestamp": timestamp,
+                "alert_level": alert_level,
+            }
 
-# Function to generate a fake IP address
-def generate_ip():
-    return fake.ipv4()
 
+def write_records(records, output_file, output_format):
+    """
+    Writes records to a file as they are generated.
 
-# Function to generate a Unix timestamp
-def generate_timestamp():
-    return int(time.time())
+    :param records: The records to write.
+    :param output_file: The file to write to.
+    :param output_format: 'json' to write a JSON array, or 'ndjson' to write one
+                          record on each line.
+    """
+    lines = (json.dumps(record, separators=(",", ":")) for record in records)
+    if output_format == "ndjson":
+        for line in lines:
+            output_file.write(line + "\n")
+    else:
+        output_file.write("[\n")
+        for index, line in enumerate(lines):
+            output_file.write((",\n" if index else "") + line)
+        output_file.write("\n]\n")
 
 
-# Function to generate an alert level
-def generate_alert_level():
-    return random.choice(["Low", "Medium", "High", "Critical"])
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--count", type=int, default=2550)
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json")
+    parser.add_argument("--output", default="../sample_records.json")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
 
+    start = time.perf_counter()
+    records = generate_records(args.count, args.seed)
+    samples = list(itertools.islice(records, SAMPLE_COUNT))
+    for record in samples:
+        print(json.dumps(record, indent=2))
 
-# Generate 2,550 sample records
-records = []
-for _ in range(2550):
-    record = {
-        "ip_address": generate_ip(),
-        "timestamp": generate_timestamp(),
-        "alert_level": generate_alert_level(),
-    }
-    records.append(record)
+    with open(args.output, "w") as f:
+        write_records(itertools.chain(samples, records), f, args.format)
 
-# Print sample records
-for record in records[:5]:  # Print the first 5 records as a sample
-    print(json.dumps(record, indent=2))
+    elapsed = time.perf_counter() - start
+    print(
+        f"Generated {args.count:,} sample records in {elapsed:.2f} seconds "
+        f"to {args.output}."
+    )
 
-# Optionally save to a file
-with open("../sample_records.json", "w") as f:
-    json.dump(records, f, indent=2)
 
-print("Generated 2,550 sample records.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A local load-generation benchmark for the recommendation server in server.py.
+
+The benchmark runs the server on localhost with stand-in Systems Manager and
+DynamoDB clients that add a fixed latency to each call, and sends requests to it
+from several client threads. It reports p50 and p99 latency for the original
+serving mode (parameters fetched for every request, one request at a time) and
+for the cached, threaded, and preloaded modes.
+
+This benchmark calls no AWS services. Run it from this folder:
+
+    python benchmark_server.py
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import urlopen
+
+from botocore.exceptions import ClientError
+
+import server
+
+TABLE_NAME = "doc-example-recommendation-service"
+
+
+class StandInSsmClient:
+    """Returns the demo parameters after a fixed latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def get_parameters(self, Names):
+        time.sleep(self.latency)
+        values = {
+            server.TABLE_PARAMETER: TABLE_NAME,
+            server.FAILURE_RESPONSE_PARAMETER: "none",
+            server.HEALTH_CHECK_PARAMETER: "shallow",
+        }
+        return {"Parameters": [{"Name": name, "Value": values[name]} for name in Names]}
+
+
+class StandInDynamoDbClient:
+    """Serves the items in recommendations.json after a fixed latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        with open(os.path.join(os.path.dirname(__file__), "recommendations.json")) as f:
+            self.items = json.load(f)
+
+    def _check_table(self, TableName):
+        if TableName != TABLE_NAME:
+            raise ClientError(
+                {"Error": {"Code": "ResourceNotFoundException", "Message": TableName}},
+                "GetItem",
+            )
+
+    def get_item(self, TableName, Key):
+        time.sleep(self.latency)
+        self._check_table(TableName)
+        for item in self.items:
+            if (
+                item["MediaType"] == Key["MediaType"]
+                and item["ItemId"] == Key["ItemId"]
+            ):
+                return {"Item": dict(item)}
+        return {}
+
+    def get_paginator(self, operation_name):
+        client = self
+
+        class Paginator:
+            def paginate(self, TableName):
+                time.sleep(client.latency)
+                client._check_table(TableName)
+                yield {"Items": client.items}
+
+        return Paginator()
+
+
+class QuietRequestHandler(server.RequestHandler):
+    """
+    Handles requests without logging them. The server logs every request, which
+    would slow down the measurement.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(mode, requests, concurrency, ssm_latency, dynamodb_latency):
+    """
+    Starts a server in the specified mode and sends requests to it.
+
+    :param mode: The server options, as keyword arguments for server.make_server.
+    :param requests: The number of requests to send.
+    :param concurrency: The number of client threads that send requests.
+    :param ssm_latency: The latency of each Systems Manager call, in seconds.
+    :param dynamodb_latency: The latency of each DynamoDB call, in seconds.
+    :return: The latency of each request, in seconds.
+    """
+    httpd, parameters = server.make_server(
+        ("127.0.0.1", 0),
+        StandInDynamoDbClient(dynamodb_latency),
+        StandInSsmClient(ssm_latency),
+        {"InstanceId": "i-local", "AvailabilityZone": "local"},
+        handler_class=QuietRequestHandler,
+        **mode,
+    )
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    def timed_get(_):
+        start = time.perf_counter()
+        with urlopen(url) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(timed_get, range(requests)))
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        parameters.stop()
+
+
+def percentile(latencies, fraction):
+    return statistics.quantiles(latencies, n=100, method="inclusive")[
+        round(fraction * 100) - 1
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--ssm-latency",
+        type=float,
+        default=0.015,
+        help="The latency of each Systems Manager call, in seconds.",
+    )
+    parser.add_argument(
+        "--dynamodb-latency",
+        type=float,
+        default=0.010,
+        help="The latency of each DynamoDB call, in seconds.",
+    )
+    args = parser.parse_args()
+
+    modes = {
+        "original": {"parameter_ttl": 0, "threaded": False},
+        "cached parameters": {"parameter_ttl": 5, "threaded": False},
+        "cached + threaded": {"parameter_ttl": 5, "threaded": True},
+        "cached + threaded + preload": {
+            "parameter_ttl": 5,
+            "threaded": True,
+            "preload_table": True,
+        },
+    }
+    print(
+        f"{args.requests} requests from {args.concurrency} clients, "
+        f"SSM latency {args.ssm_latency * 1000:.0f} ms, "
+        f"DynamoDB latency {args.dynamodb_latency * 1000:.0f} ms."
+    )
+    print(f"{'Mode':<30}{'p50 (ms)':>10}{'p99 (ms)':>10}{'req/s':>10}")
+    for name, mode in modes.items():
+        start = time.perf_counter()
+        # The server prints the path of every request.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            latencies = measure(
+                mode,
+                args.requests,
+                args.concurrency,
+                args.ssm_latency,
+                args.dynamodb_latency,
+            )
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:<30}{percentile(latencies, 0.5) * 1000:>10.1f}"
+            f"{percentile(latencies, 0.99) * 1000:>10.1f}"
+            f"{len(latencies) / elapsed:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
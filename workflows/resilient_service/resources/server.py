@@ -10,27 +10,146 @@ This code is only for use in this example.
 """
 
 import argparse
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 import json
 from functools import partial
 from traceback import format_exc
 import random
+import threading
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 from ec2_metadata import ec2_metadata
 
+TABLE_PARAMETER = "doc-example-resilient-architecture-table"
+FAILURE_RESPONSE_PARAMETER = "doc-example-resilient-architecture-failure-response"
+HEALTH_CHECK_PARAMETER = "doc-example-resilient-architecture-health-check"
+
+
+class ParameterCache:
+    """
+    Keeps the Systems Manager parameters that drive the demo in memory, so that
+    requests don't wait for Systems Manager. A background thread refreshes the
+    parameters every `ttl` seconds, so a change to a parameter takes effect within
+    that time. When `ttl` is 0, the parameters are fetched for every request.
+    """
+
+    def __init__(self, ssm_client, names, ttl):
+        """
+        :param ssm_client: A Boto3 Systems Manager client.
+        :param names: The names of the parameters to get.
+        :param ttl: The number of seconds between refreshes.
+        """
+        self.ssm_client = ssm_client
+        self.names = names
+        self.ttl = ttl
+        self._values = {}
+        self._stopped = threading.Event()
+        if self.ttl > 0:
+            self._refresh()
+            threading.Thread(target=self._refresh_forever, daemon=True).start()
+
+    def _fetch(self):
+        response = self.ssm_client.get_parameters(Names=self.names)
+        return {p["Name"]: p["Value"] for p in response["Parameters"]}
+
+    def _refresh(self):
+        try:
+            values = self._fetch()
+        except (BotoCoreError, ClientError) as err:
+            # Keep serving the last known values until Systems Manager is reachable.
+            print(f"Couldn't refresh parameters: {err}")
+        else:
+            if values != self._values:
+                print(values)
+            self._values = values
+
+    def _refresh_forever(self):
+        while not self._stopped.wait(self.ttl):
+            self._refresh()
+
+    def get(self):
+        """
+        :return: The parameters, as a dict of names and values.
+        """
+        if self.ttl > 0:
+            return self._values
+        return self._fetch()
+
+    def stop(self):
+        """Stops the background refresh."""
+        self._stopped.set()
+
+
+class RecommendationCache:
+    """
+    Holds the items of recommendation tables in memory. The first request that uses
+    a table scans it, and later requests are served without calling DynamoDB.
+    Items are kept for each table name, so when the table parameter is changed to a
+    table that doesn't exist, requests fail the same way they do without the cache.
+    """
+
+    def __init__(self, dynamodb_client):
+        """
+        :param dynamodb_client: A Boto3 DynamoDB client.
+        """
+        self.dynamodb_client = dynamodb_client
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _load(self, table_name):
+        items = {}
+        paginator = self.dynamodb_client.get_paginator("scan")
+        for page in paginator.paginate(TableName=table_name):
+            for item in page["Items"]:
+                items[(item["MediaType"]["S"], item["ItemId"]["N"])] = item
+        print(f"Loaded {len(items)} recommendations from {table_name}.")
+        return items
+
+    def get_item(self, TableName, Key):
+        """
+        Gets an item in the same form as the DynamoDB get_item function.
+
+        :param TableName: The name of the recommendation table.
+        :param Key: The key of the item.
+        :return: A dict that contains the item, if it exists.
+        """
+        items = self._tables.get(TableName)
+        if items is None:
+            with self._lock:
+                items = self._tables.get(TableName)
+                if items is None:
+                    items = self._load(TableName)
+                    self._tables[TableName] = items
+        item = items.get((Key["MediaType"]["S"], Key["ItemId"]["N"]))
+        # Return a copy because the caller adds metadata to the item.
+        return {"Item": dict(item)} if item is not None else {}
+
 
 class RequestHandler(BaseHTTPRequestHandler):
     """Handles HTTP requests by returning a recommendation or responding to a health check."""
 
-    def __init__(self, dynamodb_client, ssm_client, *args, **kwargs):
+    def __init__(
+        self,
+        dynamodb_client,
+        parameters,
+        recommendations,
+        instance_metadata,
+        *args,
+        **kwargs,
+    ):
         """
         :param dynamodb_client: A Boto3 DynamoDB client.
-        :param ssm_client: A Boto3 Systems Manager client.
+        :param parameters: The ParameterCache that holds the demo parameters.
+        :param recommendations: The object that gets recommendation items, either
+                                the DynamoDB client or a RecommendationCache.
+        :param instance_metadata: The metadata about the instance that is added to
+                                  each recommendation.
         """
         self.dynamodb_client = dynamodb_client
-        self.ssm_client = ssm_client
+        self.parameters = parameters
+        self.recommendations = recommendations
+        self.instance_metadata = instance_metadata
         super().__init__(*args, **kwargs)
 
     def _respond(self, status_code, payload):
@@ -63,20 +182,16 @@ class RequestHandler(BaseHTTPRequestHandler):
         """
         print("path: ", self.path)
 
-        table = "doc-example-resilient-architecture-table"
-        failure_response = "doc-example-resilient-architecture-failure-response"
-        health_check = "doc-example-resilient-architecture-health-check"
-        param_response = self.ssm_client.get_parameters(
-            Names=[table, failure_response, health_check]
-        )
-        parameters = {p["Name"]: p["Value"] for p in param_response["Parameters"]}
-        print(parameters)
+        table = TABLE_PARAMETER
+        failure_response = FAILURE_RESPONSE_PARAMETER
+        health_check = HEALTH_CHECK_PARAMETER
+        parameters = self.parameters.get()
 
         if self.path == "/":
             try:
                 media_type = random.choice(["Book", "Movie", "Song"])
                 item_id = random.randint(1, 3)
-                response = self.dynamodb_client.get_item(
+                response = self.recommendations.get_item(
                     TableName=parameters[table],
                     Key={"MediaType": {"S": media_type}, "ItemId": {"N": str(item_id)}},
                 )
@@ -96,10 +211,7 @@ class RequestHandler(BaseHTTPRequestHandler):
                 self._respond(500, {"error": format_exc()})
                 return
 
-            payload["Metadata"] = {
-                "InstanceId": ec2_metadata.instance_id,
-                "AvailabilityZone": ec2_metadata.availability_zone,
-            }
+            payload["Metadata"] = self.instance_metadata
             self._respond(200, payload)
         elif self.path == "/healthcheck":
             response_code = 200
@@ -124,6 +236,68 @@ class RequestHandler(BaseHTTPRequestHandler):
             self._respond(response_code, {"success": success})
 
 
+def make_server(
+    server_address,
+    dynamodb_client,
+    ssm_client,
+    instance_metadata,
+    parameter_ttl=5,
+    threaded=True,
+    preload_table=False,
+    handler_class=None,
+):
+    """
+    Makes a web server that handles recommendation and health check requests.
+
+    :param server_address: The IP address and port where the server listens.
+    :param dynamodb_client: A Boto3 DynamoDB client.
+    :param ssm_client: A Boto3 Systems Manager client.
+    :param instance_metadata: The metadata about the instance that is added to
+                              each recommendation.
+    :param parameter_ttl: The number of seconds to cache Systems Manager parameters.
+                          When 0, parameters are fetched for every request.
+    :param threaded: When True, each request is handled in its own thread, so a slow
+                     request doesn't delay other clients.
+    :param preload_table: When True, recommendation tables are read into memory.
+    :param handler_class: The class that handles requests. Defaults to
+                          RequestHandler.
+    :return: The server and the parameter cache that it uses.
+    """
+    parameters = ParameterCache(
+        ssm_client,
+        [TABLE_PARAMETER, FAILURE_RESPONSE_PARAMETER, HEALTH_CHECK_PARAMETER],
+        parameter_ttl,
+    )
+    recommendations = dynamodb_client
+    if preload_table:
+        recommendations = RecommendationCache(dynamodb_client)
+        table_name = parameters.get().get(TABLE_PARAMETER)
+        if table_name is not None:
+            try:
+                recommendations.get_item(
+                    TableName=table_name,
+                    Key={"MediaType": {"S": "Book"}, "ItemId": {"N": "1"}},
+                )
+            except ClientError as err:
+                print(f"Couldn't preload recommendations: {err}")
+    handler = partial(
+        handler_class or RequestHandler,
+        dynamodb_client,
+        parameters,
+        recommendations,
+        instance_metadata,
+    )
+    if not threaded:
+        return HTTPServer(server_address, handler), parameters
+    httpd = ThreadingHTTPServer(server_address, handler, bind_and_activate=False)
+    # The default backlog of 5 connections makes bursts of clients wait for
+    # connection retries, even though the threads are ready to handle them.
+    httpd.request_queue_size = 128
+    httpd.server_bind()
+    httpd.server_activate()
+    return httpd, parameters
+
+
 def run():
     """
     Runs a web server that listens for HTTP requests on the specified port.
@@ -136,10 +310,30 @@ def run():
     )
     parser.add_argument(
         "--region",
-        default=ec2_metadata.region,
-        help="The AWS Region of AWS resources used by this example.",
+        default=None,
+        help="The AWS Region of AWS resources used by this example. Defaults to the "
+        "Region of the instance.",
+    )
+    parser.add_argument(
+        "--parameter-ttl",
+        default=5,
+        type=float,
+        help="The number of seconds to cache Systems Manager parameters. Use 0 to "
+        "get parameters for every request.",
+    )
+    parser.add_argument(
+        "--single-thread",
+        action="store_true",
+        help="Handle one request at a time instead of a thread for each request.",
+    )
+    parser.add_argument(
+        "--preload-table",
+        action="store_true",
+        help="Read the recommendation table into memory instead of getting an item "
+        "from DynamoDB for every request.",
     )
     args = parser.parse_args()
+    region = args.region if args.region is not None else ec2_metadata.region
 
     server_port = args.port
     server_ip = "0.0.0.0"
@@ -147,10 +341,21 @@ def run():
     print("Starting server...")
     server_address = (server_ip, server_port)
 
-    dynamodb_client = boto3.client("dynamodb", region_name=args.region)
-    ssm_client = boto3.client("ssm", region_name=args.region)
-    handler = partial(RequestHandler, dynamodb_client, ssm_client)
-    httpd = HTTPServer(server_address, handler)
+    dynamodb_client = boto3.client("dynamodb", region_name=region)
+    ssm_client = boto3.client("ssm", region_name=region)
+    instance_metadata = {
+        "InstanceId": ec2_metadata.instance_id,
+        "AvailabilityZone": ec2_metadata.availability_zone,
+    }
+    httpd, _ = make_server(
+        server_address,
+        dynamodb_client,
+        ssm_client,
+        instance_metadata,
+        parameter_ttl=args.parameter_ttl,
+        threaded=not args.single_thread,
+        preload_table=args.preload_table,
+    )
     print("Running server...")
     httpd.serve_forever()
 